@@ -0,0 +1,212 @@
+"""Admission control: per-client and per-route token buckets plus in-flight caps"""
+import hashlib
+import json
+import logging
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, FrozenSet, Iterable, Optional, Protocol, Tuple
+
+from pymongo import ReturnDocument
+
+from metrics import route_template
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateLimit:
+    """rate tokens per second, up to burst tokens saved up"""
+    rate: float
+    burst: int
+
+
+@dataclass(frozen=True)
+class AdmissionRule:
+    client: Optional[RateLimit] = None
+    route: Optional[RateLimit] = None
+    max_in_flight: Optional[int] = None
+
+
+class BucketStore(Protocol):
+    async def take(self, key: str, limit: RateLimit) -> Tuple[bool, float]:
+        """Take one token; returns (allowed, seconds until a token is available)"""
+        ...
+
+
+def _wait_time(tokens: float, limit: RateLimit) -> float:
+    return max(0.0, (1 - tokens) / limit.rate)
+
+
+class MemoryBucketStore:
+    """Per-process buckets; the default, and the stand-in for a shared store"""
+
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        # key -> (tokens, updated_at); least recently used first
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, limit: RateLimit) -> Tuple[bool, float]:
+        now = time.monotonic()
+        tokens, updated_at = self._buckets.pop(key, (limit.burst, now))
+        tokens = min(limit.burst, tokens + (now - updated_at) * limit.rate)
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_keys:
+            self._buckets.popitem(last=False)
+        return allowed, 0.0 if allowed else _wait_time(tokens, limit)
+
+
+class MongoBucketStore:
+    """Buckets shared by every worker, updated atomically with one pipeline update per request"""
+
+    def __init__(self, collection, ttl_seconds: float = 3600):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    async def take(self, key: str, limit: RateLimit) -> Tuple[bool, float]:
+        now = time.time()
+        refilled = {"$add": [
+            {"$ifNull": ["$tokens", limit.burst]},
+            {"$multiply": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, limit.rate]},
+        ]}
+        bucket = await self.collection.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {
+                    "tokens": {"$min": [limit.burst, refilled]},
+                    "updated_at": now,
+                    "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl_seconds),
+                }},
+                {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+                {"$set": {"tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]}}},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        allowed = bool(bucket["allowed"])
+        return allowed, 0.0 if allowed else _wait_time(bucket["tokens"], limit)
+
+
+def key_fingerprint(api_key: str) -> str:
+    """Short SHA-256 of an API key, so bucket keys and stores never hold the key itself"""
+    return hashlib.sha256(api_key.encode("latin-1")).hexdigest()[:32]
+
+
+def client_id(scope, api_keys: FrozenSet[str] = frozenset()) -> str:
+    """The API key's fingerprint when it is one of api_keys, otherwise the client address.
+
+    Unknown keys are ignored: otherwise a caller could send a fresh key
+    with every request and get a fresh bucket each time.
+    """
+    if api_keys:
+        for name, value in scope.get("headers", ()):
+            if name == b"x-api-key" and value:
+                fingerprint = key_fingerprint(value.decode("latin-1"))
+                if fingerprint in api_keys:
+                    return "key:" + fingerprint
+                break
+    client = scope.get("client")
+    return "ip:" + (client[0] if client else "unknown")
+
+
+class AdmissionController:
+    """Decides whether a request may start work.
+
+    Rules are keyed by route template, so every client hitting
+    /api/generate-video shares that route's bucket while each client also
+    has its own. Over-rate clients get 429, and routes already serving
+    max_in_flight requests get 503, both with Retry-After.
+    """
+
+    def __init__(self, rules: Dict[str, AdmissionRule], store: BucketStore, methods=("POST",),
+                 api_keys: Iterable[str] = ()):
+        self.rules = rules
+        self.store = store
+        self.methods = set(methods)
+        # Clients sending one of these X-API-Key values get a bucket per key instead of per address
+        self.api_keys = frozenset(key_fingerprint(key) for key in api_keys if key)
+        self._in_flight: Dict[str, int] = {}
+        self.rejected = {"rate_limited": 0, "overloaded": 0}
+
+    def rule_for(self, scope) -> Tuple[Optional[str], Optional[AdmissionRule]]:
+        if scope["method"] not in self.methods:
+            return None, None
+        route = route_template(scope)
+        return route, self.rules.get(route)
+
+    async def admit(self, scope, route: str, rule: AdmissionRule) -> Optional[Tuple[int, str, float]]:
+        """None when admitted (the caller must release()), else (status, detail, retry_after)"""
+        if rule.max_in_flight is not None and self._in_flight.get(route, 0) >= rule.max_in_flight:
+            self.rejected["overloaded"] += 1
+            return 503, "Server is busy, please retry shortly", 1
+
+        # Route first: a request the route turns away must not cost the client a token
+        for key, limit in ((f"route|{route}", rule.route), (f"{client_id(scope, self.api_keys)}|{route}", rule.client)):
+            if limit is None:
+                continue
+            try:
+                allowed, retry_after = await self.store.take(key, limit)
+            except Exception:
+                # A shared store outage must not take the API down with it
+                logger.exception("Rate limit store unavailable, admitting request")
+                continue
+            if not allowed:
+                self.rejected["rate_limited"] += 1
+                return 429, "Rate limit exceeded, please slow down", retry_after
+
+        self._in_flight[route] = self._in_flight.get(route, 0) + 1
+        return None
+
+    def release(self, route: str) -> None:
+        self._in_flight[route] -= 1
+
+    def stats(self) -> Dict[str, object]:
+        return {"in_flight": dict(self._in_flight), "rejected": dict(self.rejected)}
+
+
+class AdmissionMiddleware:
+    """Pure ASGI, so rejected requests never reach routing or body parsing"""
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route, rule = self.controller.rule_for(scope)
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+
+        rejection = await self.controller.admit(scope, route, rule)
+        if rejection is not None:
+            await reject(send, *rejection)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(route)
+
+
+async def reject(send, status: int, detail: str, retry_after: float) -> None:
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("ascii")),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode("ascii")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
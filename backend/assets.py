@@ -0,0 +1,222 @@
+"""Content-addressed asset storage: each blob is stored once under its SHA-256"""
+import asyncio
+import hashlib
+import json
+import os
+import re
+import uuid
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, Dict, Optional, Protocol, Tuple, Union
+
+CHUNK_SIZE = 64 * 1024
+DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+
+Blob = Union[bytes, AsyncIterable[bytes]]
+
+
+@dataclass(frozen=True)
+class Asset:
+    digest: str
+    size: int
+    content_type: str
+    # False when an identical blob was already stored and nothing was written
+    created: bool = False
+
+
+def is_digest(value: str) -> bool:
+    return DIGEST_PATTERN.match(value) is not None
+
+
+class AssetStore(Protocol):
+    async def open(self) -> None:
+        """Prepare the backing storage; called once when the app starts"""
+        ...
+
+    async def put(self, data: Blob, content_type: str = DEFAULT_CONTENT_TYPE) -> Asset:
+        ...
+
+    async def stat(self, digest: str) -> Optional[Asset]:
+        ...
+
+    def read(self, digest: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        """The blob's bytes from start to end inclusive, in chunks"""
+        ...
+
+    def local_path(self, digest: str) -> Optional[Path]:
+        """A file the server can send directly, or None for remote stores"""
+        ...
+
+    def stats(self) -> Dict[str, int]:
+        ...
+
+
+async def _chunks(data: Blob) -> AsyncIterator[bytes]:
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        for offset in range(0, len(data), CHUNK_SIZE):
+            yield bytes(data[offset:offset + CHUNK_SIZE])
+    else:
+        async for chunk in data:
+            yield chunk
+
+
+class LocalAssetStore:
+    """Blobs on the local filesystem, sharded as root/ab/cd/<digest> with a JSON sidecar.
+
+    Streams are hashed while they are written to a temporary file and
+    moved into place atomically, so readers never see a partial blob. A
+    blob that is already stored is not written again.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self._tmp = self.root / "tmp"
+        self.stored = 0
+        self.deduplicated = 0
+
+    async def open(self) -> None:
+        await asyncio.to_thread(self._tmp.mkdir, parents=True, exist_ok=True)
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def local_path(self, digest: str) -> Optional[Path]:
+        return self._path(digest)
+
+    async def stat(self, digest: str) -> Optional[Asset]:
+        return await asyncio.to_thread(self._stat, digest)
+
+    def _stat(self, digest: str) -> Optional[Asset]:
+        path = self._path(digest)
+        try:
+            size = path.stat().st_size
+        except FileNotFoundError:
+            return None
+        try:
+            content_type = json.loads(path.with_name(f"{digest}.json").read_text())["content_type"]
+        except (OSError, ValueError, KeyError):
+            content_type = DEFAULT_CONTENT_TYPE
+        return Asset(digest=digest, size=size, content_type=content_type)
+
+    async def put(self, data: Blob, content_type: str = DEFAULT_CONTENT_TYPE) -> Asset:
+        if isinstance(data, (bytes, bytearray, memoryview)):
+            # The digest is known up front: skip the write entirely for a stored blob
+            existing = await self.stat(hashlib.sha256(data).hexdigest())
+            if existing is not None:
+                self.deduplicated += 1
+                return existing
+
+        tmp_path = self._tmp / uuid.uuid4().hex
+        hasher = hashlib.sha256()
+        size = 0
+        f = await asyncio.to_thread(open, tmp_path, "wb")
+        try:
+            async for chunk in _chunks(data):
+                hasher.update(chunk)
+                size += len(chunk)
+                await asyncio.to_thread(f.write, chunk)
+            await asyncio.to_thread(f.flush)
+        except BaseException:
+            f.close()
+            tmp_path.unlink(missing_ok=True)
+            raise
+        f.close()
+        return await asyncio.to_thread(self._commit, tmp_path, hasher.hexdigest(), size, content_type)
+
+    def _commit(self, tmp_path: Path, digest: str, size: int, content_type: str) -> Asset:
+        existing = self._stat(digest)
+        if existing is not None:
+            tmp_path.unlink(missing_ok=True)
+            self.deduplicated += 1
+            return existing
+        path = self._path(digest)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Sidecar first: once the blob is visible its content type is too
+        sidecar = self._tmp / f"{tmp_path.name}.json"
+        sidecar.write_text(json.dumps({"content_type": content_type, "size": size}))
+        os.replace(sidecar, path.with_name(f"{digest}.json"))
+        os.replace(tmp_path, path)
+        self.stored += 1
+        return Asset(digest=digest, size=size, content_type=content_type, created=True)
+
+    async def read(self, digest: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        fd = await asyncio.to_thread(os.open, self._path(digest), os.O_RDONLY)
+        try:
+            if end is None:
+                end = os.fstat(fd).st_size - 1
+            offset = start
+            while offset <= end:
+                chunk = await asyncio.to_thread(os.pread, fd, min(CHUNK_SIZE, end - offset + 1), offset)
+                if not chunk:
+                    break
+                offset += len(chunk)
+                yield chunk
+        finally:
+            os.close(fd)
+
+    def stats(self) -> Dict[str, int]:
+        return {"stored": self.stored, "deduplicated": self.deduplicated}
+
+
+class MemoryAssetStore:
+    """In-process stand-in for an object store, for tests and throwaway environments"""
+
+    def __init__(self):
+        self._blobs: Dict[str, Tuple[bytes, str]] = {}
+        self.stored = 0
+        self.deduplicated = 0
+
+    async def open(self) -> None:
+        pass
+
+    def local_path(self, digest: str) -> Optional[Path]:
+        return None
+
+    async def stat(self, digest: str) -> Optional[Asset]:
+        blob = self._blobs.get(digest)
+        if blob is None:
+            return None
+        return Asset(digest=digest, size=len(blob[0]), content_type=blob[1])
+
+    async def put(self, data: Blob, content_type: str = DEFAULT_CONTENT_TYPE) -> Asset:
+        body = b"".join([chunk async for chunk in _chunks(data)])
+        digest = hashlib.sha256(body).hexdigest()
+        if digest in self._blobs:
+            self.deduplicated += 1
+            return await self.stat(digest)
+        self._blobs[digest] = (body, content_type)
+        self.stored += 1
+        return Asset(digest=digest, size=len(body), content_type=content_type, created=True)
+
+    async def read(self, digest: str, start: int = 0, end: Optional[int] = None) -> AsyncIterator[bytes]:
+        body = self._blobs[digest][0]
+        end = len(body) - 1 if end is None else end
+        for offset in range(start, end + 1, CHUNK_SIZE):
+            yield body[offset:min(offset + CHUNK_SIZE, end + 1)]
+
+    def stats(self) -> Dict[str, int]:
+        return {"stored": self.stored, "deduplicated": self.deduplicated}
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """(start, end) inclusive for a single "bytes=" range, None to send the whole blob.
+
+    Raises ValueError for a range that cannot be satisfied. Multiple
+    ranges are answered with the whole blob, which RFC 9110 allows.
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = min(int(last), size - 1) if last else size - 1
+        else:
+            # "bytes=-500": the last 500 bytes
+            start, end = max(0, size - int(last)), size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        raise ValueError(f"Range {header!r} not satisfiable for {size} bytes")
+    return start, end
@@ -0,0 +1,160 @@
+"""Write-behind buffer that batches inserts into insert_many calls"""
+import asyncio
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+
+class BatchWriteError(Exception):
+    """Raised on a document's future when its batch insert failed"""
+
+
+class BatchWriter:
+    """Buffers documents and flushes them with insert_many(ordered=False).
+
+    A batch is flushed once it reaches max_batch documents or max_delay
+    seconds after its first document arrived, whichever comes first.
+    add() waits when max_pending documents are already buffered, which
+    pushes back on callers instead of growing memory without bound.
+    """
+
+    def __init__(
+        self,
+        collection,
+        key_field: str = "_id",
+        max_batch: int = 500,
+        max_delay: float = 0.05,
+        max_pending: int = 10000,
+        on_flush: Optional[Callable[[int, float], None]] = None,
+    ):
+        self.collection = collection
+        self.on_flush = on_flush
+        self.key_field = key_field
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.max_pending = max_pending
+        self._buffer: List[Tuple[Dict[str, Any], asyncio.Future]] = []
+        self._pending: Dict[Any, Dict[str, Any]] = {}
+        self._slots = asyncio.Semaphore(max_pending)
+        self._not_empty = asyncio.Event()
+        self._full = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._closing = False
+        self._stats = {
+            "batches": 0,
+            "documents": 0,
+            "failed_documents": 0,
+            "last_batch_size": 0,
+            "max_batch_size": 0,
+            "total_flush_seconds": 0.0,
+            "max_flush_seconds": 0.0,
+        }
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._run(), name="batch-writer")
+
+    async def close(self) -> None:
+        """Stop the background flusher and write out everything still buffered.
+
+        The flusher is woken and left to finish its current batch rather
+        than cancelled: a batch already taken off the buffer would
+        otherwise never be written.
+        """
+        if self._task is not None:
+            self._closing = True
+            self._not_empty.set()
+            self._full.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+    async def add(self, doc: Dict[str, Any]) -> asyncio.Future:
+        """Buffer a document; the returned future resolves once it is written"""
+        await self._slots.acquire()
+        future = asyncio.get_running_loop().create_future()
+        self._buffer.append((doc, future))
+        self._pending[doc.get(self.key_field)] = doc
+        self._not_empty.set()
+        if len(self._buffer) >= self.max_batch:
+            self._full.set()
+        return future
+
+    def pending(self, key: Any) -> Optional[Dict[str, Any]]:
+        """A buffered document that has not reached the database yet"""
+        return self._pending.get(key)
+
+    async def _run(self) -> None:
+        while not self._closing:
+            await self._not_empty.wait()
+            try:
+                await asyncio.wait_for(self._full.wait(), self.max_delay)
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await self.flush()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Batch flush failed")
+
+    async def flush(self) -> None:
+        async with self._flush_lock:
+            while self._buffer:
+                batch = self._buffer[:self.max_batch]
+                self._buffer = self._buffer[self.max_batch:]
+                if len(self._buffer) < self.max_batch:
+                    self._full.clear()
+                if not self._buffer:
+                    self._not_empty.clear()
+                await self._write(batch)
+
+    async def _write(self, batch: List[Tuple[Dict[str, Any], asyncio.Future]]) -> None:
+        docs = [doc for doc, _ in batch]
+        failed: Dict[int, str] = {}
+        started = time.perf_counter()
+        try:
+            await self.collection.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            failed = {err["index"]: err.get("errmsg", "write error") for err in e.details.get("writeErrors", [])}
+        except Exception as e:
+            failed = {i: str(e) for i in range(len(docs))}
+        elapsed = time.perf_counter() - started
+
+        stats = self._stats
+        stats["batches"] += 1
+        stats["documents"] += len(docs)
+        stats["failed_documents"] += len(failed)
+        stats["last_batch_size"] = len(docs)
+        stats["max_batch_size"] = max(stats["max_batch_size"], len(docs))
+        stats["total_flush_seconds"] += elapsed
+        stats["max_flush_seconds"] = max(stats["max_flush_seconds"], elapsed)
+        if self.on_flush is not None:
+            self.on_flush(len(docs), elapsed)
+        if failed:
+            logger.error("Batch insert failed for %d of %d documents", len(failed), len(docs))
+
+        for index, (doc, future) in enumerate(batch):
+            self._pending.pop(doc.get(self.key_field), None)
+            self._slots.release()
+            if future.done():
+                continue
+            if index in failed:
+                future.set_exception(BatchWriteError(failed[index]))
+                future.exception()  # consumers may be gone; don't warn about it
+            else:
+                future.set_result(None)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = dict(self._stats)
+        batches = stats["batches"]
+        stats["avg_batch_size"] = round(stats["documents"] / batches, 2) if batches else 0.0
+        stats["avg_flush_seconds"] = round(stats["total_flush_seconds"] / batches, 6) if batches else 0.0
+        stats["buffered"] = len(self._buffer)
+        return stats
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Load-testing and benchmark harness for the Lotaya AI API.
+
+Runs the FastAPI app in-process against mongomock-motor (or a throwaway
+mongod via --mongo-url), drives every tool endpoint with configurable
+concurrency and writes throughput, latency percentiles and error rates to
+JSON. With --baseline the run is compared against a stored result and the
+exit code is 1 when any endpoint regressed.
+
+    python benchmark.py --requests 200 --concurrency 50 --output bench.json
+    python benchmark.py --baseline bench.json --tolerance 0.15
+"""
+
+import argparse
+import asyncio
+import copy
+import io
+import json
+import os
+import platform
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+os.environ.setdefault('DB_NAME', 'lotaya_benchmark')
+# One client hammering each endpoint would otherwise be measured against its own rate limits
+os.environ.setdefault('RATE_LIMITS_ENABLED', 'false')
+
+import httpx
+
+import server
+
+# Stands for the URL of the sample image, which is stored before the run starts
+SAMPLE_IMAGE = "<sample-image>"
+
+# Same sample payloads as backend_test.py; "vary" names the field made unique per request with --unique
+ENDPOINTS = {
+    "logo": {"path": "generate-logo", "vary": "brandName", "body": {
+        "brandName": "BenchBrand", "keywords": ["modern", "tech"], "industry": "technology",
+        "colorPalette": ["#1A73E8", "#FBBC05"], "style": "modern"}},
+    "video": {"path": "generate-video", "vary": "prompt", "body": {
+        "prompt": "A futuristic city with flying cars", "durationSeconds": 15,
+        "style": "cinematic", "resolution": "1080p"}},
+    "brand_kit": {"path": "generate-brand-kit", "vary": "brandName", "body": {
+        "brandName": "BenchBrand", "industry": "technology",
+        "brandPersonality": ["innovative", "trustworthy"], "targetAudience": "tech professionals"}},
+    "social_content": {"path": "generate-social-content", "vary": "topic", "body": {
+        "platform": "instagram", "contentType": "post", "topic": "AI technology trends", "tone": "professional"}},
+    "chat": {"path": "chat-assistant", "vary": "message", "body": {
+        "message": "Help me create a logo for my tech startup", "context": "brand design"}},
+    "website": {"path": "generate-website", "vary": "businessName", "body": {
+        "businessName": "BenchTech", "businessType": "technology",
+        "pages": ["home", "about", "services", "contact"], "colorScheme": "modern"}},
+    "voice": {"path": "generate-voice", "vary": "text", "body": {
+        "text": "Welcome to Lotaya AI, your creative partner", "voice": "female", "language": "en-US", "speed": 1.0}},
+    "photo_edit": {"path": "edit-photo", "vary": "imageUrl", "body": {
+        "imageUrl": SAMPLE_IMAGE, "editType": "enhance", "intensity": 0.8}},
+    "background_removal": {"path": "remove-background", "vary": "imageUrl", "body": {
+        "imageUrl": SAMPLE_IMAGE}},
+    "domain": {"path": "generate-domain", "vary": None, "body": {
+        "keywords": ["tech", "ai"], "extensions": [".com", ".io", ".ai"]}},
+    "slogan": {"path": "generate-slogan", "vary": "brandName", "body": {
+        "brandName": "BenchBrand", "industry": "technology", "tone": "inspiring"}},
+    "business_card": {"path": "generate-business-card", "vary": "name", "body": {
+        "name": "John Doe", "title": "CEO", "company": "TestTech Inc", "email": "john@testtech.com",
+        "phone": "+1-555-0123", "website": "www.testtech.com", "style": "modern"}},
+}
+
+
+def sample_image(size: int = 512) -> bytes:
+    """A PNG with a gradient background and a subject in the middle, so edits have real work to do"""
+    from PIL import Image, ImageDraw
+
+    image = Image.linear_gradient("L").resize((size, size)).convert("RGB")
+    draw = ImageDraw.Draw(image)
+    draw.ellipse((size // 4, size // 4, size * 3 // 4, size * 3 // 4), fill=(26, 115, 232))
+    draw.rectangle((size * 3 // 8, size * 3 // 8, size * 5 // 8, size * 5 // 8), fill=(251, 188, 5))
+    output = io.BytesIO()
+    image.save(output, "PNG")
+    return output.getvalue()
+
+
+def make_body(spec: Dict[str, Any], index: int, unique: bool, image_url: Optional[str] = None) -> Dict[str, Any]:
+    body = copy.deepcopy(spec["body"])
+    if body.get("imageUrl") == SAMPLE_IMAGE:
+        body["imageUrl"] = image_url
+    if unique:
+        if spec["vary"] == "imageUrl":
+            # A query string changes the request without changing the image that is loaded
+            body["imageUrl"] = f"{body['imageUrl']}?n={index}"
+        elif spec["vary"]:
+            body[spec["vary"]] = f"{body[spec['vary']]} {index}"
+        elif "keywords" in body:
+            body["keywords"] = body["keywords"] + [f"k{index}"]
+    return body
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies: List[float], errors: int, elapsed: float) -> Dict[str, Any]:
+    total = len(latencies) + errors
+    ordered = sorted(latencies)
+    to_ms = lambda seconds: round(seconds * 1000, 3)
+    return {
+        "requests": total,
+        "errors": errors,
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": to_ms(sum(ordered) / len(ordered)) if ordered else 0.0,
+            "p50": to_ms(percentile(ordered, 50)),
+            "p95": to_ms(percentile(ordered, 95)),
+            "p99": to_ms(percentile(ordered, 99)),
+            "max": to_ms(ordered[-1]) if ordered else 0.0,
+        },
+    }
+
+
+async def wait_for_job(job_id: str, timeout: float) -> bool:
+    """Wait on the in-process event bus until the job finishes"""
+    with server.job_events.subscribe([job_id]) as subscription:
+        job = await server.find_job(job_id)
+        status = job["status"] if job else None
+        deadline = time.perf_counter() + timeout
+        while status not in ("completed", "failed"):
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                return False
+            try:
+                status = (await asyncio.wait_for(subscription.get(), remaining))["status"]
+            except asyncio.TimeoutError:
+                return False
+        return status == "completed"
+
+
+async def bench_endpoint(client: httpx.AsyncClient, name: str, args, image_url: str) -> Dict[str, Any]:
+    spec = ENDPOINTS[name]
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies: List[float] = []
+    errors = 0
+
+    async def one(index: int) -> None:
+        nonlocal errors
+        body = make_body(spec, index, args.unique, image_url)
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                response = await client.post(f"/api/{spec['path']}", json=body)
+                ok = response.status_code in (200, 202)
+                if ok and args.follow_jobs and response.status_code == 202:
+                    ok = await wait_for_job(response.json()["jobId"], args.job_timeout)
+            except Exception:
+                ok = False
+            if ok:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    return summarize(latencies, errors, time.perf_counter() - started)
+
+
+def open_database(args):
+    if args.mongo_url:
+        from motor.motor_asyncio import AsyncIOMotorClient
+        return AsyncIOMotorClient(args.mongo_url)[os.environ['DB_NAME']]
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        sys.exit("mongomock-motor is not installed; install it or pass --mongo-url")
+    return AsyncMongoMockClient()[os.environ['DB_NAME']]
+
+
+async def run(args) -> Dict[str, Any]:
+    database = open_database(args)
+    app = server.create_app(database)
+    if args.mongo_url:
+        await database.generation_jobs.delete_many({})
+
+    names = args.endpoints.split(",") if args.endpoints else list(ENDPOINTS)
+    unknown = [name for name in names if name not in ENDPOINTS]
+    if unknown:
+        sys.exit(f"Unknown endpoints: {', '.join(unknown)} (choose from {', '.join(ENDPOINTS)})")
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        # Photo tools read the sample from the asset store, like an upload, not from the network
+        image_url = await server.store_asset(sample_image(), "image/png")
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=args.timeout) as client:
+            for name in names:
+                print(f"🔍 {name}: {args.requests} requests, concurrency {args.concurrency}")
+                results[name] = await bench_endpoint(client, name, args, image_url)
+                latency = results[name]["latency_ms"]
+                print(f"   {results[name]['throughput_rps']} req/s | p50 {latency['p50']}ms | "
+                      f"p95 {latency['p95']}ms | p99 {latency['p99']}ms | errors {results[name]['errors']}")
+
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "unique": args.unique,
+            "follow_jobs": args.follow_jobs,
+            "mongo": "mongod" if args.mongo_url else "mongomock",
+        },
+        "endpoints": results,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Regressions of p95 latency, throughput or error rate beyond the tolerance"""
+    regressions = []
+    for name, now in current["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if before is None:
+            continue
+        if now["latency_ms"]["p95"] > before["latency_ms"]["p95"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {before['latency_ms']['p95']}ms -> {now['latency_ms']['p95']}ms")
+        if now["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {before['throughput_rps']} -> {now['throughput_rps']} req/s")
+        if now["error_rate"] > before["error_rate"] + 0.01:
+            regressions.append(f"{name}: error rate {before['error_rate']} -> {now['error_rate']}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the Lotaya AI API in-process")
+    parser.add_argument("--endpoints", help=f"Comma-separated subset of: {', '.join(ENDPOINTS)}")
+    parser.add_argument("--requests", type=int, default=100, help="Requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent requests per endpoint")
+    parser.add_argument("--unique", action="store_true", help="Make every request body unique (defeats caching and coalescing)")
+    parser.add_argument("--follow-jobs", action="store_true", help="Measure queued jobs until completion, not just until 202")
+    parser.add_argument("--job-timeout", type=float, default=60, help="Seconds to wait for a followed job")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-request timeout in seconds")
+    parser.add_argument("--mongo-url", help="Use this (throwaway) mongod instead of mongomock-motor")
+    parser.add_argument("--output", help="Write results JSON here")
+    parser.add_argument("--baseline", help="Compare against a previous results JSON")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="Allowed relative regression (default 0.15)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) against {args.baseline}:")
+            for regression in regressions:
+                print(f"   - {regression}")
+            return 1
+        print(f"\n✅ No regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
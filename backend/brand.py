@@ -0,0 +1,202 @@
+"""Brand kits: palettes and type pairings from a data table, and the task graph that assembles a kit"""
+import asyncio
+import colorsys
+import json
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from rendering import deflate_entry, html_escape, zip_archive
+
+PALETTE_ROLES = ("primary", "secondary", "accent", "dark", "light")
+TYPE_SIZES = ("h1", "h2", "h3", "h4", "body", "small")
+BODY_SIZE = 16
+
+
+def _hex(hue: float, saturation: float, lightness: float) -> str:
+    r, g, b = colorsys.hls_to_rgb((hue % 360) / 360, min(max(lightness, 0.0), 1.0), min(max(saturation, 0.0), 1.0))
+    return "#{:02X}{:02X}{:02X}".format(round(r * 255), round(g * 255), round(b * 255))
+
+
+def text_color(color: str) -> str:
+    """Black or white, whichever reads better on the color (WCAG relative luminance)"""
+    channels = [int(color[i:i + 2], 16) / 255 for i in (1, 3, 5)]
+    r, g, b = [c / 12.92 if c <= 0.03928 else ((c + 0.055) / 1.055) ** 2.4 for c in channels]
+    return "#111111" if 0.2126 * r + 0.7152 * g + 0.0722 * b > 0.179 else "#FFFFFF"
+
+
+class BrandLibrary:
+    """Industry base colors, personality adjustments, color harmonies and type families.
+
+    Unknown industries use the default industry, unknown styles the
+    default style; personalities the table does not know are ignored.
+    """
+
+    def __init__(self, table: Mapping[str, Any]):
+        self.industries: Dict[str, Mapping[str, float]] = {name.lower(): base for name, base in table["industries"].items()}
+        self.default_industry = table["default_industry"]
+        self.aliases = {alias.lower(): industry.lower() for alias, industry in table.get("aliases", {}).items()}
+        self.personalities: Dict[str, Mapping[str, Any]] = table["personalities"]
+        self.styles: Dict[str, Mapping[str, str]] = table["styles"]
+        self.default_style = table["default_style"]
+        self.harmonies: Dict[str, Sequence[Tuple[float, float]]] = table["harmonies"]
+        self.type_families: Dict[str, Mapping[str, Any]] = table["type_families"]
+        if self.default_industry not in self.industries:
+            raise ValueError(f"Default industry {self.default_industry!r} has no base color")
+        for style in self.styles.values():
+            if style["harmony"] not in self.harmonies or style["type"] not in self.type_families:
+                raise ValueError(f"Style {style} refers to an unknown harmony or type family")
+
+    def industry(self, industry: str) -> str:
+        industry = industry.strip().lower()
+        industry = self.aliases.get(industry, industry)
+        return industry if industry in self.industries else self.default_industry
+
+    def style(self, style: Optional[str]) -> str:
+        style = (style or "").strip().lower()
+        return style if style in self.styles else self.default_style
+
+    def _traits(self, personality: Optional[Sequence[str]]) -> List[Mapping[str, Any]]:
+        return [self.personalities[trait] for trait in (t.strip().lower() for t in personality or ()) if trait in self.personalities]
+
+    def tone(self, personality: Optional[Sequence[str]]) -> Optional[str]:
+        """The slogan tone of the first personality trait that has one"""
+        return next((trait["tone"] for trait in self._traits(personality) if "tone" in trait), None)
+
+    def palette(self, industry: str, personality: Optional[Sequence[str]], style: Optional[str]) -> List[Dict[str, str]]:
+        """Five colors: the industry's base color adjusted by personality, two harmony colors and two neutrals"""
+        base = self.industries[self.industry(industry)]
+        traits = self._traits(personality)
+        hue = base["hue"]
+        saturation = base["saturation"] + sum(trait.get("saturation", 0.0) for trait in traits) / max(len(traits), 1)
+        lightness = base["lightness"] + sum(trait.get("lightness", 0.0) for trait in traits) / max(len(traits), 1)
+        colors = [_hex(hue, saturation, lightness)]
+        for offset, shift in self.harmonies[self.styles[self.style(style)]["harmony"]]:
+            colors.append(_hex(hue + offset, saturation, lightness + shift))
+        colors += [_hex(hue, saturation * 0.3, 0.15), _hex(hue, saturation * 0.25, 0.96)]
+        return [{"role": role, "hex": color, "text": text_color(color)} for role, color in zip(PALETTE_ROLES, colors)]
+
+    def typography(self, personality: Optional[Sequence[str]], style: Optional[str]) -> Dict[str, Any]:
+        """Heading, body and accent fonts with a modular type scale in pixels"""
+        family = next(
+            (trait["type"] for trait in self._traits(personality) if trait.get("type") in self.type_families),
+            self.styles[self.style(style)]["type"]
+        )
+        fonts = self.type_families[family]
+        scale = fonts["scale"]
+        steps = dict(zip(TYPE_SIZES, (4, 3, 2, 1, 0, -1)))
+        return {
+            "family": family,
+            "heading": fonts["heading"],
+            "body": fonts["body"],
+            "accent": fonts["accent"],
+            "scale": scale,
+            "sizes": {name: round(BODY_SIZE * scale ** step) for name, step in steps.items()},
+        }
+
+    @classmethod
+    def from_file(cls, path: Path) -> "BrandLibrary":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f))
+
+
+def guidelines_html(brand: str, kit: Mapping[str, Any], logo_file: Optional[str]) -> str:
+    """A one-page brand guide built from the kit's finished parts"""
+    palette, typography = kit["palette"], kit["typography"]
+    swatches = "".join(
+        f'<li style="background:{color["hex"]};color:{color["text"]}">'
+        f'<strong>{html_escape(color["role"].title())}</strong> {color["hex"]}</li>'
+        for color in palette
+    )
+    scale = "".join(
+        f'<p style="font-size:{size}px;margin:4px 0">{name.upper()} · {size}px</p>'
+        for name, size in typography["sizes"].items()
+    )
+    slogans = "".join(f"<li>{html_escape(slogan)}</li>" for slogan in kit["slogans"])
+    logo_src = logo_file or kit["logo"]["assetUrl"]
+    audience = kit.get("audience")
+    primary, dark, light = palette[0]["hex"], palette[3]["hex"], palette[4]["hex"]
+    return (
+        "<!DOCTYPE html>\n"
+        f'<html lang="en"><head><meta charset="utf-8"><title>{html_escape(brand)} brand guidelines</title>'
+        f"<style>body{{font-family:'{typography['body']}',sans-serif;color:{dark};background:{light};"
+        f"max-width:880px;margin:0 auto;padding:32px}}h1,h2{{font-family:'{typography['heading']}',sans-serif;"
+        f"color:{primary}}}ul.swatches{{list-style:none;padding:0;display:flex;flex-wrap:wrap;gap:8px}}"
+        "ul.swatches li{padding:32px 16px 12px;min-width:120px;border-radius:8px}</style></head><body>"
+        f"<h1>{html_escape(brand)}</h1>"
+        f"<p>{html_escape(kit['industry'].title())}"
+        + (f" · for {html_escape(audience)}" if audience else "")
+        + (f" · {html_escape(', '.join(kit['personality']))}" if kit.get("personality") else "")
+        + "</p>"
+        f'<h2>Logo</h2><img src="{html_escape(logo_src)}" alt="{html_escape(brand)} logo" width="256">'
+        "<p>Keep clear space of at least the logo's height around it, and never recolor it outside the palette.</p>"
+        f'<h2>Color palette</h2><ul class="swatches">{swatches}</ul>'
+        f"<h2>Typography</h2><p>Headings: <strong>{html_escape(typography['heading'])}</strong> · "
+        f"Body: <strong>{html_escape(typography['body'])}</strong> · "
+        f"Accent: <strong>{html_escape(typography['accent'])}</strong> "
+        f"(scale {typography['scale']})</p>{scale}"
+        f"<h2>Voice</h2><ul>{slogans}</ul>"
+        "</body></html>\n"
+    )
+
+
+def brand_kit_archive(brand: str, kit: Mapping[str, Any], logo: Optional[bytes]) -> bytes:
+    """The kit as a zip: guidelines, the logo when its bytes are at hand, and palette and type as JSON"""
+    files = [("guidelines.html", guidelines_html(brand, kit, "logo.svg" if logo is not None else None).encode("utf-8"))]
+    if logo is not None:
+        files.append(("logo.svg", logo))
+    files += [
+        ("palette.json", json.dumps(kit["palette"], indent=2).encode("utf-8")),
+        ("typography.json", json.dumps(kit["typography"], indent=2).encode("utf-8")),
+    ]
+    return zip_archive([deflate_entry(name, content) for name, content in files])
+
+
+class TaskGraph:
+    """Async nodes that start as soon as their dependencies finish.
+
+    Nodes are added after their dependencies, so the graph is acyclic by
+    construction. Independent nodes run concurrently, so a run takes as
+    long as its critical path rather than the sum of its nodes.
+    """
+
+    def __init__(self):
+        self._nodes: Dict[str, Tuple[Tuple[str, ...], Callable[..., Awaitable[Any]]]] = {}
+
+    def add(self, name: str, run: Callable[..., Awaitable[Any]], after: Sequence[str] = ()) -> None:
+        """run receives the results of the nodes in after, in order"""
+        unknown = [dependency for dependency in after if dependency not in self._nodes]
+        if name in self._nodes or unknown:
+            raise ValueError(f"Cannot add node {name!r}: duplicate name or unknown dependencies {unknown}")
+        self._nodes[name] = (tuple(after), run)
+
+    def __len__(self) -> int:
+        return len(self._nodes)
+
+    async def run(self, finished: Mapping[str, Any],
+                  on_done: Callable[[str, Any], Awaitable[None]]) -> Dict[str, Any]:
+        """Every node's result, reusing finished ones and calling on_done as each new one lands.
+
+        A failing node fails its dependents, but the rest of the graph
+        still finishes (and reaches on_done) before the first error, in
+        graph order, is raised.
+        """
+        loop = asyncio.get_running_loop()
+        tasks: Dict[str, asyncio.Future] = {}
+
+        async def node(name: str, after: Tuple[str, ...], run: Callable[..., Awaitable[Any]]) -> Any:
+            inputs = [await tasks[dependency] for dependency in after]
+            result = await run(*inputs)
+            await on_done(name, result)
+            return result
+
+        for name, (after, run) in self._nodes.items():
+            if name in finished:
+                tasks[name] = loop.create_future()
+                tasks[name].set_result(finished[name])
+            else:
+                tasks[name] = asyncio.ensure_future(node(name, after, run))
+        outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        for outcome in outcomes:
+            if isinstance(outcome, BaseException):
+                raise outcome
+        return dict(zip(tasks, outcomes))
@@ -0,0 +1,129 @@
+"""Content-addressed result cache for deterministic generators"""
+import hashlib
+import json
+import logging
+import time
+from collections import OrderedDict, defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple
+
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+
+def request_key(request: BaseModel) -> str:
+    """Canonical hash of a request model: same fields, same key"""
+    payload = json.dumps(
+        {"model": type(request).__name__, "data": request.dict()},
+        sort_keys=True,
+        separators=(",", ":"),
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    """Size-bounded in-memory LRU with a per-entry TTL"""
+
+    def __init__(self, max_entries: int = 10000, ttl_seconds: float = 3600):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        self._entries[key] = (time.monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class MongoCacheTier:
+    """Shared second tier so workers and restarts reuse each other's results"""
+
+    def __init__(self, collection, ttl_seconds: float = 3600):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+
+    async def ensure_indexes(self) -> None:
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    async def get(self, key: str) -> Optional[Any]:
+        doc = await self.collection.find_one({"_id": key, "expires_at": {"$gt": datetime.utcnow()}})
+        return doc["value"] if doc else None
+
+    async def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        expires_at = datetime.utcnow() + timedelta(seconds=self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        await self.collection.replace_one(
+            {"_id": key}, {"_id": key, "value": value, "expires_at": expires_at}, upsert=True
+        )
+
+
+class ResultCache:
+    """Two-tier cache (LRU, then optional Mongo) with per-namespace hit/miss counters.
+
+    ttls shortens the lifetime of namespaces whose results go stale sooner
+    than the default, e.g. ones that embed a live lookup.
+    """
+
+    def __init__(self, memory: LRUCache, second_tier: Optional[MongoCacheTier] = None,
+                 ttls: Optional[Dict[str, float]] = None):
+        self.memory = memory
+        self.second_tier = second_tier
+        self.ttl_seconds = memory.ttl_seconds
+        self.ttls = dict(ttls or {})
+        self._stats: Dict[str, Dict[str, int]] = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+    async def get(self, namespace: str, key: str) -> Optional[Any]:
+        full_key = f"{namespace}:{key}"
+        value = self.memory.get(full_key)
+        if value is None and self.second_tier is not None:
+            try:
+                value = await self.second_tier.get(full_key)
+            except Exception:
+                logger.exception("Result cache second tier read failed")
+            if value is not None:
+                self.memory.set(full_key, value)
+        self._stats[namespace]["hits" if value is not None else "misses"] += 1
+        return value
+
+    def ttl(self, namespace: str) -> float:
+        return self.ttls.get(namespace, self.ttl_seconds)
+
+    async def set(self, namespace: str, key: str, value: Any) -> None:
+        full_key = f"{namespace}:{key}"
+        ttl = self.ttl(namespace)
+        self.memory.set(full_key, value, ttl)
+        if self.second_tier is not None:
+            try:
+                await self.second_tier.set(full_key, value, ttl)
+            except Exception:
+                logger.exception("Result cache second tier write failed")
+
+    def stats(self) -> Dict[str, Any]:
+        namespaces = {}
+        for namespace, counts in self._stats.items():
+            total = counts["hits"] + counts["misses"]
+            namespaces[namespace] = {
+                **counts,
+                "hit_ratio": round(counts["hits"] / total, 4) if total else 0.0,
+            }
+        return {"entries": len(self.memory), "namespaces": namespaces}
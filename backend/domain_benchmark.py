@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for domain name suggestions.
+
+Grows the keyword and extension lists and times DomainEngine.rank over
+the full candidate grid, then DomainEngine.suggest against a resolver
+with a simulated lookup latency, cold and then warm, to show what the
+availability cache and Bloom filter save.
+
+    python domain_benchmark.py --keywords 2,4,8 --lookup-ms 50
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+from domains import MAX_STEM_WORDS, BloomFilter, CachedResolver, DomainEngine, DomainLexicon, LocalResolver
+
+KEYWORDS = ["coffee", "roast", "bean", "brew", "cafe", "morning", "fresh", "local"]
+
+
+def grid_size(engine: DomainEngine, keywords: int, extensions: int) -> int:
+    stems = len(DomainEngine.stems(KEYWORDS[:keywords])[0])
+    return stems * len(engine.lexicon.prefixes) * len(engine.lexicon.suffixes) * extensions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark domain candidate ranking and availability caching")
+    parser.add_argument("--keywords", default="2,4,8", help="Comma-separated keyword counts")
+    parser.add_argument("--iterations", type=int, default=50, help="Ranking passes per size")
+    parser.add_argument("--lookup-ms", type=float, default=50, help="Simulated resolver latency per batch")
+    parser.add_argument("--output", help="Write results JSON here")
+    args = parser.parse_args()
+
+    lexicon = DomainLexicon.from_file(Path(__file__).parent / "data" / "domain_lexicon.json")
+    extensions = list(lexicon.tlds)
+    results = {}
+    for keywords in (int(size) for size in args.keywords.split(",")):
+        resolver = CachedResolver(LocalResolver(lexicon.taken, delay=args.lookup_ms / 1000), bloom=BloomFilter(100000))
+        engine = DomainEngine(lexicon, resolver)
+
+        started = time.perf_counter()
+        for _ in range(args.iterations):
+            engine.rank(KEYWORDS[:keywords], extensions, 50)
+        rank_ms = (time.perf_counter() - started) / args.iterations * 1000
+
+        timings = []
+        for _ in range(2):
+            started = time.perf_counter()
+            asyncio.run(engine.suggest(KEYWORDS[:keywords], extensions))
+            timings.append((time.perf_counter() - started) * 1000)
+
+        candidates = grid_size(engine, keywords, len(extensions))
+        results[keywords] = {
+            "candidates": candidates,
+            "rank_ms": round(rank_ms, 3),
+            "suggest_cold_ms": round(timings[0], 2),
+            "suggest_warm_ms": round(timings[1], 2),
+            "resolver": resolver.stats(),
+        }
+        print(f"🔍 {keywords} keywords x {len(extensions)} TLDs ({candidates:,} candidates, stems of up to "
+              f"{MAX_STEM_WORDS} words): rank {rank_ms:.2f}ms | suggest cold {timings[0]:.1f}ms, warm {timings[1]:.1f}ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,300 @@
+"""Domain name suggestions: vectorized candidate ranking and cached availability checks"""
+import asyncio
+import hashlib
+import json
+import math
+import re
+from dataclasses import dataclass
+from itertools import permutations
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Protocol, Sequence, Tuple
+
+import numpy as np
+
+from cache import LRUCache
+
+MAX_KEYWORDS = 8
+DEFAULT_EXTENSIONS = (".com", ".io", ".ai")
+MAX_STEM_WORDS = 3
+MAX_LABEL_LENGTH = 63
+MIN_LABEL_LENGTH = 3
+IDEAL_LABEL_LENGTH = 10
+LENGTH_PENALTY = 0.08
+DOUBLE_AFFIX_PENALTY = 0.3
+
+
+@dataclass(frozen=True)
+class DomainLexicon:
+    prefixes: Dict[str, float]
+    suffixes: Dict[str, float]
+    # tld -> (weight, yearly price in dollars)
+    tlds: Dict[str, Tuple[float, int]]
+    default_tld: Tuple[float, int] = (0.3, 30)
+    taken: Tuple[str, ...] = ()
+
+    def tld(self, extension: str) -> Tuple[float, int]:
+        return self.tlds.get(extension, self.default_tld)
+
+    @classmethod
+    def from_dict(cls, table: dict) -> "DomainLexicon":
+        default = table.get("default_tld", {"weight": 0.3, "price": 30})
+        return cls(
+            prefixes=dict(table["prefixes"]),
+            suffixes=dict(table["suffixes"]),
+            tlds={tld: (entry["weight"], entry["price"]) for tld, entry in table["tlds"].items()},
+            default_tld=(default["weight"], default["price"]),
+            taken=tuple(table.get("taken", ())),
+        )
+
+    @classmethod
+    def from_file(cls, path: Path) -> "DomainLexicon":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+
+@dataclass(frozen=True)
+class DomainCandidate:
+    domain: str
+    score: float
+    available: bool
+    price: int
+
+
+class BloomFilter:
+    """Fixed-size set membership with no false negatives and ~error_rate false positives"""
+
+    def __init__(self, capacity: int = 1000000, error_rate: float = 0.001):
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.count = 0
+        self._bits = np.zeros((self.size + 7) // 8, dtype=np.uint8)
+        self._steps = np.arange(self.hashes, dtype=np.uint64)
+
+    def _positions(self, item: str) -> np.ndarray:
+        # Double hashing: k positions from the two halves of one digest
+        h1, h2 = np.frombuffer(hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest(), dtype=np.uint64)
+        return (h1 + self._steps * (h2 | np.uint64(1))) % np.uint64(self.size)
+
+    def add(self, item: str) -> None:
+        positions = self._positions(item)
+        # bitwise_or.at, because several positions can fall in the same byte
+        np.bitwise_or.at(self._bits, positions >> np.uint64(3), np.left_shift(1, positions & np.uint64(7)).astype(np.uint8))
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        positions = self._positions(item)
+        masks = np.left_shift(1, positions & np.uint64(7)).astype(np.uint8)
+        return bool(np.all(self._bits[positions >> np.uint64(3)] & masks))
+
+
+class AvailabilityResolver(Protocol):
+    async def available(self, domains: Sequence[str]) -> Dict[str, bool]:
+        """Registration status for a batch of fully qualified names"""
+        ...
+
+
+def _stable_fraction(text: str) -> float:
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "big") / 2 ** 64
+
+
+class LocalResolver:
+    """Stand-in for a registrar or RDAP lookup.
+
+    Names on the taken list are taken; the rest are taken with a fixed
+    probability derived from a hash of the name (higher for short ones),
+    so a name gets the same answer every time.
+    """
+
+    def __init__(self, taken: Iterable[str] = (), taken_rate: float = 0.3, delay: float = 0.0):
+        self.taken = set(taken)
+        self.taken_rate = taken_rate
+        self.delay = delay
+
+    def _is_available(self, domain: str) -> bool:
+        if domain in self.taken:
+            return False
+        label = domain.split(".", 1)[0]
+        rate = self.taken_rate + (0.4 if len(label) <= 5 else 0.0)
+        return _stable_fraction(domain) >= rate
+
+    async def available(self, domains: Sequence[str]) -> Dict[str, bool]:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        return {domain: self._is_available(domain) for domain in domains}
+
+
+class CachedResolver:
+    """Remembers answers so hot names are not checked again.
+
+    Every name seen taken goes into a Bloom filter and is never looked up
+    again (registrations rarely lapse; a false positive only hides one
+    candidate). Available names are cached for ttl_seconds, since someone
+    may register them at any moment.
+    """
+
+    def __init__(self, inner: AvailabilityResolver, ttl_seconds: float = 300, max_entries: int = 100000,
+                 bloom: Optional[BloomFilter] = None):
+        self.inner = inner
+        self.cache = LRUCache(max_entries=max_entries, ttl_seconds=ttl_seconds)
+        self.taken = bloom if bloom is not None else BloomFilter()
+        self.checks = 0
+        self.bloom_hits = 0
+        self.cache_hits = 0
+        self.lookups = 0
+
+    async def available(self, domains: Sequence[str]) -> Dict[str, bool]:
+        result: Dict[str, bool] = {}
+        unknown = []
+        for domain in domains:
+            self.checks += 1
+            if domain in self.taken:
+                self.bloom_hits += 1
+                result[domain] = False
+                continue
+            cached = self.cache.get(domain)
+            if cached is not None:
+                self.cache_hits += 1
+                result[domain] = cached
+                continue
+            unknown.append(domain)
+
+        if unknown:
+            self.lookups += len(unknown)
+            for domain, available in (await self.inner.available(unknown)).items():
+                if available:
+                    self.cache.set(domain, True)
+                else:
+                    self.taken.add(domain)
+                result[domain] = available
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "checks": self.checks,
+            "bloom_hits": self.bloom_hits,
+            "cache_hits": self.cache_hits,
+            "lookups": self.lookups,
+            "cached_available": len(self.cache),
+            "known_taken": self.taken.count,
+        }
+
+
+def normalize_keywords(keywords: Iterable[str]) -> List[str]:
+    """Lowercase letters and digits only, duplicates dropped, order kept"""
+    seen = []
+    for keyword in keywords:
+        cleaned = re.sub(r"[^a-z0-9]", "", keyword.lower())
+        if cleaned and cleaned not in seen:
+            seen.append(cleaned)
+    return seen[:MAX_KEYWORDS]
+
+
+def normalize_extensions(extensions: Optional[Iterable[str]]) -> List[str]:
+    """Lowercased, dotted, de-duplicated TLDs; None means the default ones"""
+    seen = []
+    for extension in DEFAULT_EXTENSIONS if extensions is None else extensions:
+        cleaned = "." + re.sub(r"[^a-z0-9.-]", "", extension.lower()).strip(".")
+        if len(cleaned) > 1 and cleaned not in seen:
+            seen.append(cleaned)
+    return seen
+
+
+def top_indices(scores: np.ndarray, count: int) -> np.ndarray:
+    """Indices of the count highest scores, best first; ties keep index order"""
+    count = min(count, scores.size)
+    best = np.argpartition(-scores, count - 1)[:count]
+    return best[np.lexsort((best, -scores[best]))]
+
+
+class DomainEngine:
+    """Ranks every stem x prefix x suffix x TLD combination at once.
+
+    Stems are ordered combinations of up to three keywords. Scores and
+    label lengths are computed over the whole grid with NumPy broadcasting,
+    and only the best few candidates are turned into strings and checked
+    for availability.
+    """
+
+    def __init__(self, lexicon: DomainLexicon, resolver: AvailabilityResolver):
+        self.lexicon = lexicon
+        self.resolver = resolver
+        self._prefixes = list(lexicon.prefixes)
+        self._prefix_weights = np.array(list(lexicon.prefixes.values()), dtype=np.float32)
+        self._prefix_lengths = np.array([len(prefix) for prefix in self._prefixes], dtype=np.int32)
+        self._suffixes = list(lexicon.suffixes)
+        self._suffix_weights = np.array(list(lexicon.suffixes.values()), dtype=np.float32)
+        self._suffix_lengths = np.array([len(suffix) for suffix in self._suffixes], dtype=np.int32)
+        # Decorating both ends at once ("getcoffeehub") reads worse than either alone
+        self._affix_penalty = DOUBLE_AFFIX_PENALTY * np.outer(self._prefix_lengths > 0, self._suffix_lengths > 0)
+
+    @staticmethod
+    def stems(keywords: List[str]) -> Tuple[List[str], np.ndarray]:
+        """Keyword combinations and their scores: fuller combinations, earlier keywords and the given order rank higher"""
+        texts, scores = [], []
+        for words in range(1, min(MAX_STEM_WORDS, len(keywords)) + 1):
+            for combination in permutations(range(len(keywords)), words):
+                texts.append("".join(keywords[i] for i in combination))
+                out_of_order = sum(a > b for a, b in zip(combination, combination[1:]))
+                scores.append(0.15 * (words - 1) - 0.1 * sum(combination) / words - 0.02 * out_of_order)
+        return texts, np.array(scores, dtype=np.float32)
+
+    def rank(self, keywords: Iterable[str], extensions: Optional[Iterable[str]], count: int) -> List[Tuple[str, float, int]]:
+        """The count best (domain, score, price) candidates, best first"""
+        keywords = normalize_keywords(keywords)
+        extensions = normalize_extensions(extensions)
+        if not keywords or not extensions:
+            return []
+
+        stems, stem_scores = self.stems(keywords)
+        stem_lengths = np.array([len(stem) for stem in stems], dtype=np.int32)
+        tld_weights = np.array([self.lexicon.tld(extension)[0] for extension in extensions], dtype=np.float32)
+
+        # (stem, prefix, suffix) label lengths and scores, then a TLD axis on top
+        lengths = stem_lengths[:, None, None] + self._prefix_lengths[None, :, None] + self._suffix_lengths[None, None, :]
+        label_scores = (
+            stem_scores[:, None, None]
+            + self._prefix_weights[None, :, None]
+            + self._suffix_weights[None, None, :]
+            - self._affix_penalty[None, :, :]
+            - LENGTH_PENALTY * np.maximum(lengths - IDEAL_LABEL_LENGTH, 0)
+        )
+        label_scores[(lengths > MAX_LABEL_LENGTH) | (lengths < MIN_LABEL_LENGTH)] = -np.inf
+
+        # TLD weights are additive, so the best count domains only use the best count labels
+        labels = top_indices(label_scores.ravel(), count)
+        scores = (label_scores.ravel()[labels][:, None] + tld_weights).ravel()
+        best = top_indices(scores, count)
+        label_index, tld_index = np.divmod(best, len(extensions))
+        stem_index, prefix_index, suffix_index = np.unravel_index(labels[label_index], label_scores.shape)
+
+        ranked, seen = [], set()
+        for i, s, p, x, t in zip(best, stem_index, prefix_index, suffix_index, tld_index):
+            if not np.isfinite(scores[i]):
+                break
+            label = self._prefixes[p] + stems[s] + self._suffixes[x]
+            domain = label + extensions[t]
+            if domain in seen:
+                continue
+            seen.add(domain)
+            ranked.append((domain, float(scores[i]), self.price(label, extensions[t])))
+        return ranked
+
+    def price(self, label: str, extension: str) -> int:
+        # Short names carry a premium
+        return self.lexicon.tld(extension)[1] + 5 * max(0, 8 - len(label))
+
+    async def suggest(self, keywords: Iterable[str], extensions: Optional[Iterable[str]], limit: int = 10,
+                      window: int = 5) -> List[DomainCandidate]:
+        """The limit best names, available ones first.
+
+        The top limit * window candidates by score are checked in one
+        resolver call, so a few taken names do not leave the list short.
+        """
+        ranked = self.rank(keywords, extensions, limit * window)
+        availability = await self.resolver.available([domain for domain, _, _ in ranked])
+        candidates = [
+            DomainCandidate(domain=domain, score=score, available=availability.get(domain, False), price=price)
+            for domain, score, price in ranked
+        ]
+        candidates.sort(key=lambda candidate: not candidate.available)  # stable: score order kept within each group
+        return candidates[:limit]
@@ -0,0 +1,75 @@
+"""In-process pub/sub for generation job progress events"""
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, Set
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = ("completed", "failed")
+
+
+class Subscription:
+    """A single consumer's event queue, subscribed to any number of job ids"""
+
+    def __init__(self, bus: "JobEventBus", maxsize: int):
+        self._bus = bus
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.job_ids: Set[str] = set()
+
+    def add(self, job_ids: Iterable[str]) -> None:
+        for job_id in job_ids:
+            if job_id not in self.job_ids:
+                self.job_ids.add(job_id)
+                self._bus._subscribers.setdefault(job_id, set()).add(self)
+
+    def remove(self, job_ids: Iterable[str]) -> None:
+        for job_id in list(job_ids):
+            self.job_ids.discard(job_id)
+            subscribers = self._bus._subscribers.get(job_id)
+            if subscribers is not None:
+                subscribers.discard(self)
+                if not subscribers:
+                    del self._bus._subscribers[job_id]
+
+    def close(self) -> None:
+        self.remove(self.job_ids)
+
+    def push(self, event: Dict[str, Any]) -> None:
+        # A slow consumer loses its oldest events rather than blocking publishers
+        if self.queue.full():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+
+    async def get(self) -> Dict[str, Any]:
+        return await self.queue.get()
+
+    def __enter__(self) -> "Subscription":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+class JobEventBus:
+    """Fans job events out to subscribers without touching the database.
+
+    Publishing is a synchronous dict lookup plus one queue put per
+    subscriber, so the cost per event is independent of how many clients
+    are watching other jobs.
+    """
+
+    def __init__(self, queue_size: int = 100):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[Subscription]] = {}
+
+    def subscribe(self, job_ids: Iterable[str] = ()) -> Subscription:
+        subscription = Subscription(self, self.queue_size)
+        subscription.add(job_ids)
+        return subscription
+
+    def publish(self, job_id: str, event: Dict[str, Any]) -> None:
+        for subscription in list(self._subscribers.get(job_id, ())):
+            subscription.push(event)
+
+    def subscriber_count(self) -> int:
+        return sum(len(subscribers) for subscribers in self._subscribers.values())
@@ -0,0 +1,255 @@
+"""Pluggable generation backends with per-backend concurrency caps, deadlines and retries"""
+import asyncio
+import logging
+import random
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Protocol
+
+logger = logging.getLogger(__name__)
+
+
+class GenerationError(Exception):
+    """A generation backend failed to produce a result"""
+
+
+class TransientGenerationError(GenerationError):
+    """A failure worth retrying (provider overloaded, connection reset, ...)"""
+
+
+class GenerationTimeoutError(GenerationError):
+    """Every attempt ran past the backend's deadline"""
+
+
+class GenerationBackend(Protocol):
+    """Produces the result for one tool.
+
+    Job-backed tools are called with the job id so they can report
+    progress; synchronous tools (chat, domain, slogan) get job_id=None.
+    """
+
+    async def generate(self, request: Any, job_id: Optional[str] = None) -> Any:
+        ...
+
+
+class StreamingBackend(GenerationBackend, Protocol):
+    """A backend that can also hand out its result incrementally (e.g. chat tokens)"""
+
+    def stream(self, request: Any, job_id: Optional[str] = None) -> AsyncIterator[Any]:
+        ...
+
+
+@dataclass
+class BackendPolicy:
+    concurrency: int = 8
+    timeout: float = 30.0
+    retries: int = 2
+    backoff_base: float = 0.2
+    backoff_max: float = 5.0
+
+    def backoff(self, attempt: int) -> float:
+        # Full jitter: retries from many callers spread out instead of arriving together
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+
+class FunctionBackend:
+    """Adapts a plain async generation function, e.g. the built-in mocks.
+
+    Pass stream_fn, an async generator function, to make it a StreamingBackend.
+    """
+
+    def __init__(self, fn: Callable[..., Awaitable[Any]], stream_fn: Optional[Callable[..., AsyncIterator[Any]]] = None):
+        self.fn = fn
+        if stream_fn is not None:
+            self.stream_fn = stream_fn
+            self.stream = self._stream
+
+    async def generate(self, request: Any, job_id: Optional[str] = None) -> Any:
+        if job_id is None:
+            return await self.fn(request)
+        return await self.fn(request, job_id)
+
+    def _stream(self, request: Any, job_id: Optional[str] = None) -> AsyncIterator[Any]:
+        return self.stream_fn(request) if job_id is None else self.stream_fn(request, job_id)
+
+
+class FakeBackend:
+    """Wraps a backend to behave like a slow or flaky provider, for local load and failure testing"""
+
+    def __init__(self, inner: GenerationBackend, delay: float = 0.0, failure_rate: float = 0.0, seed: Optional[int] = None):
+        self.inner = inner
+        self.delay = delay
+        self.failure_rate = failure_rate
+        self._random = random.Random(seed)
+
+    async def generate(self, request: Any, job_id: Optional[str] = None) -> Any:
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if self._random.random() < self.failure_rate:
+            raise TransientGenerationError("simulated provider failure")
+        return await self.inner.generate(request, job_id)
+
+
+class ManagedBackend:
+    """A backend behind its own semaphore, per-attempt deadline and retry loop.
+
+    Each tool has a separate semaphore, so a saturated video provider
+    only queues video calls and never holds slots logo calls need.
+    """
+
+    def __init__(self, tool: str, backend: GenerationBackend, policy: BackendPolicy):
+        self.tool = tool
+        self.backend = backend
+        self.policy = policy
+        self._slots = asyncio.Semaphore(policy.concurrency)
+        self.in_flight = 0
+        self.calls = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.failures = 0
+
+    async def generate(self, request: Any, job_id: Optional[str] = None) -> Any:
+        self.calls += 1
+        attempt = 0
+        while True:
+            try:
+                async with self._slots:
+                    self.in_flight += 1
+                    try:
+                        return await asyncio.wait_for(self.backend.generate(request, job_id), self.policy.timeout)
+                    finally:
+                        self.in_flight -= 1
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                error: GenerationError = GenerationTimeoutError(
+                    f"{self.tool} generation timed out after {self.policy.timeout:g}s"
+                )
+            except TransientGenerationError as e:
+                error = e
+            except Exception:
+                self.failures += 1
+                raise
+
+            if attempt >= self.policy.retries:
+                self.failures += 1
+                raise error
+            delay = self.policy.backoff(attempt)
+            attempt += 1
+            self.retries += 1
+            logger.warning("%s generation attempt %d failed (%s), retrying in %.2fs", self.tool, attempt, error, delay)
+            await asyncio.sleep(delay)
+
+    @property
+    def streams(self) -> bool:
+        return hasattr(self.backend, "stream")
+
+    async def stream(self, request: Any, job_id: Optional[str] = None) -> AsyncIterator[Any]:
+        """Yield the backend's chunks under the same slot, deadline and retry rules.
+
+        The deadline applies to each chunk, so a long reply is fine as
+        long as it keeps coming. Only attempts that failed before their
+        first chunk are retried; chunks already sent cannot be taken back.
+        """
+        self.calls += 1
+        attempt = 0
+        while True:
+            emitted = False
+            try:
+                async with self._slots:
+                    self.in_flight += 1
+                    chunks = self.backend.stream(request, job_id)
+                    try:
+                        while True:
+                            try:
+                                chunk = await asyncio.wait_for(chunks.__anext__(), self.policy.timeout)
+                            except StopAsyncIteration:
+                                return
+                            emitted = True
+                            yield chunk
+                    finally:
+                        self.in_flight -= 1
+                        await chunks.aclose()
+            except asyncio.TimeoutError:
+                self.timeouts += 1
+                error: GenerationError = GenerationTimeoutError(
+                    f"{self.tool} stream stalled for {self.policy.timeout:g}s"
+                )
+            except TransientGenerationError as e:
+                error = e
+            except Exception:
+                self.failures += 1
+                raise
+
+            if emitted or attempt >= self.policy.retries:
+                self.failures += 1
+                raise error
+            delay = self.policy.backoff(attempt)
+            attempt += 1
+            self.retries += 1
+            logger.warning("%s stream attempt %d failed (%s), retrying in %.2fs", self.tool, attempt, error, delay)
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "backend": type(self.backend).__name__,
+            "concurrency": self.policy.concurrency,
+            "timeout_seconds": self.policy.timeout,
+            "in_flight": self.in_flight,
+            "calls": self.calls,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "failures": self.failures,
+        }
+
+
+class BackendRegistry:
+    """Maps each tool to the managed backend that serves it"""
+
+    def __init__(self):
+        self._backends: Dict[str, ManagedBackend] = {}
+
+    def register(self, tool: str, backend: GenerationBackend, policy: Optional[BackendPolicy] = None) -> None:
+        previous = self._backends.get(tool)
+        if policy is None:
+            policy = previous.policy if previous is not None else BackendPolicy()
+        self._backends[tool] = ManagedBackend(tool, backend, policy)
+
+    def get(self, tool: str) -> ManagedBackend:
+        try:
+            return self._backends[tool]
+        except KeyError:
+            raise KeyError(f"No generation backend registered for {tool!r}") from None
+
+    async def generate(self, tool: str, request: Any, job_id: Optional[str] = None) -> Any:
+        return await self.get(tool).generate(request, job_id)
+
+    def runner(self, tool: str) -> Callable[..., Awaitable[Any]]:
+        """A (request, job_id=None) callable for job queues and batch helpers.
+
+        The backend is looked up per call, so re-registering a tool takes
+        effect for runners handed out earlier.
+        """
+        async def run(request: Any, job_id: Optional[str] = None) -> Any:
+            return await self.generate(tool, request, job_id)
+        return run
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {tool: backend.stats() for tool, backend in self._backends.items()}
+
+    def __iter__(self):
+        return iter(self._backends)
+
+
+def install_fakes(registry: BackendRegistry, spec: str) -> None:
+    """Wrap registered backends in FakeBackend from a spec such as
+    "video=delay:5,fail:0.3;logo=fail:0.1" (the FAKE_GENERATION_BACKENDS setting)
+    """
+    for entry in filter(None, (part.strip() for part in spec.split(";"))):
+        tool, _, options = entry.partition("=")
+        settings = dict(option.split(":", 1) for option in options.split(",") if option)
+        managed = registry.get(tool.strip())
+        registry.register(tool.strip(), FakeBackend(
+            managed.backend,
+            delay=float(settings.get("delay", 0)),
+            failure_rate=float(settings.get("fail", 0)),
+        ))
+        logger.warning("Using fake %s backend: %s", tool.strip(), options)
@@ -0,0 +1,374 @@
+"""Image pipeline for photo edits and background removal, run in a worker process pool.
+
+Encoded images travel to and from the workers through shared memory
+blocks, so only a block name and a few parameters are pickled. Decoding,
+the NumPy operations and encoding all happen inside the worker and never
+block the event loop.
+"""
+import asyncio
+import io
+import ipaddress
+import logging
+import multiprocessing
+import os
+import socket
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Tuple
+from urllib.parse import urlparse
+
+import httpx
+import numpy as np
+
+from assets import AssetStore, is_digest
+from generation import GenerationError
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_PIXELS = 40_000_000
+DEFAULT_INTENSITY = 0.8
+MAX_REDIRECTS = 3
+
+
+class ImageInputError(GenerationError):
+    """The source image could not be fetched or decoded; retrying will not help"""
+
+
+@dataclass(frozen=True)
+class ProcessedImage:
+    data: bytes
+    content_type: str
+    width: int
+    height: int
+
+
+# Operations work on float32 frames in [0, 1], shaped (height, width, channels)
+
+def _box_blur(frame: np.ndarray, radius: int) -> np.ndarray:
+    """Mean filter from summed-area tables: the cost does not depend on the radius"""
+    padded = np.pad(frame, ((radius + 1, radius), (radius + 1, radius), (0, 0)), mode="edge")
+    table = padded.cumsum(axis=0, dtype=np.float32).cumsum(axis=1, dtype=np.float32)
+    size = 2 * radius + 1
+    window = table[size:, size:] - table[:-size, size:] - table[size:, :-size] + table[:-size, :-size]
+    return window / (size * size)
+
+
+def _stretch(frame: np.ndarray, low: float = 1, high: float = 99) -> np.ndarray:
+    """Per-channel contrast stretch between two percentiles, read off 256-bin histograms instead of a sort"""
+    levels = (frame * 255).astype(np.uint8).reshape(-1, frame.shape[2])
+    lo, hi = np.empty(frame.shape[2], np.float32), np.empty(frame.shape[2], np.float32)
+    for channel in range(frame.shape[2]):
+        cdf = np.bincount(levels[:, channel], minlength=256).cumsum() / len(levels)
+        lo[channel] = np.searchsorted(cdf, low / 100) / 255
+        hi[channel] = np.searchsorted(cdf, high / 100) / 255
+    return np.clip((frame - lo) / np.maximum(hi - lo, 1e-3), 0, 1)
+
+
+def _luminance(frame: np.ndarray) -> np.ndarray:
+    return frame @ np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def _saturate(frame: np.ndarray, amount: float) -> np.ndarray:
+    gray = _luminance(frame)[..., None]
+    return np.clip(gray + (frame - gray) * amount, 0, 1)
+
+
+def _sharpen(frame: np.ndarray, amount: float, radius: int = 2) -> np.ndarray:
+    return np.clip(frame + amount * (frame - _box_blur(frame, radius)), 0, 1)
+
+
+def enhance(frame: np.ndarray, intensity: float) -> np.ndarray:
+    result = _sharpen(_saturate(_stretch(frame), 1 + 0.4 * intensity), 0.8 * intensity)
+    return frame + intensity * (result - frame)
+
+
+def restore(frame: np.ndarray, intensity: float) -> np.ndarray:
+    # Smooth out noise and scratches, then win back contrast and edges
+    result = _sharpen(_stretch(_box_blur(frame, 1), 0.5, 99.5), 0.5)
+    return frame + intensity * (result - frame)
+
+
+def colorize(frame: np.ndarray, intensity: float) -> np.ndarray:
+    """Tone the image along a shadow-to-highlight palette (a duotone stand-in for learned colorization)"""
+    gray = _luminance(_stretch(frame))[..., None]
+    shadows = np.array([0.10, 0.16, 0.32], dtype=np.float32)
+    highlights = np.array([1.00, 0.88, 0.66], dtype=np.float32)
+    toned = shadows + gray * (highlights - shadows)
+    return frame + intensity * (toned - frame)
+
+
+def upscale(frame: np.ndarray, intensity: float, max_pixels: int = DEFAULT_MAX_PIXELS) -> np.ndarray:
+    """Bilinear 2x upscale (less if it would pass max_pixels), sharpened more with higher intensity"""
+    height, width = frame.shape[:2]
+    factor = min(2.0, max(1.0, (max_pixels / (height * width)) ** 0.5))
+    new_height, new_width = max(1, int(height * factor)), max(1, int(width * factor))
+    ys = np.clip((np.arange(new_height, dtype=np.float32) + 0.5) / factor - 0.5, 0, height - 1)
+    xs = np.clip((np.arange(new_width, dtype=np.float32) + 0.5) / factor - 0.5, 0, width - 1)
+    y0, x0 = ys.astype(np.int32), xs.astype(np.int32)
+    y1, x1 = np.minimum(y0 + 1, height - 1), np.minimum(x0 + 1, width - 1)
+    wy, wx = (ys - y0)[:, None, None], (xs - x0)[None, :, None]
+    top = frame[y0][:, x0] * (1 - wx) + frame[y0][:, x1] * wx
+    bottom = frame[y1][:, x0] * (1 - wx) + frame[y1][:, x1] * wx
+    return _sharpen(top * (1 - wy) + bottom * wy, 0.3 + 0.5 * intensity, radius=1)
+
+
+def remove_background(frame: np.ndarray, intensity: float) -> np.ndarray:
+    """Matte out the background by color distance from the image border.
+
+    The border's median color is taken as the background; pixels close to
+    it become transparent, with a soft ramp in between so edges are not
+    jagged. Higher intensity cuts more aggressively.
+    """
+    border = np.concatenate([frame[0], frame[-1], frame[:, 0], frame[:, -1]])
+    background = np.median(border, axis=0)
+    distance = np.linalg.norm(frame - background, axis=2)
+    low = 0.05 + 0.15 * intensity
+    high = low + 0.15
+    alpha = np.clip((distance - low) / (high - low), 0, 1)
+    alpha = alpha * alpha * (3 - 2 * alpha)  # smoothstep
+    # Close pinholes in the subject
+    alpha = np.maximum(alpha, _box_blur(alpha[..., None], 1)[..., 0] ** 2)
+    return np.concatenate([frame, alpha[..., None]], axis=2)
+
+
+OPERATIONS: Dict[str, Callable[..., np.ndarray]] = {
+    "enhance": enhance,
+    "upscale": upscale,
+    "colorize": colorize,
+    "restore": restore,
+    "remove_background": remove_background,
+}
+PHOTO_EDIT_TYPES = ("enhance", "upscale", "colorize", "restore")
+# Raster formats accepted as uploads, by Pillow format name: nothing scriptable such as SVG
+RASTER_TYPES = {
+    "JPEG": "image/jpeg", "PNG": "image/png", "GIF": "image/gif",
+    "WEBP": "image/webp", "BMP": "image/bmp", "TIFF": "image/tiff",
+}
+
+
+def raster_type(data: bytes) -> Optional[str]:
+    """The content type of a raster image Pillow recognises from its header, or None"""
+    from PIL import Image
+
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            return RASTER_TYPES.get(image.format)
+    except Exception:
+        return None
+
+
+def _process(operation: str, source: str, size: int, intensity: float, max_pixels: int) -> Tuple[str, int, str, int, int]:
+    """Worker entry point: decode from one shared block, process, encode into a new one"""
+    from PIL import Image
+
+    Image.MAX_IMAGE_PIXELS = max_pixels
+    block = SharedMemory(name=source)
+    try:
+        with block.buf[:size] as view:
+            image = Image.open(io.BytesIO(view))
+            image.load()
+    except Exception as e:
+        raise ImageInputError(f"Could not decode image: {e}") from None
+    finally:
+        block.close()
+
+    frame = np.asarray(image.convert("RGB"), dtype=np.float32) / 255
+    if operation == "upscale":
+        result = upscale(frame, intensity, max_pixels)
+    else:
+        result = OPERATIONS[operation](frame, intensity)
+    pixels = (np.clip(result, 0, 1) * 255 + 0.5).astype(np.uint8)
+
+    output = io.BytesIO()
+    if pixels.shape[2] == 4:
+        Image.fromarray(pixels, "RGBA").save(output, "PNG", optimize=False)
+        content_type = "image/png"
+    else:
+        Image.fromarray(pixels, "RGB").save(output, "JPEG", quality=90)
+        content_type = "image/jpeg"
+    encoded = output.getbuffer()
+    # The parent copies the result out and unlinks the block
+    result_block = SharedMemory(create=True, size=max(1, len(encoded)))
+    try:
+        result_block.buf[:len(encoded)] = encoded
+        return result_block.name, len(encoded), content_type, pixels.shape[1], pixels.shape[0]
+    finally:
+        del encoded
+        result_block.close()
+
+
+def _discard_result(future: Future) -> None:
+    """Done-callback: unlink the result block of a job nobody is waiting for any more"""
+    if future.cancelled() or future.exception() is not None:
+        return
+    try:
+        block = SharedMemory(name=future.result()[0])
+    except FileNotFoundError:
+        return
+    block.close()
+    block.unlink()
+
+
+class ImagePipeline:
+    """Runs image operations on a pool of worker processes, started on first use"""
+
+    def __init__(self, workers: Optional[int] = None, max_pixels: int = DEFAULT_MAX_PIXELS):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pixels = max_pixels
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.in_flight = 0
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that runs an event loop and driver threads is unsafe
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    async def run(self, operation: str, data: bytes, intensity: Optional[float] = DEFAULT_INTENSITY) -> ProcessedImage:
+        if operation not in OPERATIONS:
+            raise ImageInputError(f"Unknown image operation {operation!r}")
+        if not data:
+            raise ImageInputError("Image is empty")
+        source = SharedMemory(create=True, size=len(data))
+        self.in_flight += 1
+        try:
+            source.buf[:len(data)] = data
+            future = self._pool().submit(
+                _process, operation, source.name, len(data),
+                min(max(DEFAULT_INTENSITY if intensity is None else float(intensity), 0.0), 1.0), self.max_pixels
+            )
+            try:
+                name, size, content_type, width, height = await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                # The worker may still finish; its result block would outlive us
+                future.add_done_callback(_discard_result)
+                raise
+        finally:
+            self.in_flight -= 1
+            source.close()
+            source.unlink()
+
+        result = SharedMemory(name=name)
+        try:
+            encoded = bytes(result.buf[:size])
+        finally:
+            result.close()
+            result.unlink()
+        return ProcessedImage(data=encoded, content_type=content_type, width=width, height=height)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+
+def is_public_address(address: str) -> bool:
+    """False for loopback, private, link-local (cloud metadata), reserved and multicast addresses"""
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if isinstance(ip, ipaddress.IPv6Address) and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return ip.is_global and not ip.is_multicast
+
+
+class ImageSources:
+    """Fetches source images: stored assets, local files under allowed roots, or http(s) URLs.
+
+    URLs are only fetched from public addresses (and, when allowed_hosts
+    is set, only from those hosts). Every redirect hop is checked again,
+    and the connection goes to the address that was checked, so a second
+    DNS answer cannot point the request at an internal service.
+    """
+
+    def __init__(self, store: AssetStore, asset_prefix: str, local_roots: Iterable[Path] = (),
+                 max_bytes: int = 20 * 1024 * 1024, timeout: float = 10.0,
+                 allowed_hosts: Iterable[str] = ()):
+        self.store = store
+        self.asset_prefix = urlparse(asset_prefix).path.rstrip("/")
+        self.local_roots = [Path(root).resolve() for root in local_roots]
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.allowed_hosts = {host.strip().lower() for host in allowed_hosts if host.strip()}
+
+    async def load(self, reference: str) -> bytes:
+        parsed = urlparse(reference)
+        digest = parsed.path.rsplit("/", 1)[-1]
+        if parsed.path.rsplit("/", 1)[0] == self.asset_prefix and is_digest(digest):
+            return await self._load_asset(digest)
+        if parsed.scheme in ("http", "https"):
+            return await self._load_url(reference)
+        if parsed.scheme in ("", "file"):
+            return await asyncio.to_thread(self._load_file, Path(parsed.path))
+        raise ImageInputError(f"Unsupported image reference {reference!r}")
+
+    async def _load_asset(self, digest: str) -> bytes:
+        asset = await self.store.stat(digest)
+        if asset is None:
+            raise ImageInputError(f"Asset {digest} not found")
+        if asset.size > self.max_bytes:
+            raise ImageInputError(f"Image is larger than {self.max_bytes} bytes")
+        return b"".join([chunk async for chunk in self.store.read(digest)])
+
+    async def _resolve(self, host: str) -> str:
+        """A public address for host, or ImageInputError"""
+        if self.allowed_hosts and host.lower() not in self.allowed_hosts:
+            raise ImageInputError(f"Images cannot be fetched from {host}")
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, None, type=socket.SOCK_STREAM)
+        except (socket.gaierror, UnicodeError):
+            raise ImageInputError(f"Could not resolve {host}") from None
+        addresses = [info[4][0] for info in infos]
+        # Every answer must be public: the client could otherwise be steered to any of them
+        if not addresses or not all(is_public_address(address) for address in addresses):
+            raise ImageInputError(f"Images cannot be fetched from {host}")
+        return addresses[0]
+
+    async def _load_url(self, url: str) -> bytes:
+        # trust_env=False: a proxy from the environment would connect on our behalf, unchecked
+        async with httpx.AsyncClient(timeout=self.timeout, follow_redirects=False, trust_env=False) as client:
+            for _ in range(MAX_REDIRECTS + 1):
+                target = httpx.URL(url)
+                if target.scheme not in ("http", "https") or not target.host:
+                    raise ImageInputError("Image URLs must be http(s)")
+                address = await self._resolve(target.host)
+                request = client.build_request(
+                    "GET", target.copy_with(host=address),
+                    headers={"Host": target.netloc.decode("ascii")},
+                    extensions={"sni_hostname": target.host}
+                )
+                try:
+                    response = await client.send(request, stream=True)
+                except httpx.HTTPError as e:
+                    logger.warning("Fetching image %s failed: %s", url, e)
+                    raise ImageInputError(f"Could not fetch the image from {target.host}") from None
+                try:
+                    if response.is_redirect:
+                        url = str(target.join(response.headers["location"]))
+                        continue
+                    if response.status_code != 200:
+                        raise ImageInputError(f"Fetching the image returned HTTP {response.status_code}")
+                    chunks, size = [], 0
+                    async for chunk in response.aiter_bytes():
+                        size += len(chunk)
+                        if size > self.max_bytes:
+                            raise ImageInputError(f"Image is larger than {self.max_bytes} bytes")
+                        chunks.append(chunk)
+                    return b"".join(chunks)
+                except httpx.HTTPError as e:
+                    logger.warning("Fetching image %s failed: %s", url, e)
+                    raise ImageInputError(f"Could not fetch the image from {target.host}") from None
+                finally:
+                    await response.aclose()
+        raise ImageInputError(f"Image URL redirected more than {MAX_REDIRECTS} times")
+
+    def _load_file(self, path: Path) -> bytes:
+        resolved = path.resolve()
+        if not any(resolved.is_relative_to(root) for root in self.local_roots):
+            raise ImageInputError(f"Local path {path} is outside the allowed image directories")
+        try:
+            if resolved.stat().st_size > self.max_bytes:
+                raise ImageInputError(f"Image is larger than {self.max_bytes} bytes")
+            return resolved.read_bytes()
+        except OSError as e:
+            raise ImageInputError(f"Could not read {path}: {e.strerror}") from None
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the chat intent matcher.
+
+Grows a synthetic intent table from tens to thousands of keywords and
+times IntentMatcher.match against the sequential substring checks it
+replaced. The automaton's cost per message should stay flat while the
+sequential scan grows with the table.
+
+    python intent_benchmark.py --sizes 10,100,1000,5000 --iterations 2000
+"""
+
+import argparse
+import json
+import random
+import string
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+from intents import Intent, IntentMatcher
+
+MESSAGES = [
+    "Hi! I'm opening a small coffee roastery next month and need help figuring out what to do first",
+    "Can you help me make a logo for my tech startup?",
+    "What should I post on social media to launch our new sustainable sneaker line this spring?",
+    "hello",
+]
+
+
+def synthetic_intents(keywords: int, seed: int) -> List[Intent]:
+    """The real table plus random intents of five keywords each"""
+    table = IntentMatcher.from_file(Path(__file__).parent / "data" / "chat_intents.json")
+    rng = random.Random(seed)
+    intents = list(table.intents)
+    while sum(len(intent.keywords) for intent in intents) < keywords:
+        words = tuple("".join(rng.choices(string.ascii_lowercase, k=rng.randint(6, 10))) for _ in range(5))
+        intents.append(Intent(name=f"intent_{len(intents)}", response="", suggestions=(), keywords=words,
+                              priority=rng.randint(0, 5)))
+    return intents
+
+
+def sequential_match(intents: List[Intent], message: str):
+    """The old approach: lowercase, then `in` checks intent by intent"""
+    text = message.lower()
+    for intent in intents:
+        if any(keyword in text for keyword in intent.keywords):
+            return intent
+    return None
+
+
+def time_per_message(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        for message in MESSAGES:
+            fn(message)
+    return (time.perf_counter() - started) / (iterations * len(MESSAGES))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark chat intent matching as the table grows")
+    parser.add_argument("--sizes", default="10,100,1000,5000", help="Comma-separated keyword counts")
+    parser.add_argument("--iterations", type=int, default=1000, help="Passes over the sample messages")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write results JSON here")
+    args = parser.parse_args()
+
+    results = {}
+    for size in (int(size) for size in args.sizes.split(",")):
+        intents = synthetic_intents(size, args.seed)
+        ordered = sorted(intents, key=lambda intent: -intent.priority)
+        started = time.perf_counter()
+        matcher = IntentMatcher(intents, fallback=Intent(name="fallback", response="", suggestions=()))
+        build_ms = (time.perf_counter() - started) * 1000
+
+        for message in MESSAGES:
+            expected = sequential_match(ordered, message)
+            if matcher.match(message).name != (expected.name if expected else "fallback"):
+                sys.exit(f"Matcher disagrees with the sequential scan on {message!r}")
+
+        automaton_us = time_per_message(matcher.match, args.iterations) * 1e6
+        sequential_us = time_per_message(lambda message: sequential_match(ordered, message), args.iterations) * 1e6
+        results[len(matcher)] = {
+            "automaton_us": round(automaton_us, 2),
+            "sequential_us": round(sequential_us, 2),
+            "build_ms": round(build_ms, 2),
+        }
+        print(f"🔍 {len(matcher):>6} keywords: automaton {automaton_us:8.2f}µs | "
+              f"sequential {sequential_us:8.2f}µs | build {build_ms:.1f}ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+"""Keyword intent matching for the chat assistant, compiled once into an Aho-Corasick automaton"""
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class Intent:
+    name: str
+    response: str
+    suggestions: Tuple[str, ...]
+    keywords: Tuple[str, ...] = ()
+    priority: int = 0
+
+
+class IntentMatcher:
+    """Finds the highest-priority intent whose keyword occurs in a message.
+
+    Keywords match as case-insensitive substrings, like the old chain of
+    `in` checks. Matching is one pass over the message whatever the
+    number of keywords: each state of the automaton already knows the
+    best intent among every keyword ending there.
+    """
+
+    def __init__(self, intents: Iterable[Intent], fallback: Intent):
+        self.intents = sorted(intents, key=lambda intent: -intent.priority)
+        self.fallback = fallback
+        self._goto: List[Dict[str, int]] = [{}]
+        self._best: List[Optional[int]] = [None]
+        for index, intent in enumerate(self.intents):
+            for keyword in intent.keywords:
+                self._add(keyword.lower(), index)
+        self._fail = self._link()
+
+    def _add(self, keyword: str, index: int) -> None:
+        state = 0
+        for char in keyword:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._best.append(None)
+            state = next_state
+        # Intents are sorted by priority, so a lower index is a better match
+        if self._best[state] is None or index < self._best[state]:
+            self._best[state] = index
+
+    def _link(self) -> List[int]:
+        fail = [0] * len(self._goto)
+        queue = list(self._goto[0].values())
+        for state in queue:  # breadth first; the list grows while iterating
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                fail[next_state] = target if target != next_state else 0
+                inherited = self._best[fail[next_state]]
+                if inherited is not None and (self._best[next_state] is None or inherited < self._best[next_state]):
+                    self._best[next_state] = inherited
+        return fail
+
+    def match(self, message: str) -> Intent:
+        goto, fail, best_at = self._goto, self._fail, self._best
+        best = None
+        state = 0
+        for char in message.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            found = best_at[state]
+            if found is not None and (best is None or found < best):
+                best = found
+                if best == 0:
+                    break  # nothing outranks the top intent
+        return self.intents[best] if best is not None else self.fallback
+
+    def __len__(self) -> int:
+        return sum(len(intent.keywords) for intent in self.intents)
+
+    @classmethod
+    def from_dict(cls, table: dict) -> "IntentMatcher":
+        fallback = Intent(name="fallback", response=table["fallback"]["response"],
+                          suggestions=tuple(table["fallback"]["suggestions"]))
+        intents = [
+            Intent(
+                name=entry["name"],
+                response=entry["response"],
+                suggestions=tuple(entry.get("suggestions", ())),
+                keywords=tuple(entry["keywords"]),
+                priority=entry.get("priority", 0),
+            )
+            for entry in table["intents"]
+        ]
+        return cls(intents, fallback)
+
+    @classmethod
+    def from_file(cls, path: Path) -> "IntentMatcher":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,81 @@
+"""Keyset-paginated queries over the generation_jobs collection"""
+import base64
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+# Every history query sorts newest first on (created_at, _id); each index
+# ends with that pair so filtered pages are served straight from the index.
+JOB_INDEXES = [
+    IndexModel([("job_id", ASCENDING)], name="job_id"),
+    IndexModel([("type", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="type_created_at"),
+    IndexModel([("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], name="status_created_at"),
+    IndexModel([("created_at", DESCENDING), ("_id", DESCENDING)], name="created_at"),
+]
+HISTORY_SORT = [("created_at", DESCENDING), ("_id", DESCENDING)]
+HISTORY_FIELDS = {
+    "job_id", "type", "status", "message", "asset_url", "metadata",
+    "request_data", "created_at", "updated_at",
+}
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(job: Dict[str, Any]) -> str:
+    raw = f"{job['created_at'].isoformat()}|{job['_id']}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    try:
+        created_at, object_id = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf-8").split("|")
+        return datetime.fromisoformat(created_at), ObjectId(object_id)
+    except (ValueError, InvalidId, UnicodeError) as e:
+        raise InvalidCursorError("Invalid cursor") from e
+
+
+def history_query(
+    job_type: Optional[str] = None,
+    status: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
+    clauses: List[Dict[str, Any]] = []
+    if job_type:
+        clauses.append({"type": job_type})
+    if status:
+        clauses.append({"status": status})
+    created_range = {}
+    if created_after:
+        created_range["$gte"] = created_after
+    if created_before:
+        created_range["$lt"] = created_before
+    if created_range:
+        clauses.append({"created_at": created_range})
+    if cursor:
+        created_at, object_id = decode_cursor(cursor)
+        clauses.append({"$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": object_id}},
+        ]})
+    if not clauses:
+        return {}
+    return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def history_projection(fields: Optional[Iterable[str]]) -> Dict[str, int]:
+    """Projection for the requested fields; _id and created_at are kept for the cursor.
+
+    Without explicit fields everything except the bulky request_data is returned.
+    """
+    if not fields:
+        return {"request_data": 0}
+    projection = {field: 1 for field in fields}
+    projection.update({"_id": 1, "created_at": 1, "job_id": 1})
+    return projection
@@ -0,0 +1,272 @@
+"""In-process generation job queue backed by the generation_jobs collection"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# A runner receives the validated request model and the job id and returns
+# the finished GenerationResponse (or anything exposing message/assetUrl/metadata)
+JobRunner = Callable[[Any, str], Awaitable[Any]]
+
+
+class QueueFullError(Exception):
+    """Raised when a job type's queue cannot accept more work"""
+
+
+class JobQueue:
+    """Bounded per-type queues drained by per-type worker pools.
+
+    Every job type gets its own queue and its own set of workers, so the
+    worker count doubles as the concurrency limit for that type and a backlog
+    of slow video jobs never blocks logo jobs from being picked up.
+    """
+
+    def __init__(
+        self,
+        collection,
+        limits: Optional[Dict[str, int]] = None,
+        default_limit: int = 4,
+        maxsize: int = 1000,
+        maxsizes: Optional[Dict[str, int]] = None,
+        events=None,
+        writer=None,
+    ):
+        self.collection = collection
+        self.events = events
+        # Optional BatchWriter; queued job records are then inserted write-behind
+        self.writer = writer
+        self.limits = dict(limits or {})
+        self.default_limit = default_limit
+        self.maxsize = maxsize
+        # Per-type overrides, so slow job types hold a shorter backlog
+        self.maxsizes = dict(maxsizes or {})
+        self._queues: Dict[str, asyncio.Queue] = {}
+        self._workers: List[asyncio.Task] = []
+        self._running = False
+        self._draining = False
+        # dedupe key -> future of the queued job record, while the job is in flight
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.coalesced = 0
+
+    def _queue_for(self, job_type: str) -> asyncio.Queue:
+        queue = self._queues.get(job_type)
+        if queue is None:
+            queue = self._queues[job_type] = asyncio.Queue(self.maxsizes.get(job_type, self.maxsize))
+            if self._running:
+                self._spawn_workers(job_type, queue)
+        return queue
+
+    def _spawn_workers(self, job_type: str, queue: asyncio.Queue) -> None:
+        for i in range(self.limits.get(job_type, self.default_limit)):
+            task = asyncio.create_task(self._worker(queue), name=f"job-worker-{job_type}-{i}")
+            self._workers.append(task)
+
+    async def start(self) -> None:
+        """Start worker pools for all configured job types"""
+        if self._running:
+            return
+        self._draining = False
+        for job_type in self.limits:
+            self._queue_for(job_type)
+        self._running = True
+        for job_type, queue in self._queues.items():
+            self._spawn_workers(job_type, queue)
+
+    async def drain(self, timeout: float) -> None:
+        """Refuse new jobs and give queued and running ones up to timeout seconds to finish"""
+        self._draining = True
+        pending = [queue.join() for queue in self._queues.values()]
+        if not pending:
+            return
+        try:
+            await asyncio.wait_for(asyncio.gather(*pending), timeout)
+        except asyncio.TimeoutError:
+            left = sum(queue.qsize() for queue in self._queues.values())
+            logger.warning("Job drain timed out after %ss with %d jobs still queued", timeout, left)
+
+    async def stop(self) -> None:
+        """Cancel all workers; queued jobs stay 'queued' in the database"""
+        self._running = False
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers.clear()
+        self._inflight.clear()
+
+    def depth(self, job_type: str) -> int:
+        queue = self._queues.get(job_type)
+        return queue.qsize() if queue else 0
+
+    async def submit(
+        self,
+        job_id: str,
+        job_type: str,
+        request,
+        runner: JobRunner,
+        dedupe_key: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """Persist a queued job record and hand it to the job type's workers.
+
+        Submissions sharing a dedupe_key while an earlier one is still queued
+        or processing are coalesced onto that job and get its record back.
+        """
+        if dedupe_key is not None:
+            pending = self._inflight.get(dedupe_key)
+            if pending is not None:
+                self.coalesced += 1
+                return await asyncio.shield(pending)
+            pending = self._inflight[dedupe_key] = asyncio.get_running_loop().create_future()
+            try:
+                job_data = await self._enqueue(job_id, job_type, request, runner, dedupe_key)
+            except BaseException as e:
+                del self._inflight[dedupe_key]
+                _settle_error(pending, e)
+                raise
+            pending.set_result(job_data)
+            return job_data
+        return await self._enqueue(job_id, job_type, request, runner, None)
+
+    async def _enqueue(self, job_id, job_type, request, runner, dedupe_key) -> Dict[str, Any]:
+        if self._draining:
+            raise QueueFullError("server is shutting down")
+        queue = self._queue_for(job_type)
+        now = datetime.utcnow()
+        job_data = {
+            "job_id": job_id,
+            "type": job_type,
+            "request_data": request.dict(),
+            "status": "queued",
+            "asset_url": None,
+            "created_at": now,
+            "updated_at": now,
+        }
+
+        # Reserve the queue slot first; the worker waits until the record is written
+        written = asyncio.get_running_loop().create_future()
+        try:
+            queue.put_nowait((job_id, request, runner, dedupe_key, written))
+        except asyncio.QueueFull:
+            raise QueueFullError(f"{job_type} queue is full")
+
+        try:
+            if self.writer is not None:
+                flushed = await self.writer.add(job_data)
+                flushed.add_done_callback(lambda f: _settle(f, written))
+            else:
+                await self.collection.insert_one(job_data)
+                written.set_result(None)
+        except BaseException as e:
+            _settle_error(written, e)
+            raise
+        return job_data
+
+    def requeue(self, job_id: str, job_type: str, request, runner: JobRunner) -> None:
+        """Hand a job whose record already exists (e.g. a failed job being resumed) back to its workers"""
+        if self._draining:
+            raise QueueFullError("server is shutting down")
+        written = asyncio.get_running_loop().create_future()
+        written.set_result(None)
+        try:
+            self._queue_for(job_type).put_nowait((job_id, request, runner, None, written))
+        except asyncio.QueueFull:
+            raise QueueFullError(f"{job_type} queue is full")
+        self._publish(job_id, {"jobId": job_id, "status": "queued"})
+
+    def pending(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """A queued job record still buffered in the writer, if any"""
+        return self.writer.pending(job_id) if self.writer is not None else None
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            job_id, request, runner, dedupe_key, written = await queue.get()
+            try:
+                try:
+                    await written
+                except Exception:
+                    logger.error("Job %s was never persisted, dropping it", job_id)
+                else:
+                    await self._run(job_id, request, runner)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Failed to record result for job %s", job_id)
+            finally:
+                if dedupe_key is not None:
+                    self._inflight.pop(dedupe_key, None)
+                queue.task_done()
+
+    async def _run(self, job_id: str, request, runner: JobRunner) -> None:
+        await self._update(job_id, status="processing")
+        try:
+            result = await runner(request, job_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.exception("Job %s failed", job_id)
+            await self._update(job_id, status="failed", message=f"Generation failed: {str(e)}")
+            return
+
+        await self._update(
+            job_id,
+            status="completed",
+            message=result.message,
+            asset_url=result.assetUrl,
+            metadata=result.metadata,
+        )
+
+    def report_progress(self, job_id: str, progress: float, message: Optional[str] = None) -> None:
+        """Push an intermediate progress event to subscribers (not persisted)"""
+        event = {"jobId": job_id, "status": "processing", "progress": round(progress, 3)}
+        if message is not None:
+            event["message"] = message
+        self._publish(job_id, event)
+
+    async def record_progress(self, job_id: str, progress: float, message: Optional[str] = None, **fields) -> None:
+        """Persist progress, which never moves backwards, with any checkpoint fields, then publish it"""
+        fields["updated_at"] = datetime.utcnow()
+        await self.collection.update_one(
+            {"job_id": job_id}, {"$set": fields, "$max": {"progress": round(progress, 3)}}
+        )
+        self.report_progress(job_id, progress, message)
+
+    async def _update(self, job_id: str, **fields) -> None:
+        fields["updated_at"] = datetime.utcnow()
+        await self.collection.update_one({"job_id": job_id}, {"$set": fields})
+
+        event = {"jobId": job_id, "status": fields["status"]}
+        if "message" in fields:
+            event["message"] = fields["message"]
+        if "asset_url" in fields:
+            event["assetUrl"] = fields["asset_url"]
+        if "metadata" in fields:
+            event["metadata"] = fields["metadata"]
+        if fields["status"] == "completed":
+            event["progress"] = 1.0
+        self._publish(job_id, event)
+
+    def _publish(self, job_id: str, event: Dict[str, Any]) -> None:
+        if self.events is not None:
+            self.events.publish(job_id, event)
+
+
+def _settle(source: asyncio.Future, target: asyncio.Future) -> None:
+    if target.done():
+        return
+    if source.cancelled():
+        _settle_error(target, asyncio.CancelledError())
+    elif source.exception() is not None:
+        _settle_error(target, source.exception())
+    else:
+        target.set_result(None)
+
+
+def _settle_error(future: asyncio.Future, error: BaseException) -> None:
+    """Fail a future without cancelling it, so awaiting it never looks like our own cancellation"""
+    if future.done():
+        return
+    if not isinstance(error, Exception):
+        error = RuntimeError("job submission was interrupted")
+    future.set_exception(error)
+    future.exception()  # waiters may be gone; don't warn about it
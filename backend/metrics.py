@@ -0,0 +1,188 @@
+"""Prometheus instrumentation: HTTP middleware, Mongo command timings, generation durations.
+
+With several worker processes (serve.py sets PROMETHEUS_MULTIPROC_DIR),
+metrics are written to per-process files and every scrape aggregates
+them, so /metrics reports the whole server whichever worker answers.
+"""
+import functools
+import os
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from prometheus_client import REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess
+from pymongo import monitoring
+from starlette.routing import Match
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+HTTP_REQUESTS = Counter(
+    "http_requests_total", "HTTP requests by route template", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by route template", ["method", "route"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+HTTP_IN_FLIGHT = Gauge(
+    "http_requests_in_flight", "HTTP requests currently being served", ["method", "route"],
+    multiprocess_mode="livesum",
+)
+MONGO_LATENCY = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command latency", ["collection", "command", "outcome"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+GENERATION_LATENCY = Histogram(
+    "generation_duration_seconds", "Time spent in a generation function", ["job_type", "outcome"],
+    buckets=(0.1, 0.25, 0.5, 1, 2, 3, 4, 5, 7.5, 10, 20, 30, 60),
+)
+BATCH_WRITE_SIZE = Histogram(
+    "batch_write_documents", "Documents per insert_many flush", ["collection"],
+    buckets=(1, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+BATCH_WRITE_LATENCY = Histogram(
+    "batch_write_duration_seconds", "insert_many flush latency", ["collection"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+
+# Only commands that carry a collection name are labelled with it; the rest
+# (ping, endSessions, ...) share one label so cardinality stays bounded.
+_COLLECTION_COMMANDS = {
+    "find", "insert", "update", "delete", "aggregate", "count", "distinct",
+    "findAndModify", "createIndexes",
+}
+
+
+def route_template(scope) -> str:
+    """The matched route's path template, never the raw path"""
+    app = scope.get("app")
+    router = getattr(app, "router", None)
+    for route in getattr(router, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return getattr(route, "path", UNMATCHED_ROUTE)
+    return UNMATCHED_ROUTE
+
+
+class PrometheusMiddleware:
+    """Pure ASGI middleware so streaming responses are not buffered"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(scope)
+        status = {"code": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        in_flight = HTTP_IN_FLIGHT.labels(method, route)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_LATENCY.labels(method, route).observe(time.perf_counter() - started)
+            HTTP_REQUESTS.labels(method, route, str(status["code"])).inc()
+            in_flight.dec()
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times every command the driver sends; pass to AsyncIOMotorClient(event_listeners=...)"""
+
+    def __init__(self):
+        self._collections: Dict[tuple, str] = {}
+
+    def started(self, event):
+        collection = "-"
+        if event.command_name in _COLLECTION_COMMANDS:
+            collection = str(event.command.get(event.command_name, "-"))
+        elif event.command_name == "getMore":
+            collection = str(event.command.get("collection", "-"))
+        self._collections[(event.connection_id, event.request_id)] = collection
+
+    def succeeded(self, event):
+        self._observe(event, "success")
+
+    def failed(self, event):
+        self._observe(event, "failure")
+
+    def _observe(self, event, outcome: str) -> None:
+        collection = self._collections.pop((event.connection_id, event.request_id), "-")
+        MONGO_LATENCY.labels(collection, event.command_name, outcome).observe(event.duration_micros / 1e6)
+
+
+def observe_generation(job_type: str):
+    """Decorator recording how long an async generation function takes"""
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            outcome = "failure"
+            try:
+                result = await fn(*args, **kwargs)
+                outcome = "success"
+                return result
+            finally:
+                GENERATION_LATENCY.labels(job_type, outcome).observe(time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def observe_batch_write(collection: str) -> Callable[[int, float], None]:
+    """on_flush hook for BatchWriter"""
+    def on_flush(size: int, seconds: float) -> None:
+        BATCH_WRITE_SIZE.labels(collection).observe(size)
+        BATCH_WRITE_LATENCY.labels(collection).observe(seconds)
+    return on_flush
+
+
+class CallbackCollector:
+    """Exposes in-process counters (queue depth, cache hits) at scrape time"""
+
+    def __init__(self, collect: Callable[[], Iterable]):
+        self._collect = collect
+
+    def collect(self):
+        return self._collect()
+
+    def describe(self):
+        return []
+
+
+_callbacks: List[CallbackCollector] = []
+
+
+def multiprocess_dir() -> Optional[str]:
+    return os.environ.get("PROMETHEUS_MULTIPROC_DIR") or None
+
+
+def register_callback(collect: Callable[[], Iterable]) -> None:
+    collector = CallbackCollector(collect)
+    _callbacks.append(collector)
+    REGISTRY.register(collector)
+
+
+def metrics_payload() -> bytes:
+    if multiprocess_dir() is None:
+        return generate_latest(REGISTRY)
+    # Counters and histograms summed over every worker's files; callback
+    # metrics only see the worker serving the scrape
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    for collector in _callbacks:
+        registry.register(collector)
+    return generate_latest(registry)
+
+
+def mark_worker_dead(pid: Optional[int] = None) -> None:
+    """Drop an exited worker's live gauges so in-flight counts do not linger"""
+    if multiprocess_dir() is not None:
+        multiprocess.mark_process_dead(os.getpid() if pid is None else pid)
+
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Benchmark for business card and website rendering.
+
+Renders print batches of cards for one company (the shared back comes
+from the fragment cache after the first card) and sites with a growing
+number of pages, cold and then with a warm fragment cache.
+
+    python render_benchmark.py --cards 1000 --pages 4,20,50
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+from rendering import FragmentCache, RenderEngine, TemplateLibrary
+
+TEMPLATES = Path(__file__).parent / "data" / "templates"
+
+
+def card_batch(engine: RenderEngine, count: int, style: str) -> float:
+    started = time.perf_counter()
+    for i in range(count):
+        engine.render_card(style, {
+            "name": f"Person {i}", "title": "Engineer", "company": "BigCo",
+            "email": f"person{i}@bigco.example", "phone": f"+1-555-{i:04d}", "website": "bigco.example",
+        })
+    return time.perf_counter() - started
+
+
+async def site(engine: RenderEngine, pages: int, scheme: str) -> float:
+    started = time.perf_counter()
+    await engine.render_site("BigCo", "technology", ["home"] + [f"page {i}" for i in range(1, pages)], scheme)
+    return time.perf_counter() - started
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark card and website rendering")
+    parser.add_argument("--cards", type=int, default=1000, help="Cards per print batch")
+    parser.add_argument("--pages", default="4,20,50", help="Comma-separated site sizes")
+    parser.add_argument("--style", default="modern")
+    parser.add_argument("--scheme", default="modern")
+    parser.add_argument("--output", help="Write results JSON here")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    library = TemplateLibrary.from_dir(TEMPLATES)
+    print(f"📚 Compiled templates in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+    engine = RenderEngine(library, FragmentCache())
+    batch = card_batch(engine, args.cards, args.style)
+    stats = engine.fragments.stats()
+    print(f"🔍 {args.cards} cards: {batch * 1000:.1f}ms ({batch / args.cards * 1e6:.1f}µs each), "
+          f"fragment hits {stats['hits']} / misses {stats['misses']}")
+    results = {"cards": {"count": args.cards, "total_ms": round(batch * 1000, 2)}, "sites": {}}
+
+    for pages in (int(pages) for pages in args.pages.split(",")):
+        engine = RenderEngine(library, FragmentCache())
+        cold = asyncio.run(site(engine, pages, args.scheme))
+        warm = asyncio.run(site(engine, pages, args.scheme))
+        results["sites"][pages] = {"cold_ms": round(cold * 1000, 2), "warm_ms": round(warm * 1000, 2)}
+        print(f"🔍 {pages:>3}-page site: cold {cold * 1000:6.1f}ms | warm {warm * 1000:6.1f}ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,361 @@
+"""Server-side rendering of business cards (PDF) and websites (zipped HTML).
+
+Templates are parsed once at startup and bound to each card style and
+site color scheme, so a render is a join of literals and escaped values.
+Rendered fragments are cached by template and inputs, which makes the
+shared back of a batch of cards, or the pages of a re-generated site,
+free after the first render.
+"""
+import asyncio
+import hashlib
+import html
+import json
+import re
+import struct
+import threading
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from string import Template as StringTemplate
+from typing import Callable, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from cache import LRUCache
+
+CARD_FIELDS = {"name", "title", "company", "email", "phone", "website"}
+CARD_FRONT_FIELDS = ("name", "title", "email", "phone", "website")
+CARD_BACK_FIELDS = ("company", "website")
+SCHEME_FIELDS = {"primary", "secondary", "background", "text", "font"}
+PAGE_FIELDS = {"business_name", "business_type", "page_title"}
+LAYOUT_FIELDS = PAGE_FIELDS | SCHEME_FIELDS | {"nav", "content"}
+NAV_FIELDS = {"href", "label", "current"}
+MAX_SITE_PAGES = 50
+DEFAULT_PAGES = ("home",)
+
+
+class Markup(str):
+    """Markup that is already safe and is inserted without escaping"""
+
+
+def html_escape(value: str) -> str:
+    return value if isinstance(value, Markup) else html.escape(value)
+
+
+def pdf_escape(value: str) -> str:
+    """Text for a PDF string literal: backslashes and parentheses escaped, line breaks dropped"""
+    return value.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)").replace("\r", " ").replace("\n", " ")
+
+
+class CompiledTemplate:
+    """A $field template split into (literal, field) pairs once, so rendering is a join.
+
+    $-placeholders leave the braces of CSS and PDF operators alone.
+    bind() fills some fields ahead of time, e.g. a color scheme, and
+    returns a template that only has the rest.
+    """
+
+    __slots__ = ("name", "parts", "escape", "digest")
+
+    def __init__(self, name: str, parts: Sequence[Tuple[str, Optional[str]]], escape: Callable[[str], str], digest: str):
+        self.name = name
+        self.parts = tuple(parts)
+        self.escape = escape
+        self.digest = digest
+
+    @classmethod
+    def parse(cls, name: str, text: str, fields: Iterable[str], escape: Callable[[str], str]) -> "CompiledTemplate":
+        allowed = set(fields)
+        parts: List[Tuple[str, Optional[str]]] = []
+        literal, position = [], 0
+        for match in StringTemplate.pattern.finditer(text):
+            literal.append(text[position:match.start()])
+            position = match.end()
+            if match.group("escaped") is not None:
+                literal.append("$")
+                continue
+            field = match.group("named") or match.group("braced")
+            if field is None:
+                raise ValueError(f"Invalid placeholder at offset {match.start()} in template {name}")
+            if field not in allowed:
+                raise ValueError(f"Unknown field ${field} in template {name}, expected one of {sorted(allowed)}")
+            parts.append(("".join(literal), field))
+            literal = []
+        literal.append(text[position:])
+        parts.append(("".join(literal), None))
+        return cls(name, parts, escape, hashlib.sha256(f"{name}\0{text}".encode("utf-8")).hexdigest())
+
+    @property
+    def fields(self) -> set:
+        return {field for _, field in self.parts if field is not None}
+
+    def bind(self, values: Mapping[str, str], name: Optional[str] = None) -> "CompiledTemplate":
+        parts: List[Tuple[str, Optional[str]]] = []
+        pending = ""
+        for literal, field in self.parts:
+            if field is not None and field in values:
+                pending += literal + self.escape(values[field])
+            else:
+                parts.append((pending + literal, field))
+                pending = ""
+        bound = json.dumps({field: values[field] for field in sorted(self.fields & values.keys())})
+        digest = hashlib.sha256(f"{self.digest}\0{bound}".encode("utf-8")).hexdigest()
+        return CompiledTemplate(name or self.name, parts, self.escape, digest)
+
+    def render(self, values: Mapping[str, str]) -> str:
+        escape = self.escape
+        return "".join(
+            literal + escape(values.get(field) or "") if field is not None else literal
+            for literal, field in self.parts
+        )
+
+
+class FragmentCache:
+    """Rendered fragments keyed on the template's digest plus its inputs.
+
+    The digest covers the template text and anything bound into it, so
+    edited templates never serve stale fragments. Thread-safe: site pages
+    render on worker threads.
+    """
+
+    def __init__(self, max_entries: int = 20000):
+        self._cache = LRUCache(max_entries=max_entries, ttl_seconds=float("inf"))
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, template: CompiledTemplate, values: Mapping[str, str]) -> str:
+        inputs = json.dumps({field: values.get(field) for field in sorted(template.fields)}, separators=(",", ":"))
+        key = f"{template.digest}:{hashlib.sha256(inputs.encode('utf-8')).hexdigest()}"
+        with self._lock:
+            fragment = self._cache.get(key)
+            if fragment is not None:
+                self.hits += 1
+                return fragment
+            self.misses += 1
+        fragment = template.render(values)
+        with self._lock:
+            self._cache.set(key, fragment)
+        return fragment
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._cache), "hits": self.hits, "misses": self.misses}
+
+
+@dataclass(frozen=True)
+class CardTemplates:
+    front: CompiledTemplate
+    back: CompiledTemplate
+
+
+@dataclass(frozen=True)
+class SitePage:
+    slug: str
+    title: str
+    filename: str
+
+
+@dataclass(frozen=True)
+class RenderedCard:
+    pdf: bytes
+    style: str
+
+
+@dataclass(frozen=True)
+class RenderedSite:
+    archive: bytes
+    scheme: str
+    pages: List[SitePage]
+
+
+class TemplateLibrary:
+    """Every card style and site color scheme, compiled once"""
+
+    def __init__(self, cards: Mapping[str, CardTemplates], default_style: str, card_size: Tuple[int, int],
+                 layouts: Mapping[str, CompiledTemplate], default_scheme: str,
+                 nav_item: CompiledTemplate, pages: Mapping[str, CompiledTemplate]):
+        if default_style not in cards:
+            raise ValueError(f"Default card style {default_style!r} has no templates")
+        if default_scheme not in layouts:
+            raise ValueError(f"Default color scheme {default_scheme!r} is not defined")
+        if "page" not in pages:
+            raise ValueError("Site templates need a generic page.html")
+        self.cards = dict(cards)
+        self.default_style = default_style
+        self.card_size = card_size
+        self.layouts = dict(layouts)
+        self.default_scheme = default_scheme
+        self.nav_item = nav_item
+        self.pages = dict(pages)
+
+    def card(self, style: Optional[str]) -> Tuple[str, CardTemplates]:
+        style = (style or "").strip().lower()
+        if style not in self.cards:
+            style = self.default_style
+        return style, self.cards[style]
+
+    def layout(self, scheme: Optional[str]) -> Tuple[str, CompiledTemplate]:
+        scheme = (scheme or "").strip().lower()
+        if scheme not in self.layouts:
+            scheme = self.default_scheme
+        return scheme, self.layouts[scheme]
+
+    def page(self, slug: str) -> CompiledTemplate:
+        return self.pages.get(slug) or self.pages["page"]
+
+    @classmethod
+    def from_dir(cls, root: Path) -> "TemplateLibrary":
+        root = Path(root)
+        with open(root / "cards.json", encoding="utf-8") as f:
+            card_table = json.load(f)
+        cards = {
+            style: CardTemplates(
+                front=CompiledTemplate.parse(f"card/{style}/front", entry["front"], CARD_FIELDS, pdf_escape),
+                back=CompiledTemplate.parse(f"card/{style}/back", entry["back"], CARD_FIELDS, pdf_escape),
+            )
+            for style, entry in card_table["styles"].items()
+        }
+
+        site = root / "site"
+        with open(site / "schemes.json", encoding="utf-8") as f:
+            scheme_table = json.load(f)
+        layout = CompiledTemplate.parse("site/layout", (site / "layout.html").read_text(encoding="utf-8"),
+                                        LAYOUT_FIELDS, html_escape)
+        layouts = {
+            # Scheme values are trusted CSS, bound without escaping
+            scheme: layout.bind({field: Markup(value) for field, value in colors.items() if field in SCHEME_FIELDS},
+                                name=f"site/layout/{scheme}")
+            for scheme, colors in scheme_table["schemes"].items()
+        }
+        nav_item = CompiledTemplate.parse("site/nav_item", (site / "nav_item.html").read_text(encoding="utf-8").strip(),
+                                          NAV_FIELDS, html_escape)
+        pages = {
+            path.stem: CompiledTemplate.parse(f"site/pages/{path.stem}", path.read_text(encoding="utf-8"),
+                                              PAGE_FIELDS, html_escape)
+            for path in sorted((site / "pages").glob("*.html"))
+        }
+        return cls(cards, card_table["default_style"], tuple(card_table["size"]),
+                   layouts, scheme_table["default_scheme"], nav_item, pages)
+
+
+def site_pages(names: Optional[Sequence[str]]) -> List[SitePage]:
+    """Requested page names as unique slugs, in order; "home" (or the first page) becomes index.html"""
+    slugs: Dict[str, None] = {}
+    for name in names or DEFAULT_PAGES:
+        slug = re.sub(r"[^a-z0-9]+", "-", name.lower()).strip("-")
+        if slug:
+            slugs[slug] = None
+    if not slugs:
+        slugs = dict.fromkeys(DEFAULT_PAGES)
+    index = "home" if "home" in slugs else next(iter(slugs))
+    return [
+        SitePage(slug=slug, title=slug.replace("-", " ").title(),
+                 filename="index.html" if slug == index else f"{slug}.html")
+        for slug in slugs
+    ]
+
+
+def build_pdf(pages: Sequence[str], size: Tuple[int, int]) -> bytes:
+    """A minimal PDF with one page per content stream, set in the standard Helvetica fonts"""
+    width, height = size
+    font = "<< /Type /Font /Subtype /Type1 /BaseFont /{} /Encoding /WinAnsiEncoding >>"
+    kids = " ".join(f"{5 + 2 * i} 0 R" for i in range(len(pages)))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>".encode("ascii"),
+        font.format("Helvetica").encode("ascii"),
+        font.format("Helvetica-Bold").encode("ascii"),
+    ]
+    for i, content in enumerate(pages):
+        stream = content.encode("cp1252", "replace")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width} {height}] "
+            f"/Resources << /Font << /F1 3 0 R /F2 4 0 R >> >> /Contents {6 + 2 * i} 0 R >>".encode("ascii")
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+
+    output = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    output += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(output)
+
+
+@dataclass(frozen=True)
+class ZipEntry:
+    filename: str
+    crc: int
+    size: int
+    data: bytes  # raw deflate stream
+
+
+def deflate_entry(filename: str, content: bytes) -> ZipEntry:
+    # zlib releases the GIL, so pages compressed on worker threads really run in parallel
+    compressor = zlib.compressobj(6, zlib.DEFLATED, -zlib.MAX_WBITS)
+    data = compressor.compress(content) + compressor.flush()
+    return ZipEntry(filename, zlib.crc32(content), len(content), data)
+
+
+def zip_archive(entries: Sequence[ZipEntry]) -> bytes:
+    """A zip of pre-deflated entries with a fixed timestamp, so the same site gives the same bytes"""
+    dos_time, dos_date = 0, (1 << 5) | 1  # 1980-01-01 00:00
+    output, directory = bytearray(), bytearray()
+    for entry in entries:
+        name = entry.filename.encode("utf-8")
+        fields = (20, 0x0800, 8, dos_time, dos_date, entry.crc, len(entry.data), entry.size, len(name))
+        directory += struct.pack("<IH", 0x02014B50, 20) + struct.pack("<HHHHHIIIH", *fields)
+        directory += struct.pack("<HHHHII", 0, 0, 0, 0, 0, len(output)) + name
+        output += struct.pack("<I", 0x04034B50) + struct.pack("<HHHHHIIIH", *fields) + struct.pack("<H", 0)
+        output += name + entry.data
+    offset = len(output)
+    output += directory
+    output += struct.pack("<IHHHHIIH", 0x06054B50, 0, 0, len(entries), len(entries), len(directory), offset, 0)
+    return bytes(output)
+
+
+class RenderEngine:
+    def __init__(self, library: TemplateLibrary, fragments: FragmentCache):
+        self.library = library
+        self.fragments = fragments
+
+    def render_card(self, style: Optional[str], fields: Mapping[str, Optional[str]]) -> RenderedCard:
+        """A two-page print PDF: the person on the front, the company on the back"""
+        style, templates = self.library.card(style)
+        values = {field: fields.get(field) or "" for field in CARD_FIELDS}
+        front = self.fragments.render(templates.front, {field: values[field] for field in CARD_FRONT_FIELDS})
+        # Shared by everyone at the company: rendered once per batch
+        back = self.fragments.render(templates.back, {field: values[field] for field in CARD_BACK_FIELDS})
+        return RenderedCard(pdf=build_pdf([front, back], self.library.card_size), style=style)
+
+    async def render_site(self, business_name: str, business_type: str, pages: Optional[Sequence[str]],
+                          scheme: Optional[str]) -> RenderedSite:
+        """Every page rendered and compressed concurrently, then zipped with links between them"""
+        scheme, layout = self.library.layout(scheme)
+        site = site_pages(pages)
+        if len(site) > MAX_SITE_PAGES:
+            raise ValueError(f"A site can have at most {MAX_SITE_PAGES} pages")
+        entries = await asyncio.gather(*(
+            asyncio.to_thread(self._render_page, layout, site, page, business_name, business_type)
+            for page in site
+        ))
+        # index.html first, then the pages in the order they were asked for
+        entries.sort(key=lambda entry: entry.filename != "index.html")
+        return RenderedSite(archive=await asyncio.to_thread(zip_archive, entries), scheme=scheme, pages=site)
+
+    def _render_page(self, layout: CompiledTemplate, site: Sequence[SitePage], page: SitePage,
+                     business_name: str, business_type: str) -> ZipEntry:
+        values = {"business_name": business_name, "business_type": business_type, "page_title": page.title}
+        content = self.fragments.render(self.library.page(page.slug), values)
+        nav = "".join(
+            self.library.nav_item.render({
+                "href": other.filename, "label": other.title,
+                "current": Markup(' aria-current="page"') if other is page else Markup(""),
+            })
+            for other in site
+        )
+        document = layout.render({**values, "nav": Markup(nav), "content": Markup(content)})
+        return deflate_entry(page.filename, document.encode("utf-8"))
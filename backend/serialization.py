@@ -0,0 +1,28 @@
+"""Direct JSON responses for payloads the handlers built and validated themselves"""
+from typing import Any, Mapping, Optional
+
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel
+
+
+def json_response(
+    content: Any,
+    status_code: int = 200,
+    headers: Optional[Mapping[str, str]] = None,
+    exclude_unset: bool = False,
+) -> Response:
+    """Serialize without FastAPI's response_model pass.
+
+    FastAPI returns Response objects untouched, so a handler returning
+    this skips re-validating the model and the jsonable_encoder walk.
+    Models are dumped by pydantic-core straight to bytes; plain data
+    (cached results, raw documents) goes through orjson.
+    """
+    if isinstance(content, BaseModel):
+        return Response(
+            content.model_dump_json(exclude_unset=exclude_unset),
+            status_code=status_code,
+            headers=headers,
+            media_type="application/json",
+        )
+    return ORJSONResponse(content, status_code=status_code, headers=headers)
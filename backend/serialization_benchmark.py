@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Serialization benchmark for the API's response payloads.
+
+Times each payload through FastAPI's default path (response_model
+validation, serialization and stdlib json via JSONResponse) and through
+json_response (pydantic-core or orjson, no re-validation), and reports
+the wire size with gzip and, when installed, brotli.
+
+    python serialization_benchmark.py --iterations 2000 --output serialization.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import zlib
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, List
+
+os.environ.setdefault('DB_NAME', 'lotaya_benchmark')
+
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_response_field
+
+import server
+from compression import brotli
+from serialization import json_response
+
+
+def sample_payloads() -> Dict[str, Dict[str, Any]]:
+    """Representative bodies; "raw" is what the handler now hands to json_response"""
+    domain = server.DomainResponse(suggestions=[
+        server.DomainSuggestion(domain=f"techai{i}.com", available=i % 2 == 0, price=f"${10 + i}.99/year")
+        for i in range(10)
+    ])
+    card = server.GenerationResponse(
+        jobId="card_1a2b3c4d", status="completed", message="Professional business card designed for John Doe",
+        assetUrl="https://storage.googleapis.com/lotaya-assets/cards/card_1a2b3c4d.pdf",
+        metadata={
+            "style": "modern",
+            "includes": ["front_design", "back_design", "print_ready_pdf"],
+            "contact_info": {"name": "John Doe", "title": "CEO", "company": "TestTech Inc"},
+        },
+    )
+    now = datetime.utcnow()
+    status_checks = [
+        server.StatusCheck(client_name=f"client_{i}", timestamp=now - timedelta(seconds=i)) for i in range(1000)
+    ]
+    history = server.JobPage(jobs=[
+        server.JobRecord(
+            job_id=f"logo_{i:08x}", type="logo", status="completed", message="Professional logo generated",
+            asset_url=f"https://storage.googleapis.com/lotaya-assets/logos/logo_{i:08x}.png",
+            metadata={"style": "modern", "colors": ["#1A73E8", "#FBBC05"], "industry": "technology"},
+            created_at=now, updated_at=now,
+        )
+        for i in range(200)
+    ], nextCursor="MjAyNi0xMC0xN1QyMDozMDowMHw2NTJm")
+    chat = server.ChatResponse(
+        response="I'd love to help you create a stunning logo! What's your brand name and what industry are you in?",
+        suggestions=["Tell me about your brand personality", "What's your target audience?"],
+    )
+
+    return {
+        "generate-domain": {"model": server.DomainResponse, "before": domain, "raw": domain},
+        "generation-response": {"model": server.GenerationResponse, "before": card, "raw": card},
+        "get-status (1000)": {
+            "model": List[server.StatusCheck],
+            "before": status_checks,
+            # Stored documents, as read with {"_id": 0}
+            "raw": [status.dict() for status in status_checks],
+        },
+        "get-jobs (200)": {"model": server.JobPage, "before": history, "raw": history, "exclude_unset": True},
+        "chat-assistant (cached)": {"model": server.ChatResponse, "before": chat.dict(), "raw": chat.dict()},
+    }
+
+
+def gzip_compress(body: bytes) -> bytes:
+    # Same settings CompressionMiddleware uses
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    return compressor.compress(body) + compressor.flush()
+
+
+def time_per_call(fn: Callable[[], Any], iterations: int) -> float:
+    fn()
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations
+
+
+def bench_payload(name: str, spec: Dict[str, Any], iterations: int) -> Dict[str, Any]:
+    field = create_response_field(name=f"Response_{abs(hash(name))}", type_=spec["model"])
+    exclude_unset = spec.get("exclude_unset", False)
+    loop = asyncio.new_event_loop()
+
+    def before() -> bytes:
+        content = loop.run_until_complete(serialize_response(
+            field=field, response_content=spec["before"], exclude_unset=exclude_unset
+        ))
+        return JSONResponse(content).body
+
+    def after() -> bytes:
+        return json_response(spec["raw"], exclude_unset=exclude_unset).body
+
+    try:
+        before_body, after_body = before(), after()
+        if json.loads(before_body) != json.loads(after_body):
+            sys.exit(f"{name}: json_response output differs from FastAPI's")
+        before_seconds = time_per_call(before, iterations)
+        after_seconds = time_per_call(after, iterations)
+    finally:
+        loop.close()
+
+    result = {
+        "before_us": round(before_seconds * 1e6, 2),
+        "after_us": round(after_seconds * 1e6, 2),
+        "speedup": round(before_seconds / after_seconds, 2) if after_seconds else None,
+        "bytes": len(after_body),
+        "gzip_bytes": len(gzip_compress(after_body)),
+        "gzip_us": round(time_per_call(lambda: gzip_compress(after_body), iterations) * 1e6, 2),
+    }
+    if brotli is not None:
+        result["br_bytes"] = len(brotli.compress(after_body, quality=4))
+        result["br_us"] = round(time_per_call(lambda: brotli.compress(after_body, quality=4), iterations) * 1e6, 2)
+    return result
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark response serialization and compression")
+    parser.add_argument("--iterations", type=int, default=200, help="Serializations per payload")
+    parser.add_argument("--output", help="Write results JSON here")
+    args = parser.parse_args()
+
+    results = {}
+    for name, spec in sample_payloads().items():
+        results[name] = bench_payload(name, spec, args.iterations)
+        r = results[name]
+        compressed = f"gzip {r['gzip_bytes']}B"
+        if "br_bytes" in r:
+            compressed += f", br {r['br_bytes']}B"
+        print(f"🔍 {name}: {r['before_us']}µs -> {r['after_us']}µs ({r['speedup']}x) | {r['bytes']}B ({compressed})")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"timestamp": datetime.utcnow().isoformat(), "payloads": results}, f, indent=2)
+        print(f"\n📄 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
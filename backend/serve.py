@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Production entry point for the Lotaya AI API.
+
+Runs server:app under uvicorn with one worker process per CPU (override
+with --workers or WEB_CONCURRENCY), uvloop and httptools when installed,
+no reload watcher, and a MongoDB connection budget split across workers.
+On SIGTERM each worker stops accepting connections, finishes in-flight
+requests and drains its job queue before exiting.
+
+Progress events, and with RATE_LIMIT_STORE=memory the rate-limit buckets,
+live in the worker that owns them; SSE and WebSocket streams on another
+worker catch up on status from Mongo every SSE_HEARTBEAT_SECONDS.
+Prometheus metrics are aggregated across workers through
+PROMETHEUS_MULTIPROC_DIR. Pass --workers 1 to run a single process.
+
+    python serve.py --port 8001
+    python serve.py --workers 4 --mongo-pool-size 200
+"""
+
+import argparse
+import importlib.util
+import logging
+import os
+import shutil
+import tempfile
+
+import uvicorn
+
+
+def available_cpus() -> int:
+    # Honour CPU affinity (taskset, container cpusets) where the platform exposes it
+    if hasattr(os, "sched_getaffinity"):
+        return max(1, len(os.sched_getaffinity(0)))
+    return os.cpu_count() or 1
+
+
+def installed(module: str) -> bool:
+    return importlib.util.find_spec(module) is not None
+
+
+def pool_sizes(total: int, workers: int) -> tuple:
+    """Split a connection budget evenly; every worker keeps at least a few connections"""
+    max_pool = max(4, total // workers)
+    return max_pool, min(max_pool, max(1, max_pool // 10))
+
+
+def worker_count(value: str) -> int:
+    return 0 if value == "auto" else max(1, int(value))
+
+
+def per_process_state() -> list:
+    """State that is not shared between workers in the current configuration"""
+    state = ["job progress events between status changes"]
+    if os.environ.get("RATE_LIMIT_STORE", "memory") != "mongo":
+        state.append("rate-limit buckets")
+    return state
+
+
+def prepare_multiprocess_metrics(port: int) -> str:
+    """Point prometheus_client at an empty directory the workers share.
+
+    Must run before the workers import prometheus_client; files from a
+    previous run would otherwise be added to this run's counters.
+    """
+    path = os.environ.get("PROMETHEUS_MULTIPROC_DIR") or os.path.join(tempfile.gettempdir(), f"lotaya-metrics-{port}")
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path)
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = path
+    return path
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    env = os.environ.get
+    parser = argparse.ArgumentParser(description="Run the Lotaya AI API in production mode")
+    parser.add_argument("--host", default=env("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(env("PORT", 8001)))
+    parser.add_argument("--workers", type=worker_count, default=worker_count(env("WEB_CONCURRENCY", "auto")),
+                        help='Worker processes (default: "auto", one per available CPU)')
+    parser.add_argument("--backlog", type=int, default=int(env("BACKLOG", 2048)),
+                        help="Listen socket backlog")
+    parser.add_argument("--keep-alive", type=int, default=int(env("KEEP_ALIVE_SECONDS", 75)),
+                        help="Idle keep-alive timeout; keep it above the load balancer's")
+    parser.add_argument("--graceful-timeout", type=int, default=int(env("GRACEFUL_TIMEOUT_SECONDS", 30)),
+                        help="Seconds to let in-flight requests finish after SIGTERM")
+    parser.add_argument("--limit-concurrency", type=int, default=int(env("LIMIT_CONCURRENCY", 0)) or None,
+                        help="Per-worker connection cap before answering 503")
+    parser.add_argument("--mongo-pool-size", type=int, default=int(env("MONGO_POOL_BUDGET", 200)),
+                        help="MongoDB connections shared by all workers")
+    parser.add_argument("--forwarded-allow-ips", default=env("FORWARDED_ALLOW_IPS", "127.0.0.1"),
+                        help="Comma-separated proxy addresses (or *) whose X-Forwarded-For is trusted for the client address")
+    parser.add_argument("--log-level", default=env("LOG_LEVEL", "info"))
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> None:
+    args = parse_args(argv)
+    workers = args.workers or available_cpus()
+    if workers > 1:
+        logging.basicConfig(level=args.log_level.upper())
+        logging.getLogger(__name__).warning(
+            "Running %d workers: %s are per worker (pass --workers 1 to opt out)", workers, " and ".join(per_process_state())
+        )
+        prepare_multiprocess_metrics(args.port)
+
+    # Workers are spawned processes and read their pool size from the environment
+    max_pool, min_pool = pool_sizes(args.mongo_pool_size, workers)
+    os.environ.setdefault("MONGO_MAX_POOL_SIZE", str(max_pool))
+    os.environ.setdefault("MONGO_MIN_POOL_SIZE", str(min_pool))
+    # ...and the worker count, to tell orphaned jobs from a sibling's
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+
+    uvicorn.run(
+        "server:app",
+        host=args.host,
+        port=args.port,
+        workers=workers,
+        loop="uvloop" if installed("uvloop") else "asyncio",
+        http="httptools" if installed("httptools") else "h11",
+        backlog=args.backlog,
+        timeout_keep_alive=args.keep_alive,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        limit_concurrency=args.limit_concurrency,
+        log_level=args.log_level,
+        proxy_headers=True,
+        forwarded_allow_ips=args.forwarded_allow_ips,
+        server_header=False,
+        reload=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
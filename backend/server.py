@@ -1,30 +1,248 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, Body, File, Form, HTTPException, Query, Request, Response, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, ORJSONResponse, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
 from fastapi.middleware.cors import CORSMiddleware
+from contextlib import asynccontextmanager
 from dotenv import load_dotenv
 from motor.motor_asyncio import AsyncIOMotorClient
 import os
 import logging
 from pathlib import Path
-from pydantic import BaseModel, Field
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, Field, ValidationError
+from typing import AsyncIterator, List, Optional, Dict, Any
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 import asyncio
-import random
+import json
+import mimetypes
+from xml.sax.saxutils import escape
+
+from admission import AdmissionController, AdmissionMiddleware, AdmissionRule, MemoryBucketStore, MongoBucketStore, RateLimit
+from assets import LocalAssetStore, MemoryAssetStore, is_digest, parse_range
+from batch_writer import BatchWriter
+from brand import BrandLibrary, TaskGraph, brand_kit_archive
+from cache import LRUCache, MongoCacheTier, ResultCache, request_key
+from compression import CompressionMiddleware
+from domains import BloomFilter, CachedResolver, DomainEngine, DomainLexicon, LocalResolver
+from events import JobEventBus, TERMINAL_STATUSES
+from generation import (
+    BackendPolicy, BackendRegistry, FunctionBackend, GenerationError, GenerationTimeoutError, install_fakes
+)
+from images import PHOTO_EDIT_TYPES, RASTER_TYPES, ImagePipeline, ImageSources, raster_type
+from intents import IntentMatcher
+from job_history import (
+    HISTORY_FIELDS, HISTORY_SORT, JOB_INDEXES, InvalidCursorError,
+    encode_cursor, history_projection, history_query
+)
+from jobs import JobQueue, QueueFullError
+from metrics import (
+    MongoCommandMetrics, PrometheusMiddleware, mark_worker_dead, metrics_payload,
+    observe_batch_write, observe_generation, register_callback
+)
+from rendering import MAX_SITE_PAGES, FragmentCache, RenderEngine, TemplateLibrary, site_pages
+from serialization import json_response
+from singleflight import SingleFlight
+from slogans import SloganIndex
+from speech import SAMPLE_RATE, SpeechPipeline, duration_seconds, resolve_speed, split_sentences, wav_header
+from video import RESOLUTIONS, VideoPipeline, plan_segments
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# MongoDB connection, opened by the app's lifespan (see connect_database);
+# serve.py sizes the pool per worker process
+MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', 100))
+MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 0))
+READINESS_TIMEOUT_SECONDS = 2
+client: Optional[AsyncIOMotorClient] = None
+db = None
+
+# Generation job queue: one bounded queue and worker pool per job type
+JOB_CONCURRENCY = {
+    "logo": 8,
+    "video": 2,
+    "brand_kit": 2,
+    "social_content": 8,
+    "website": 4,
+    "voice": 4,
+    "photo_edit": 4,
+    "background_removal": 8,
+    "business_card": 8,
+}
+# Slow job types keep a short backlog: a queued video waits minutes, so turning
+# the caller away with 503 sooner beats accepting work it will give up on
+JOB_QUEUE_LIMITS = {
+    "video": 100,
+    "brand_kit": 100,
+    "website": 200,
+}
+JOB_RETRY_AFTER_SECONDS = 5
+MAX_JOB_IDS_PER_QUERY = 100
+DEFAULT_JOB_PAGE_SIZE = 50
+MAX_JOB_PAGE_SIZE = 200
+DEFAULT_EXPORT_BATCH_SIZE = 1000
+MAX_BATCH_ITEMS = 500
+BATCH_CONCURRENCY = int(os.environ.get('BATCH_CONCURRENCY', 16))
+MAX_EXPORT_BATCH_SIZE = 10000
+# Progress events only reach subscribers in the worker process running the job,
+# so idle streams re-read the job from Mongo at every heartbeat
+COMPRESSION_MIN_BYTES = int(os.environ.get('COMPRESSION_MIN_BYTES', 1024))
+SSE_HEARTBEAT_SECONDS = float(os.environ.get('SSE_HEARTBEAT_SECONDS', 5))
+JOB_DRAIN_TIMEOUT_SECONDS = float(os.environ.get('JOB_DRAIN_TIMEOUT_SECONDS', 30))
+# A queued or processing job untouched for this long has lost its worker (longer than any generation timeout)
+JOB_STALE_SECONDS = float(os.environ.get('JOB_STALE_SECONDS', 900))
+job_events = JobEventBus()
+# Queued job records are inserted write-behind in insert_many batches
+job_writer = BatchWriter(
+    None,
+    key_field="job_id",
+    max_batch=int(os.environ.get('JOB_WRITE_BATCH_SIZE', 500)),
+    max_delay=float(os.environ.get('JOB_WRITE_MAX_DELAY_MS', 50)) / 1000,
+    max_pending=int(os.environ.get('JOB_WRITE_MAX_PENDING', 10000)),
+    on_flush=observe_batch_write("generation_jobs")
+)
+job_queue = JobQueue(
+    None,
+    limits=JOB_CONCURRENCY,
+    maxsize=int(os.environ.get('JOB_QUEUE_SIZE', 1000)),
+    maxsizes=JOB_QUEUE_LIMITS,
+    events=job_events,
+    writer=job_writer
+)
+
+# Generated assets are stored once per content hash and served from /api/assets/{digest};
+# ASSET_STORE=memory keeps them in process (tests), ASSET_BASE_URL sets the public prefix;
+# the local store creates its directory when the app starts
+asset_store = (
+    MemoryAssetStore() if os.environ.get('ASSET_STORE', 'local') == 'memory'
+    else LocalAssetStore(Path(os.environ.get('ASSET_STORE_PATH', ROOT_DIR / 'storage')))
+)
+ASSET_BASE_URL = os.environ.get('ASSET_BASE_URL', '/api/assets').rstrip('/')
+ASSET_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Assets share the API's origin: never let a browser sniff or run them there, and only
+# show raster images inline (SVG, HTML in zips, PDFs and the rest are downloaded)
+ASSET_SECURITY_HEADERS = {
+    "X-Content-Type-Options": "nosniff",
+    "Content-Security-Policy": "default-src 'none'; style-src 'unsafe-inline'; sandbox",
+}
+INLINE_ASSET_TYPES = frozenset(RASTER_TYPES.values())
+
+# Photo edits run on a worker process pool (IMAGE_WORKERS, default one per CPU).
+# Sources are stored assets, http(s) URLs on public addresses (only IMAGE_URL_HOSTS, when set),
+# or files under IMAGE_LOCAL_ROOTS.
+IMAGE_MAX_BYTES = int(os.environ.get('IMAGE_MAX_BYTES', 20 * 1024 * 1024))
+image_pipeline = ImagePipeline(
+    workers=int(os.environ.get('IMAGE_WORKERS', 0)) or None,
+    max_pixels=int(os.environ.get('IMAGE_MAX_PIXELS', 40_000_000))
+)
+image_sources = ImageSources(
+    asset_store,
+    ASSET_BASE_URL,
+    local_roots=[Path(root) for root in os.environ.get('IMAGE_LOCAL_ROOTS', str(ROOT_DIR / 'uploads')).split(os.pathsep) if root],
+    max_bytes=IMAGE_MAX_BYTES,
+    allowed_hosts=os.environ.get('IMAGE_URL_HOSTS', '').split(',')
+)
+
+# Speech is rendered sentence by sentence on a worker process pool (VOICE_WORKERS, default one per CPU)
+VOICE_MAX_CHARS = int(os.environ.get('VOICE_MAX_CHARS', 5000))
+speech_pipeline = SpeechPipeline(workers=int(os.environ.get('VOICE_WORKERS', 0)) or None)
+
+# Business cards and websites render from templates compiled once per style and color scheme;
+# RENDER_TEMPLATES_PATH points at an alternative template directory
+render_engine = RenderEngine(
+    TemplateLibrary.from_dir(Path(os.environ.get('RENDER_TEMPLATES_PATH', ROOT_DIR / 'data' / 'templates'))),
+    FragmentCache(max_entries=int(os.environ.get('FRAGMENT_CACHE_SIZE', 20000)))
+)
+
+# Brand kits combine logo, slogan, palette and typography sub-generations; palettes and type
+# pairings come from BRAND_KIT_PATH
+brand_library = BrandLibrary.from_file(Path(os.environ.get('BRAND_KIT_PATH', ROOT_DIR / 'data' / 'brand_kit.json')))
+
+# Videos render as VIDEO_SEGMENT_SECONDS-long segments on a worker process pool (VIDEO_WORKERS,
+# default one per CPU); finished segments are recorded on the job so failures resume, not restart
+MIN_VIDEO_SECONDS = 5
+MAX_VIDEO_SECONDS = int(os.environ.get('MAX_VIDEO_SECONDS', 60))
+VIDEO_FPS = int(os.environ.get('VIDEO_FPS', 24))
+VIDEO_SEGMENT_SECONDS = float(os.environ.get('VIDEO_SEGMENT_SECONDS', 2))
+video_pipeline = VideoPipeline(
+    asset_store,
+    workers=int(os.environ.get('VIDEO_WORKERS', 0)) or None,
+    retries=int(os.environ.get('VIDEO_SEGMENT_RETRIES', 2))
+)
+
+# Result cache for generators whose output depends only on the request body
+RESULT_CACHE_TTL_SECONDS = float(os.environ.get('RESULT_CACHE_TTL_SECONDS', 3600))
+DOMAIN_AVAILABILITY_TTL_SECONDS = float(os.environ.get('DOMAIN_AVAILABILITY_TTL_SECONDS', 300))
+result_cache = ResultCache(
+    LRUCache(
+        max_entries=int(os.environ.get('RESULT_CACHE_SIZE', 10000)),
+        ttl_seconds=RESULT_CACHE_TTL_SECONDS
+    ),
+    MongoCacheTier(None, RESULT_CACHE_TTL_SECONDS)
+    if os.environ.get('RESULT_CACHE_MONGO', '').lower() in ('1', 'true', 'yes') else None,
+    # Domain suggestions carry availability flags, which must not outlive the resolver's cache
+    ttls={"domain": min(RESULT_CACHE_TTL_SECONDS, DOMAIN_AVAILABILITY_TTL_SECONDS)}
+)
+single_flight = SingleFlight()
+
+# Chat intents are compiled once; CHAT_INTENTS_PATH points at an alternative table
+chat_intents = IntentMatcher.from_file(
+    Path(os.environ.get('CHAT_INTENTS_PATH', ROOT_DIR / 'data' / 'chat_intents.json'))
+)
+
+# Domain suggestions: candidates ranked from DOMAIN_LEXICON_PATH, availability checked
+# through a cache and a Bloom filter of taken names in front of the resolver
+domain_lexicon = DomainLexicon.from_file(
+    Path(os.environ.get('DOMAIN_LEXICON_PATH', ROOT_DIR / 'data' / 'domain_lexicon.json'))
+)
+domain_resolver = CachedResolver(
+    LocalResolver(domain_lexicon.taken),
+    ttl_seconds=DOMAIN_AVAILABILITY_TTL_SECONDS,
+    bloom=BloomFilter(capacity=int(os.environ.get('DOMAIN_BLOOM_CAPACITY', 1000000)))
+)
+domain_engine = DomainEngine(domain_lexicon, domain_resolver)
+DOMAIN_SUGGESTION_LIMIT = 10
+
+# Slogan templates are parsed and indexed by industry and tone once; SLOGAN_TEMPLATES_PATH
+# points at an alternative corpus
+slogan_index = SloganIndex.from_file(
+    Path(os.environ.get('SLOGAN_TEMPLATES_PATH', ROOT_DIR / 'data' / 'slogan_templates.json'))
+)
+SLOGANS_PER_REQUEST = 5
 
-# Create the main app
-app = FastAPI(
-    title="Lotaya AI API",
-    description="All-in-One Generative AI Platform API",
-    version="1.0.0"
+# Admission control for POST endpoints. Per-client buckets keep one caller from
+# flooding a tool; per-route buckets and in-flight caps bound the total work.
+LIGHT_TOOL = AdmissionRule(client=RateLimit(rate=2, burst=20), route=RateLimit(rate=200, burst=400))
+HEAVY_TOOL = AdmissionRule(client=RateLimit(rate=0.2, burst=5), route=RateLimit(rate=20, burst=50))
+SYNC_TOOL = AdmissionRule(client=RateLimit(rate=2, burst=20), max_in_flight=512)
+ADMISSION_RULES = {
+    "/api/generate-logo": LIGHT_TOOL,
+    "/api/generate-social-content": LIGHT_TOOL,
+    "/api/remove-background": LIGHT_TOOL,
+    "/api/generate-business-card": LIGHT_TOOL,
+    "/api/generate-voice": LIGHT_TOOL,
+    "/api/generate-voice/stream": AdmissionRule(client=RateLimit(rate=1, burst=10), max_in_flight=64),
+    "/api/edit-photo": LIGHT_TOOL,
+    "/api/edit-photo/upload": LIGHT_TOOL,
+    "/api/remove-background/upload": LIGHT_TOOL,
+    "/api/generate-video": HEAVY_TOOL,
+    "/api/generate-brand-kit": HEAVY_TOOL,
+    "/api/generate-website": HEAVY_TOOL,
+    "/api/chat-assistant": SYNC_TOOL,
+    "/api/chat-assistant/stream": SYNC_TOOL,
+    "/api/generate-domain": SYNC_TOOL,
+    "/api/generate-slogan": SYNC_TOOL,
+    "/api/batch/{tool}": AdmissionRule(client=RateLimit(rate=0.1, burst=2), max_in_flight=8),
+    "/api/jobs/{job_id}/resume": HEAVY_TOOL,
+}
+RATE_LIMITS_ENABLED = os.environ.get('RATE_LIMITS_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+# RATE_LIMIT_STORE=mongo shares buckets across workers via the rate_limits collection.
+# Clients are limited per address unless they send one of the API_KEYS (comma-separated) as X-API-Key.
+admission = AdmissionController(
+    ADMISSION_RULES,
+    MongoBucketStore(None) if os.environ.get('RATE_LIMIT_STORE', 'memory') == 'mongo' else MemoryBucketStore(),
+    api_keys=[key.strip() for key in os.environ.get('API_KEYS', '').split(',')]
 )
 
 # Create a router with the /api prefix
@@ -57,6 +275,7 @@ class BrandKitRequest(BaseModel):
     industry: str
     brandPersonality: Optional[List[str]] = None
     targetAudience: Optional[str] = None
+    style: Optional[str] = "modern"
 
 class SocialContentRequest(BaseModel):
     platform: str
@@ -106,12 +325,34 @@ class BusinessCardRequest(BaseModel):
     website: Optional[str] = None
     style: Optional[str] = "modern"
 
+class BrandStyleRequest(BaseModel):
+    industry: str
+    brandPersonality: Optional[List[str]] = None
+    style: Optional[str] = None
+
+class PaletteColor(BaseModel):
+    role: str
+    hex: str
+    text: str
+
+class BrandPalette(BaseModel):
+    colors: List[PaletteColor]
+
+class BrandTypography(BaseModel):
+    family: str
+    heading: str
+    body: str
+    accent: str
+    scale: float
+    sizes: Dict[str, int]
+
 class GenerationResponse(BaseModel):
     jobId: str
     status: str
     message: str
     assetUrl: Optional[str] = None
     metadata: Optional[Dict[str, Any]] = None
+    progress: Optional[float] = None
 
 class ChatResponse(BaseModel):
     response: str
@@ -128,160 +369,233 @@ class DomainResponse(BaseModel):
 class SloganResponse(BaseModel):
     slogans: List[str]
 
+class JobRecord(BaseModel):
+    job_id: str
+    type: Optional[str] = None
+    status: Optional[str] = None
+    message: Optional[str] = None
+    asset_url: Optional[str] = None
+    metadata: Optional[Dict[str, Any]] = None
+    request_data: Optional[Dict[str, Any]] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+class JobPage(BaseModel):
+    jobs: List[JobRecord]
+    nextCursor: Optional[str] = None
+
 # Mock AI Generation Functions
-async def mock_logo_generation(request: LogoGenerationRequest) -> GenerationResponse:
+async def simulate_processing(job_id: str, seconds: float, steps: int = 4) -> None:
+    """Sleep for the simulated processing time, pushing progress events as it goes"""
+    for step in range(1, steps + 1):
+        await asyncio.sleep(seconds / steps)
+        if step < steps:
+            job_queue.report_progress(job_id, step / steps)
+
+async def store_asset(data, content_type: str) -> str:
+    """Store a generated file and return its public URL; identical files share one copy"""
+    asset = await asset_store.put(data, content_type)
+    return f"{ASSET_BASE_URL}/{asset.digest}"
+
+def placeholder_svg(title: str, subtitle: str, colors: List[str], width: int = 512, height: int = 512) -> bytes:
+    """A deterministic SVG stand-in for generated artwork: same inputs, same bytes"""
+    background, accent = (colors + ["#1A73E8", "#FBBC05"])[:2]
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 {width} {height}">'
+        f'<rect width="100%" height="100%" fill="{escape(background)}"/>'
+        f'<circle cx="{width // 2}" cy="{height * 2 // 5}" r="{min(width, height) // 6}" fill="{escape(accent)}"/>'
+        f'<text x="50%" y="{height * 7 // 10}" font-family="sans-serif" font-size="{width // 12}" '
+        f'text-anchor="middle" fill="#FFFFFF">{escape(title)}</text>'
+        f'<text x="50%" y="{height * 4 // 5}" font-family="sans-serif" font-size="{width // 24}" '
+        f'text-anchor="middle" fill="#FFFFFF">{escape(subtitle)}</text>'
+        '</svg>'
+    ).encode("utf-8")
+
+@observe_generation("logo")
+async def mock_logo_generation(request: LogoGenerationRequest, job_id: str) -> GenerationResponse:
     """Mock logo generation with realistic delay"""
-    await asyncio.sleep(2)  # Simulate processing time
-    
-    job_id = f"logo_{str(uuid.uuid4())[:8]}"
-    mock_url = f"https://storage.googleapis.com/lotaya-assets/logos/{job_id}.png"
+    await simulate_processing(job_id, 2)
     
-    # Store job in database
-    job_data = {
-        "job_id": job_id,
-        "type": "logo",
-        "request_data": request.dict(),
-        "status": "completed",
-        "asset_url": mock_url,
-        "created_at": datetime.utcnow()
-    }
-    await db.generation_jobs.insert_one(job_data)
+    colors = request.colorPalette or ["#1A73E8", "#FBBC05"]
+    asset_url = await store_asset(
+        placeholder_svg(request.brandName, " ".join(request.keywords[:3]), colors), "image/svg+xml"
+    )
     
     return GenerationResponse(
         jobId=job_id,
         status="completed",
         message=f"Professional logo generated for {request.brandName}",
-        assetUrl=mock_url,
+        assetUrl=asset_url,
         metadata={
             "style": request.style,
-            "colors": request.colorPalette or ["#1A73E8", "#FBBC05"],
+            "colors": colors,
             "industry": request.industry
         }
     )
 
-async def mock_video_generation(request: VideoGenerationRequest) -> GenerationResponse:
-    """Mock video generation"""
-    await asyncio.sleep(3)
-    
-    job_id = f"video_{str(uuid.uuid4())[:8]}"
-    mock_url = f"https://storage.googleapis.com/lotaya-assets/videos/{job_id}.mp4"
-    
-    job_data = {
-        "job_id": job_id,
-        "type": "video",
-        "request_data": request.dict(),
-        "status": "completed",
-        "asset_url": mock_url,
-        "created_at": datetime.utcnow()
-    }
-    await db.generation_jobs.insert_one(job_data)
+@observe_generation("video")
+async def video_generation(request: VideoGenerationRequest, job_id: str) -> GenerationResponse:
+    """Render the video's segments in parallel on the video worker pool, then join them.
+
+    Every finished segment is recorded on the job as it lands, so a retry
+    or a resumed job renders only the segments that are still missing.
+    """
+    if request.resolution not in RESOLUTIONS:
+        raise GenerationError(f"Unknown resolution: {request.resolution}")
+    segments = plan_segments(
+        request.prompt, request.durationSeconds, request.resolution, request.style, VIDEO_FPS, VIDEO_SEGMENT_SECONDS
+    )
+    job = await db.generation_jobs.find_one({"job_id": job_id}, {"_id": 0, "segments": 1}) or {}
+    finished = {int(index): segment["digest"] for index, segment in (job.get("segments") or {}).items()}
+    # The concat stage counts as one more step
+    done, steps = set(finished), len(segments) + 1
+
+    async def on_segment(index: int, digest: str) -> None:
+        done.add(index)
+        await job_queue.record_progress(
+            job_id, len(done) / steps, f"Rendered {len(done)} of {len(segments)} segments",
+            **{f"segments.{index}": {"digest": digest}}
+        )
+
+    digests = await video_pipeline.render(segments, finished, on_segment)
+    digest = await video_pipeline.concat(digests, segments[0])
     
     return GenerationResponse(
         jobId=job_id,
         status="completed",
         message=f"AI video generated successfully ({request.durationSeconds}s)",
-        assetUrl=mock_url,
+        assetUrl=f"{ASSET_BASE_URL}/{digest}",
         metadata={
             "duration": request.durationSeconds,
-            "style": request.style,
-            "resolution": request.resolution
+            "style": segments[0].style,
+            "resolution": request.resolution,
+            "fps": VIDEO_FPS,
+            "segments": len(segments),
+            "format": "AVI, Motion JPEG"
         }
     )
 
-async def mock_brand_kit_generation(request: BrandKitRequest) -> GenerationResponse:
-    """Mock brand kit generation"""
-    await asyncio.sleep(4)
-    
-    job_id = f"brandkit_{str(uuid.uuid4())[:8]}"
-    mock_url = f"https://storage.googleapis.com/lotaya-assets/brandkits/{job_id}.zip"
-    
-    job_data = {
-        "job_id": job_id,
-        "type": "brand_kit",
-        "request_data": request.dict(),
-        "status": "completed",
-        "asset_url": mock_url,
-        "created_at": datetime.utcnow()
-    }
-    await db.generation_jobs.insert_one(job_data)
+async def read_stored_asset(url: str) -> Optional[bytes]:
+    """The bytes behind one of our asset URLs, or None when it is not in the asset store"""
+    digest = url.rsplit("/", 1)[-1]
+    if not url.startswith(ASSET_BASE_URL) or not is_digest(digest) or await asset_store.stat(digest) is None:
+        return None
+    return b"".join([chunk async for chunk in asset_store.read(digest)])
+
+@observe_generation("brand_kit")
+async def brand_kit_generation(request: BrandKitRequest, job_id: str) -> GenerationResponse:
+    """Build the kit as a task graph: logo, palette, typography and slogans at once, then the guidelines.
+
+    Logos and slogans go through the same backends and result cache as
+    /generate-logo and /generate-slogan, so kits and plain requests with
+    the same inputs share them. Every finished part is recorded on the
+    job, so a retry or a resumed job only builds the parts still missing.
+    """
+    personality = request.brandPersonality or []
+    logo_request = LogoGenerationRequest(
+        brandName=request.brandName, keywords=personality[:3] or [request.industry],
+        industry=request.industry, style=request.style
+    )
+    slogan_request = SloganRequest(
+        brandName=request.brandName, industry=request.industry, tone=brand_library.tone(personality) or "inspiring"
+    )
+    style_request = BrandStyleRequest(industry=request.industry, brandPersonality=personality, style=request.style)
+    job = await db.generation_jobs.find_one({"job_id": job_id}, {"_id": 0, "nodes": 1}) or {}
+    finished = job.get("nodes") or {}
+    reused = set(finished)
+
+    async def cached(node: str, namespace: str, sub_request: BaseModel, generate) -> Dict[str, Any]:
+        key = request_key(sub_request)
+        result = await result_cache.get(namespace, key)
+        if result is not None:
+            reused.add(node)
+            return result
+        return (await generate_cached(namespace, key, generate)).dict()
+
+    async def logo() -> Dict[str, Any]:
+        async def generate() -> GenerationResponse:
+            result = await generation_backends.generate("logo", logo_request, f"logo_{str(uuid.uuid4())[:8]}")
+            # Recorded like any logo job, since a later /generate-logo may be answered with it
+            await job_writer.add(completed_job_record("logo", logo_request, result, brand_kit_id=job_id))
+            return result
+        return await cached("logo", "logo", logo_request, generate)
+
+    async def palette() -> Dict[str, Any]:
+        async def generate() -> BrandPalette:
+            return BrandPalette(colors=brand_library.palette(request.industry, personality, request.style))
+        return await cached("palette", "palette", style_request, generate)
+
+    async def typography() -> Dict[str, Any]:
+        async def generate() -> BrandTypography:
+            return BrandTypography(**brand_library.typography(personality, request.style))
+        return await cached("typography", "typography", style_request, generate)
+
+    async def slogans() -> Dict[str, Any]:
+        return await cached(
+            "slogans", "slogan", slogan_request, lambda: generation_backends.generate("slogan", slogan_request)
+        )
+
+    async def guidelines(logo, palette, typography, slogans) -> Dict[str, Any]:
+        kit = {
+            "industry": brand_library.industry(request.industry),
+            "personality": personality,
+            "audience": request.targetAudience,
+            "logo": logo,
+            "palette": palette["colors"],
+            "typography": typography,
+            "slogans": slogans["slogans"],
+        }
+        logo_svg = await read_stored_asset(logo["assetUrl"] or "")
+        archive = await asyncio.to_thread(brand_kit_archive, request.brandName, kit, logo_svg)
+        return {"assetUrl": await store_asset(archive, "application/zip")}
+
+    graph = TaskGraph()
+    graph.add("logo", logo)
+    graph.add("palette", palette)
+    graph.add("typography", typography)
+    graph.add("slogans", slogans)
+    graph.add("guidelines", guidelines, after=("logo", "palette", "typography", "slogans"))
+    done = set(finished)
+
+    async def on_done(node: str, result: Dict[str, Any]) -> None:
+        done.add(node)
+        await job_queue.record_progress(
+            job_id, len(done) / len(graph), f"{node.title()} ready", **{f"nodes.{node}": result}
+        )
+
+    results = await graph.run(finished, on_done)
     
     return GenerationResponse(
         jobId=job_id,
         status="completed",
         message=f"Complete brand kit generated for {request.brandName}",
-        assetUrl=mock_url,
+        assetUrl=results["guidelines"]["assetUrl"],
         metadata={
-            "includes": ["logo", "color_palette", "typography", "brand_guidelines"],
+            "includes": ["logo", "color_palette", "typography", "slogans", "brand_guidelines"],
             "industry": request.industry,
-            "personality": request.brandPersonality
+            "personality": request.brandPersonality,
+            "logo_url": results["logo"]["assetUrl"],
+            "palette": [color["hex"] for color in results["palette"]["colors"]],
+            "typography": {"heading": results["typography"]["heading"], "body": results["typography"]["body"]},
+            "slogan": results["slogans"]["slogans"][0] if results["slogans"]["slogans"] else None,
+            "reused": sorted(reused - {"guidelines"})
         }
     )
 
-# Health and Status Endpoints
-@api_router.get("/")
-async def root():
-    return {"message": "Lotaya AI API - All-in-One Generative AI Platform"}
-
-@api_router.post("/status", response_model=StatusCheck)
-async def create_status_check(input: StatusCheckCreate):
-    status_dict = input.dict()
-    status_obj = StatusCheck(**status_dict)
-    await db.status_checks.insert_one(status_obj.dict())
-    return status_obj
-
-@api_router.get("/status", response_model=List[StatusCheck])
-async def get_status_checks():
-    status_checks = await db.status_checks.find().to_list(1000)
-    return [StatusCheck(**status_check) for status_check in status_checks]
-
-# AI Generation Endpoints
-@api_router.post("/generate-logo", response_model=GenerationResponse)
-async def generate_logo(request: LogoGenerationRequest):
-    """Generate professional logos tailored to business and industry"""
-    try:
-        return await mock_logo_generation(request)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Logo generation failed: {str(e)}")
-
-@api_router.post("/generate-video", response_model=GenerationResponse)
-async def generate_video(request: VideoGenerationRequest):
-    """Generate AI-powered videos from text descriptions"""
-    try:
-        return await mock_video_generation(request)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Video generation failed: {str(e)}")
-
-@api_router.post("/generate-brand-kit", response_model=GenerationResponse)
-async def generate_brand_kit(request: BrandKitRequest):
-    """Generate complete brand identity package"""
-    try:
-        return await mock_brand_kit_generation(request)
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Brand kit generation failed: {str(e)}")
-
-@api_router.post("/generate-social-content", response_model=GenerationResponse)
-async def generate_social_content(request: SocialContentRequest):
-    """Generate platform-specific social media content"""
-    await asyncio.sleep(2)
-    
-    job_id = f"social_{str(uuid.uuid4())[:8]}"
-    mock_url = f"https://storage.googleapis.com/lotaya-assets/social/{job_id}.png"
+@observe_generation("social_content")
+async def mock_social_generation(request: SocialContentRequest, job_id: str) -> GenerationResponse:
+    """Mock social media content generation"""
+    await simulate_processing(job_id, 2)
     
-    job_data = {
-        "job_id": job_id,
-        "type": "social_content",
-        "request_data": request.dict(),
-        "status": "completed",
-        "asset_url": mock_url,
-        "created_at": datetime.utcnow()
-    }
-    await db.generation_jobs.insert_one(job_data)
+    asset_url = await store_asset(
+        placeholder_svg(request.topic, f"{request.platform} {request.contentType}", [], 1080, 1080), "image/svg+xml"
+    )
     
     return GenerationResponse(
         jobId=job_id,
         status="completed",
         message=f"{request.platform.title()} {request.contentType} generated successfully",
-        assetUrl=mock_url,
+        assetUrl=asset_url,
         metadata={
             "platform": request.platform,
             "content_type": request.contentType,
@@ -289,189 +603,125 @@ async def generate_social_content(request: SocialContentRequest):
         }
     )
 
-@api_router.post("/chat-assistant", response_model=ChatResponse)
-async def chat_assistant(request: ChatRequest):
-    """AI chat assistant for creative guidance"""
-    await asyncio.sleep(1)
-    
-    # Mock responses based on message content
-    if "logo" in request.message.lower():
-        response = "I'd love to help you create a stunning logo! What's your brand name and what industry are you in? Also, do you have any color preferences or style ideas?"
-        suggestions = ["Tell me about your brand personality", "What's your target audience?", "Do you have competitor logos you like?"]
-    elif "brand" in request.message.lower():
-        response = "Building a strong brand identity is exciting! Let's start with your brand's core values and mission. What makes your business unique?"
-        suggestions = ["Define your brand personality", "Identify your target market", "Choose your brand colors"]
-    elif "video" in request.message.lower():
-        response = "Video content is incredibly powerful for engagement! What type of video are you looking to create? Is it for marketing, education, or entertainment?"
-        suggestions = ["Describe your video concept", "What's your target duration?", "What style appeals to you?"]
-    else:
-        response = "I'm here to help with all your creative design needs! Whether it's logos, videos, social media content, or complete brand kits, I can guide you through the process. What would you like to create today?"
-        suggestions = ["Generate a logo", "Create video content", "Design social media posts", "Build a brand kit"]
-    
-    return ChatResponse(
-        response=response,
-        suggestions=suggestions
-    )
-
-@api_router.post("/generate-website", response_model=GenerationResponse)
-async def generate_website(request: WebsiteRequest):
-    """Generate website concept and layout"""
-    await asyncio.sleep(3)
-    
-    job_id = f"website_{str(uuid.uuid4())[:8]}"
-    mock_url = f"https://storage.googleapis.com/lotaya-assets/websites/{job_id}.html"
+@observe_generation("website")
+async def website_generation(request: WebsiteRequest, job_id: str) -> GenerationResponse:
+    """Render every page from the color scheme's templates and store the site as a zip"""
+    try:
+        site = await render_engine.render_site(
+            request.businessName, request.businessType, request.pages, request.colorScheme
+        )
+    except ValueError as e:
+        raise GenerationError(str(e)) from None
+    job_queue.report_progress(job_id, 0.75)
+    asset_url = await store_asset(site.archive, "application/zip")
     
     return GenerationResponse(
         jobId=job_id,
         status="completed",
         message=f"Website concept generated for {request.businessName}",
-        assetUrl=mock_url,
+        assetUrl=asset_url,
         metadata={
-            "pages": request.pages,
+            "pages": [page.slug for page in site.pages],
+            "files": [page.filename for page in site.pages],
             "business_type": request.businessType,
-            "color_scheme": request.colorScheme
+            "color_scheme": site.scheme
         }
     )
 
-@api_router.post("/generate-voice", response_model=GenerationResponse)
-async def generate_voice(request: VoiceRequest):
-    """Convert text to lifelike speech"""
-    await asyncio.sleep(2)
-    
-    job_id = f"voice_{str(uuid.uuid4())[:8]}"
-    mock_url = f"https://storage.googleapis.com/lotaya-assets/audio/{job_id}.mp3"
+async def voice_stream(request: VoiceRequest) -> AsyncIterator[bytes]:
+    """16-bit PCM frames, one per sentence, in order as they are rendered"""
+    async for pcm in speech_pipeline.stream(
+        split_sentences(request.text), request.voice, request.language, request.speed
+    ):
+        yield pcm
+
+@observe_generation("voice")
+async def voice_generation(request: VoiceRequest, job_id: str) -> GenerationResponse:
+    """Render every sentence on the speech worker pool and store the result as a WAV file"""
+    sentences = split_sentences(request.text)
+    if not sentences:
+        raise GenerationError("Text has nothing to speak")
+    frames: List[bytes] = []
+    async for pcm in speech_pipeline.stream(sentences, request.voice, request.language, request.speed):
+        frames.append(pcm)
+        if len(frames) < len(sentences):
+            job_queue.report_progress(job_id, len(frames) / len(sentences))
+    size = sum(len(frame) for frame in frames)
+    asset_url = await store_asset(wav_header(SAMPLE_RATE, size) + b"".join(frames), "audio/wav")
     
     return GenerationResponse(
         jobId=job_id,
         status="completed",
         message="High-quality voice audio generated",
-        assetUrl=mock_url,
+        assetUrl=asset_url,
         metadata={
             "voice": request.voice,
             "language": request.language,
-            "duration": len(request.text) * 0.1  # Rough estimate
+            "speed": resolve_speed(request.speed),
+            "duration": round(duration_seconds(size), 2),
+            "sentences": len(sentences),
+            "format": f"WAV, 16-bit PCM mono, {SAMPLE_RATE} Hz"
         }
     )
 
-@api_router.post("/edit-photo", response_model=GenerationResponse)
-async def edit_photo(request: PhotoEditRequest):
-    """AI-powered photo editing and enhancement"""
-    await asyncio.sleep(2)
-    
-    job_id = f"photo_{str(uuid.uuid4())[:8]}"
-    mock_url = f"https://storage.googleapis.com/lotaya-assets/photos/{job_id}.jpg"
+@observe_generation("photo_edit")
+async def photo_edit(request: PhotoEditRequest, job_id: str) -> GenerationResponse:
+    """Apply the requested edit on the image worker pool"""
+    source = await image_sources.load(request.imageUrl)
+    job_queue.report_progress(job_id, 0.25)
+    image = await image_pipeline.run(request.editType, source, request.intensity)
+    job_queue.report_progress(job_id, 0.75)
+    asset_url = await store_asset(image.data, image.content_type)
     
     return GenerationResponse(
         jobId=job_id,
         status="completed",
         message=f"Photo {request.editType} completed successfully",
-        assetUrl=mock_url,
+        assetUrl=asset_url,
         metadata={
             "edit_type": request.editType,
             "intensity": request.intensity,
-            "original_url": request.imageUrl
+            "original_url": request.imageUrl,
+            "width": image.width,
+            "height": image.height
         }
     )
 
-@api_router.post("/remove-background", response_model=GenerationResponse)
-async def remove_background(request: BackgroundRemovalRequest):
-    """Remove background from images with one click"""
-    await asyncio.sleep(1)
-    
-    job_id = f"bg_remove_{str(uuid.uuid4())[:8]}"
-    mock_url = f"https://storage.googleapis.com/lotaya-assets/backgrounds/{job_id}.png"
+@observe_generation("background_removal")
+async def background_removal(request: BackgroundRemovalRequest, job_id: str) -> GenerationResponse:
+    """Matte out the background on the image worker pool"""
+    source = await image_sources.load(request.imageUrl)
+    job_queue.report_progress(job_id, 0.25)
+    image = await image_pipeline.run("remove_background", source)
+    job_queue.report_progress(job_id, 0.75)
+    asset_url = await store_asset(image.data, image.content_type)
     
     return GenerationResponse(
         jobId=job_id,
         status="completed",
         message="Background removed successfully",
-        assetUrl=mock_url,
+        assetUrl=asset_url,
         metadata={
             "original_url": request.imageUrl,
-            "format": "PNG with transparency"
+            "format": "PNG with transparency",
+            "width": image.width,
+            "height": image.height
         }
     )
 
-@api_router.post("/generate-domain", response_model=DomainResponse)
-async def generate_domain(request: DomainRequest):
-    """Generate domain name suggestions"""
-    await asyncio.sleep(1)
-    
-    suggestions = []
-    base_combinations = [
-        "".join(request.keywords),
-        "".join(request.keywords[:2]),
-        request.keywords[0] + "hub",
-        request.keywords[0] + "pro",
-        "get" + request.keywords[0],
-        request.keywords[0] + "ly"
-    ]
-    
-    for combo in base_combinations[:6]:
-        for ext in request.extensions:
-            suggestions.append(DomainSuggestion(
-                domain=combo.lower() + ext,
-                available=random.choice([True, False]),
-                price=f"${random.randint(10, 50)}.99/year"
-            ))
-    
-    return DomainResponse(suggestions=suggestions[:10])
-
-@api_router.post("/generate-slogan", response_model=SloganResponse)
-async def generate_slogan(request: SloganRequest):
-    """Create catchy brand slogans and taglines"""
-    await asyncio.sleep(1)
-    
-    # Mock slogans based on industry and tone
-    industry_templates = {
-        "technology": [
-            f"Innovate with {request.brandName}",
-            f"The Future is {request.brandName}",
-            f"Powered by {request.brandName}",
-            f"Transform Tomorrow with {request.brandName}",
-            f"Where Innovation Meets Excellence"
-        ],
-        "creative": [
-            f"Unleash Creativity with {request.brandName}",
-            f"Design Beyond Limits",
-            f"Create. Inspire. {request.brandName}.",
-            f"Your Creative Partner",
-            f"Imagination Unleashed"
-        ],
-        "business": [
-            f"Excellence Delivered by {request.brandName}",
-            f"Your Success, Our Mission",
-            f"Building Better Business",
-            f"Solutions That Work",
-            f"Success Starts Here"
-        ]
-    }
-    
-    slogans = industry_templates.get(request.industry.lower(), [
-        f"Experience {request.brandName}",
-        f"Quality You Can Trust",
-        f"Making a Difference",
-        f"Your Partner in Success",
-        f"Excellence Every Time"
-    ])
-    
-    return SloganResponse(slogans=slogans)
-
-@api_router.post("/generate-business-card", response_model=GenerationResponse)
-async def generate_business_card(request: BusinessCardRequest):
-    """Design professional business cards"""
-    await asyncio.sleep(2)
-    
-    job_id = f"card_{str(uuid.uuid4())[:8]}"
-    mock_url = f"https://storage.googleapis.com/lotaya-assets/cards/{job_id}.pdf"
+@observe_generation("business_card")
+async def business_card_generation(request: BusinessCardRequest, job_id: str) -> GenerationResponse:
+    """Render the style's front and back templates into a print-ready PDF"""
+    card = render_engine.render_card(request.style, request.dict())
+    asset_url = await store_asset(card.pdf, "application/pdf")
     
     return GenerationResponse(
         jobId=job_id,
         status="completed",
         message=f"Professional business card designed for {request.name}",
-        assetUrl=mock_url,
+        assetUrl=asset_url,
         metadata={
-            "style": request.style,
+            "style": card.style,
             "includes": ["front_design", "back_design", "print_ready_pdf"],
             "contact_info": {
                 "name": request.name,
@@ -481,17 +731,937 @@ async def generate_business_card(request: BusinessCardRequest):
         }
     )
 
-# Include the router in the main app
-app.include_router(api_router)
+@observe_generation("chat")
+async def mock_chat_generation(request: ChatRequest) -> ChatResponse:
+    """Mock chat assistant reply"""
+    await asyncio.sleep(1)
+    
+    intent = chat_intents.match(request.message)
+    
+    return ChatResponse(
+        response=intent.response,
+        suggestions=list(intent.suggestions)
+    )
+
+async def mock_chat_stream(request: ChatRequest) -> AsyncIterator[Dict[str, Any]]:
+    """Mock chat reply handed out word by word, like a token-streaming provider"""
+    intent = chat_intents.match(request.message)
+    await asyncio.sleep(0.2)
+    
+    words = intent.response.split(" ")
+    for i, word in enumerate(words):
+        yield {"token": word if i == 0 else " " + word}
+        await asyncio.sleep(0.8 / len(words))
+    yield {"suggestions": list(intent.suggestions)}
+
+@observe_generation("domain")
+async def domain_suggestions(request: DomainRequest) -> DomainResponse:
+    """Domain name suggestions, best available names first"""
+    candidates = await domain_engine.suggest(request.keywords, request.extensions, limit=DOMAIN_SUGGESTION_LIMIT)
+    
+    return DomainResponse(suggestions=[
+        DomainSuggestion(
+            domain=candidate.domain,
+            available=candidate.available,
+            price=f"${candidate.price}.99/year"
+        )
+        for candidate in candidates
+    ])
 
-# CORS middleware
-app.add_middleware(
-    CORSMiddleware,
-    allow_credentials=True,
-    allow_origins=["*"],
-    allow_methods=["*"],
-    allow_headers=["*"],
+@observe_generation("slogan")
+async def slogan_generation(request: SloganRequest) -> SloganResponse:
+    """Slogans for the brand's industry and tone, sampled from the template index"""
+    slogans = slogan_index.generate(
+        request.brandName, request.industry, request.tone,
+        count=SLOGANS_PER_REQUEST, seed=request_key(request)
+    )
+    return SloganResponse(slogans=slogans)
+
+# Generation Backends: the functions above are the default implementation of every tool
+# (mocks where there is no local engine yet).
+# Concurrency caps sit above the job worker counts so batch requests, which call
+# backends directly, are bounded too.
+GENERATION_POLICIES = {
+    "logo": BackendPolicy(concurrency=16, timeout=30),
+    "video": BackendPolicy(concurrency=4, timeout=600),
+    "brand_kit": BackendPolicy(concurrency=4, timeout=120),
+    "social_content": BackendPolicy(concurrency=16, timeout=30),
+    "website": BackendPolicy(concurrency=8, timeout=60),
+    "voice": BackendPolicy(concurrency=8, timeout=60),
+    "photo_edit": BackendPolicy(concurrency=8, timeout=60),
+    "background_removal": BackendPolicy(concurrency=16, timeout=30),
+    "business_card": BackendPolicy(concurrency=16, timeout=30),
+    "chat": BackendPolicy(concurrency=32, timeout=15),
+    "domain": BackendPolicy(concurrency=32, timeout=15),
+    "slogan": BackendPolicy(concurrency=32, timeout=15),
+}
+generation_backends = BackendRegistry()
+for tool, mock in {
+    "logo": mock_logo_generation,
+    "video": video_generation,
+    "brand_kit": brand_kit_generation,
+    "social_content": mock_social_generation,
+    "website": website_generation,
+    "photo_edit": photo_edit,
+    "background_removal": background_removal,
+    "business_card": business_card_generation,
+    "domain": domain_suggestions,
+    "slogan": slogan_generation,
+}.items():
+    generation_backends.register(tool, FunctionBackend(mock), GENERATION_POLICIES[tool])
+generation_backends.register(
+    "chat", FunctionBackend(mock_chat_generation, mock_chat_stream), GENERATION_POLICIES["chat"]
 )
+generation_backends.register(
+    "voice", FunctionBackend(voice_generation, voice_stream), GENERATION_POLICIES["voice"]
+)
+# e.g. FAKE_GENERATION_BACKENDS="video=delay:5,fail:0.3" to rehearse a slow, flaky provider
+install_fakes(generation_backends, os.environ.get('FAKE_GENERATION_BACKENDS', ''))
+
+# Generation Job Queue
+async def enqueue_job(
+    job_type: str, prefix: str, request: BaseModel, runner, message: str, key: Optional[str] = None
+) -> Response:
+    """Queue a generation job and return its queued status immediately.
+
+    Identical requests arriving while a job for them is in flight are
+    coalesced onto that job and receive its jobId.
+    """
+    job_id = f"{prefix}_{str(uuid.uuid4())[:8]}"
+    dedupe_key = f"{job_type}:{key or request_key(request)}"
+    try:
+        job = await job_queue.submit(job_id, job_type, request, runner, dedupe_key=dedupe_key)
+    except QueueFullError:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Too many pending {job_type} jobs, please retry shortly",
+            headers={"Retry-After": str(JOB_RETRY_AFTER_SECONDS)}
+        )
+    return json_response(GenerationResponse(jobId=job["job_id"], status="queued", message=message), status_code=202)
+
+def job_to_response(job: Dict[str, Any]) -> GenerationResponse:
+    return GenerationResponse(
+        jobId=job["job_id"],
+        status=job["status"],
+        message=job.get("message") or f"Job is {job['status']}",
+        assetUrl=job.get("asset_url"),
+        metadata=job.get("metadata"),
+        progress=1.0 if job["status"] == "completed" else job.get("progress")
+    )
+
+JOB_PROJECTION = {"_id": 0, "request_data": 0}
+
+async def find_jobs(job_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Look up jobs by id, including records the batch writer has not flushed yet"""
+    found = {}
+    for job_id in job_ids:
+        job = job_queue.pending(job_id)
+        if job is not None:
+            # Same shape as a flushed record read through JOB_PROJECTION
+            found[job_id] = {field: value for field, value in job.items() if field not in JOB_PROJECTION}
+    missing = [job_id for job_id in job_ids if job_id not in found]
+    if missing:
+        jobs = await db.generation_jobs.find({"job_id": {"$in": missing}}, JOB_PROJECTION).to_list(len(missing))
+        found.update((job["job_id"], job) for job in jobs)
+    return found
+
+async def find_job(job_id: str) -> Optional[Dict[str, Any]]:
+    return (await find_jobs([job_id])).get(job_id)
+
+# Result Cache Helpers
+def cache_headers(namespace: str, key: str) -> Dict[str, str]:
+    return {"ETag": f'"{key}"', "Cache-Control": f"private, max-age={int(result_cache.ttl(namespace))}"}
+
+async def lookup_cached(namespace: str, request: BaseModel, http_request: Request):
+    """Return (key, cached) where cached is a response for the stored result, a 304 or None"""
+    key = request_key(request)
+    cached = await result_cache.get(namespace, key)
+    if cached is None:
+        return key, None
+    headers = cache_headers(namespace, key)
+    if http_request.headers.get("if-none-match") == headers["ETag"]:
+        return key, Response(status_code=304, headers=headers)
+    return key, json_response(cached, headers=headers)
+
+async def generate_cached(namespace: str, key: str, generate):
+    """Run one generation per key across concurrent callers and cache its result"""
+    async def run():
+        result = await generate()
+        await result_cache.set(namespace, key, result.dict())
+        return result
+    return await single_flight.do(f"{namespace}:{key}", run)
+
+def cache_result(namespace: str, key: str, runner):
+    """Wrap a job runner so its finished response is stored in the result cache"""
+    async def run(request, job_id: str) -> GenerationResponse:
+        result = await runner(request, job_id)
+        await result_cache.set(namespace, key, result.dict())
+        return result
+    return run
+
+# Health and Status Endpoints
+@api_router.get("/")
+async def root():
+    return {"message": "Lotaya AI API - All-in-One Generative AI Platform"}
+
+@api_router.get("/healthz")
+async def healthz():
+    """Liveness: the worker is up and serving requests"""
+    return {"status": "ok"}
+
+@api_router.get("/readyz")
+async def readyz(request: Request):
+    """Readiness: indexes are in place and MongoDB answers a ping"""
+    if not getattr(request.app.state, "ready", False):
+        raise HTTPException(status_code=503, detail="Warming up")
+    try:
+        await asyncio.wait_for(db.command("ping"), READINESS_TIMEOUT_SECONDS)
+    except Exception:
+        raise HTTPException(status_code=503, detail="MongoDB unavailable")
+    return {"status": "ready"}
+
+@api_router.post("/status", response_model=StatusCheck)
+async def create_status_check(input: StatusCheckCreate):
+    status_dict = input.dict()
+    status_obj = StatusCheck(**status_dict)
+    await db.status_checks.insert_one(status_obj.dict())
+    return json_response(status_obj)
+
+@api_router.get("/status", response_model=List[StatusCheck])
+async def get_status_checks():
+    # Documents are written from StatusCheck, so they are serialized as stored
+    status_checks = await db.status_checks.find({}, {"_id": 0}).to_list(1000)
+    return json_response(status_checks)
+
+# NDJSON Export
+def json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+async def stream_ndjson(cursor, batch_size: int):
+    """Serialize documents straight off the Motor cursor, one chunk per batch"""
+    lines = []
+    async for doc in cursor.batch_size(batch_size):
+        lines.append(json.dumps(doc, default=json_default, separators=(",", ":")))
+        if len(lines) >= batch_size:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+def ndjson_response(cursor, batch_size: int, filename: str) -> StreamingResponse:
+    return StreamingResponse(
+        stream_ndjson(cursor, batch_size),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@api_router.get("/status/export")
+async def export_status_checks(
+    batch_size: int = Query(DEFAULT_EXPORT_BATCH_SIZE, ge=1, le=MAX_EXPORT_BATCH_SIZE)
+):
+    """Stream every status check as NDJSON"""
+    cursor = db.status_checks.find({}, {"_id": 0})
+    return ndjson_response(cursor, batch_size, "status_checks.ndjson")
+
+@api_router.get("/jobs/export")
+async def export_jobs(
+    job_type: Optional[str] = Query(None, alias="type"),
+    status: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to export"),
+    batch_size: int = Query(DEFAULT_EXPORT_BATCH_SIZE, ge=1, le=MAX_EXPORT_BATCH_SIZE)
+):
+    """Stream generation jobs matching the history filters as NDJSON, newest first"""
+    field_list = [field for field in fields.split(",") if field] if fields else None
+    unknown = set(field_list or ()) - HISTORY_FIELDS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    projection = {**history_projection(field_list), "_id": 0}
+    query = history_query(job_type, status, created_after, created_before)
+    cursor = db.generation_jobs.find(query, projection).sort(HISTORY_SORT)
+    return ndjson_response(cursor, batch_size, "generation_jobs.ndjson")
+
+@api_router.get("/cache/stats")
+async def get_cache_stats():
+    """Result cache size, per-endpoint hit/miss counters and coalescing counts"""
+    return {
+        **result_cache.stats(),
+        "coalesced": {
+            "requests": single_flight.shared,
+            "jobs": job_queue.coalesced
+        },
+        "domain_availability": domain_resolver.stats(),
+        "assets": asset_store.stats(),
+        "fragments": render_engine.fragments.stats()
+    }
+
+@api_router.get("/stats/jobs")
+async def get_job_stats():
+    """Job queue depths, generation_jobs write batching and admission control counters"""
+    return {
+        "queue_depth": {job_type: job_queue.depth(job_type) for job_type in JOB_CONCURRENCY},
+        "writer": job_writer.stats(),
+        "admission": admission.stats()
+    }
+
+@api_router.get("/stats/backends")
+async def get_backend_stats():
+    """Per-tool generation backend concurrency, retry and timeout counters"""
+    return generation_backends.stats()
+
+# Job Status Endpoints
+@api_router.get("/jobs/{job_id}", response_model=GenerationResponse)
+async def get_job(job_id: str):
+    """Get the current status of a generation job"""
+    job = await find_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return json_response(job_to_response(job))
+
+# Job types whose runners checkpoint their work, by request model
+RESUMABLE_JOBS = {"video": VideoGenerationRequest, "brand_kit": BrandKitRequest}
+ACTIVE_JOB_STATUSES = ["queued", "processing"]
+
+def resumable_jobs(stale_before: datetime) -> Dict[str, Any]:
+    """Failed resumable jobs, and queued or processing ones nobody has touched since stale_before"""
+    return {"type": {"$in": list(RESUMABLE_JOBS)}, "$or": [
+        {"status": "failed"},
+        {"status": {"$in": ACTIVE_JOB_STATUSES}, "updated_at": {"$lt": stale_before}},
+    ]}
+
+async def requeue_job(job_id: str, stale_before: datetime, message: str) -> Optional[str]:
+    """Atomically claim a resumable job and hand it back to the workers; returns its type, or None if not resumable"""
+    job = await db.generation_jobs.find_one_and_update(
+        {"job_id": job_id, **resumable_jobs(stale_before)},
+        {"$set": {"status": "queued", "message": message, "updated_at": datetime.utcnow()}},
+        projection={"_id": 0, "type": 1, "request_data": 1}
+    )
+    if job is None:
+        return None
+    job_type = job["type"]
+    request = RESUMABLE_JOBS[job_type].parse_obj(job["request_data"])
+    try:
+        job_queue.requeue(job_id, job_type, request, generation_backends.runner(job_type))
+    except QueueFullError:
+        await db.generation_jobs.update_one(
+            {"job_id": job_id}, {"$set": {"status": "failed", "updated_at": datetime.utcnow()}}
+        )
+        raise
+    return job_type
+
+@api_router.post("/jobs/{job_id}/resume", response_model=GenerationResponse, status_code=202)
+async def resume_job(job_id: str):
+    """Re-queue a failed or stalled job under the same id; work it finished before stopping is kept"""
+    try:
+        job_type = await requeue_job(job_id, datetime.utcnow() - timedelta(seconds=JOB_STALE_SECONDS), "Job resumed")
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Too many pending jobs, please retry shortly ({e})",
+            headers={"Retry-After": str(JOB_RETRY_AFTER_SECONDS)}
+        )
+    if job_type is None:
+        current = await find_job(job_id)
+        if current is None:
+            raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+        if current["type"] not in RESUMABLE_JOBS:
+            raise HTTPException(status_code=400, detail=f"{current['type']} jobs cannot be resumed")
+        raise HTTPException(
+            status_code=409,
+            detail=f"Job {job_id} is {current['status']}; only failed jobs, or jobs stalled for "
+                   f"{int(JOB_STALE_SECONDS)}s, can be resumed"
+        )
+    return json_response(GenerationResponse(jobId=job_id, status="queued", message="Job resumed"), status_code=202)
+
+def to_job_record(job: Dict[str, Any], fields: Optional[List[str]]) -> JobRecord:
+    return JobRecord(**{
+        key: value for key, value in job.items()
+        if key in HISTORY_FIELDS and (not fields or key in fields or key == "job_id")
+    })
+
+@api_router.get("/jobs", response_model=JobPage, response_model_exclude_unset=True)
+async def get_jobs(
+    ids: Optional[str] = Query(None, description="Comma-separated job IDs to look up"),
+    job_type: Optional[str] = Query(None, alias="type"),
+    status: Optional[str] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    cursor: Optional[str] = Query(None, description="nextCursor from the previous page"),
+    limit: int = Query(DEFAULT_JOB_PAGE_SIZE, ge=1, le=MAX_JOB_PAGE_SIZE)
+):
+    """Look up jobs by id, or page through job history newest first"""
+    field_list = [field for field in fields.split(",") if field] if fields else None
+    unknown = set(field_list or ()) - HISTORY_FIELDS
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    if ids is not None:
+        job_ids = [job_id for job_id in ids.split(",") if job_id][:MAX_JOB_IDS_PER_QUERY]
+        by_id = await find_jobs(job_ids)
+        return json_response(JobPage(
+            jobs=[to_job_record(by_id[job_id], field_list) for job_id in job_ids if job_id in by_id],
+            nextCursor=None
+        ), exclude_unset=True)
+
+    try:
+        query = history_query(job_type, status, created_after, created_before, cursor)
+    except InvalidCursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Fetch one extra row to learn whether another page exists
+    cursor_query = db.generation_jobs.find(query, history_projection(field_list)).sort(HISTORY_SORT)
+    jobs = await cursor_query.limit(limit + 1).to_list(limit + 1)
+    next_cursor = encode_cursor(jobs[limit - 1]) if len(jobs) > limit else None
+    return json_response(JobPage(
+        jobs=[to_job_record(job, field_list) for job in jobs[:limit]],
+        nextCursor=next_cursor
+    ), exclude_unset=True)
+
+def format_sse(event: Dict[str, Any], name: Optional[str] = None) -> str:
+    data = f"data: {json.dumps(event, default=str)}\n\n"
+    return f"event: {name}\n{data}" if name else data
+
+@api_router.get("/jobs/{job_id}/events")
+async def stream_job_events(job_id: str):
+    """Stream a job's progress as Server-Sent Events until it finishes"""
+    # Subscribe before reading the snapshot so no transition can be missed
+    subscription = job_events.subscribe([job_id])
+    job = await find_job(job_id)
+    if job is None:
+        subscription.close()
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
+    async def event_stream():
+        with subscription:
+            event = job_to_response(job).dict()
+            yield format_sse(event)
+            while event["status"] not in TERMINAL_STATUSES:
+                try:
+                    event = await asyncio.wait_for(subscription.get(), SSE_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    latest = await find_job(job_id)
+                    if latest is None or latest["status"] == event["status"]:
+                        yield ": keep-alive\n\n"
+                        continue
+                    event = job_to_response(latest).dict()
+                yield format_sse(event)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.websocket("/ws/jobs")
+async def job_events_socket(websocket: WebSocket):
+    """Multiplexed job progress feed.
+
+    Clients send {"action": "subscribe" | "unsubscribe", "jobIds": [...]}
+    and receive the current state of each job followed by its progress events.
+    """
+    await websocket.accept()
+    subscription = job_events.subscribe()
+    last_status: Dict[str, str] = {}
+    finished: set = set()
+
+    async def receive_commands():
+        while True:
+            try:
+                command = json.loads(await websocket.receive_text())
+            except ValueError:
+                command = None
+            if not isinstance(command, dict) or not isinstance(command.get("jobIds", []), list):
+                # A malformed command is answered, not allowed to close every other subscription
+                subscription.push({"error": 'Commands look like {"action": "subscribe", "jobIds": [...]}'})
+                continue
+            job_ids = [str(job_id) for job_id in command.get("jobIds", [])][:MAX_JOB_IDS_PER_QUERY]
+            if command.get("action") == "unsubscribe":
+                subscription.remove(job_ids)
+                continue
+            # Subscribing again to a finished job gets its snapshot again
+            finished.difference_update(job_ids)
+            subscription.add(job_ids)
+            jobs = await find_jobs(job_ids)
+            for job in jobs.values():
+                subscription.push(job_to_response(job).dict())
+
+    async def poll_jobs():
+        # Catch up on jobs running in other worker processes
+        jobs = await find_jobs(list(subscription.job_ids))
+        for job_id, job in jobs.items():
+            if job["status"] != last_status.get(job_id):
+                subscription.push(job_to_response(job).dict())
+
+    async def send_events():
+        while True:
+            try:
+                event = await asyncio.wait_for(subscription.get(), SSE_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                await poll_jobs()
+                continue
+            if "jobId" not in event:
+                await websocket.send_json(event)
+                continue
+            if event["jobId"] in finished:
+                continue
+            last_status[event["jobId"]] = event["status"]
+            if event["status"] in TERMINAL_STATUSES:
+                finished.add(event["jobId"])
+                subscription.remove([event["jobId"]])
+            await websocket.send_json(event)
+
+    with subscription:
+        tasks = [asyncio.create_task(receive_commands()), asyncio.create_task(send_events())]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                exc = task.exception()
+                if exc is not None and not isinstance(exc, WebSocketDisconnect):
+                    logger.warning("Job event socket closed: %s", exc)
+        finally:
+            for task in tasks:
+                task.cancel()
+
+# Asset Endpoints
+@api_router.api_route("/assets/{digest}", methods=["GET", "HEAD"])
+async def get_asset(digest: str, request: Request):
+    """Serve a stored asset.
+
+    The content hash is the ETag and assets never change, so clients may
+    cache them forever and revalidate for free. Single byte ranges are
+    answered with 206; whole local files go out as a FileResponse, which
+    streams them in chunks from a worker thread.
+    """
+    asset = await asset_store.stat(digest) if is_digest(digest) else None
+    if asset is None:
+        raise HTTPException(status_code=404, detail=f"Asset {digest} not found")
+    headers = {
+        "ETag": f'"{digest}"', "Cache-Control": ASSET_CACHE_CONTROL, "Accept-Ranges": "bytes",
+        **ASSET_SECURITY_HEADERS
+    }
+    if asset.content_type not in INLINE_ASSET_TYPES:
+        extension = mimetypes.guess_extension(asset.content_type) or ""
+        headers["Content-Disposition"] = f'attachment; filename="{digest}{extension}"'
+    if request.headers.get("if-none-match") == headers["ETag"]:
+        return Response(status_code=304, headers=headers)
+    
+    try:
+        byte_range = parse_range(request.headers.get("range"), asset.size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{asset.size}"})
+    if request.headers.get("if-range", headers["ETag"]) != headers["ETag"]:
+        byte_range = None
+    
+    if byte_range is None:
+        path = asset_store.local_path(digest)
+        if path is not None:
+            return FileResponse(path, media_type=asset.content_type, headers=headers)
+        start, end, status_code = 0, asset.size - 1, 200
+    else:
+        start, end = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {start}-{end}/{asset.size}"
+    headers["Content-Length"] = str(end - start + 1)
+    if request.method == "HEAD":
+        return Response(status_code=status_code, headers=headers, media_type=asset.content_type)
+    return StreamingResponse(
+        asset_store.read(digest, start, end), status_code=status_code, headers=headers, media_type=asset.content_type
+    )
+
+# AI Generation Endpoints
+@api_router.post("/generate-logo", response_model=GenerationResponse, status_code=202)
+async def generate_logo(request: LogoGenerationRequest, http_request: Request):
+    """Generate professional logos tailored to business and industry"""
+    key, cached = await lookup_cached("logo", request, http_request)
+    if cached is not None:
+        return cached
+    return await enqueue_job(
+        "logo", "logo", request, cache_result("logo", key, generation_backends.runner("logo")),
+        f"Logo generation queued for {request.brandName}", key=key
+    )
+
+@api_router.post("/generate-video", response_model=GenerationResponse, status_code=202)
+async def generate_video(request: VideoGenerationRequest):
+    """Generate AI-powered videos from text descriptions"""
+    if request.resolution not in RESOLUTIONS:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown resolution: {request.resolution}. Choose one of: {', '.join(RESOLUTIONS)}"
+        )
+    if not MIN_VIDEO_SECONDS <= (request.durationSeconds or 0) <= MAX_VIDEO_SECONDS:
+        raise HTTPException(
+            status_code=400, detail=f"durationSeconds must be between {MIN_VIDEO_SECONDS} and {MAX_VIDEO_SECONDS}"
+        )
+    return await enqueue_job(
+        "video", "video", request, generation_backends.runner("video"),
+        f"Video generation queued ({request.durationSeconds}s)"
+    )
+
+@api_router.post("/generate-brand-kit", response_model=GenerationResponse, status_code=202)
+async def generate_brand_kit(request: BrandKitRequest):
+    """Generate complete brand identity package"""
+    return await enqueue_job(
+        "brand_kit", "brandkit", request, generation_backends.runner("brand_kit"),
+        f"Brand kit generation queued for {request.brandName}"
+    )
+
+@api_router.post("/generate-social-content", response_model=GenerationResponse, status_code=202)
+async def generate_social_content(request: SocialContentRequest):
+    """Generate platform-specific social media content"""
+    return await enqueue_job(
+        "social_content", "social", request, generation_backends.runner("social_content"),
+        f"{request.platform.title()} {request.contentType} generation queued"
+    )
+
+@api_router.post("/chat-assistant", response_model=ChatResponse)
+async def chat_assistant(request: ChatRequest, http_request: Request):
+    """AI chat assistant for creative guidance"""
+    key, cached = await lookup_cached("chat", request, http_request)
+    if cached is not None:
+        return cached
+    
+    result = await generate_cached("chat", key, lambda: generation_backends.generate("chat", request))
+    return json_response(result, headers=cache_headers("chat", key))
+
+async def chat_chunks(request: ChatRequest) -> AsyncIterator[Dict[str, Any]]:
+    """The chat backend's chunks, or its whole reply as one chunk if it cannot stream"""
+    backend = generation_backends.get("chat")
+    if backend.streams:
+        async for chunk in backend.stream(request):
+            yield chunk
+        return
+    result = await backend.generate(request)
+    yield {"token": result.response}
+    yield {"suggestions": result.suggestions}
+
+@api_router.post("/chat-assistant/stream")
+async def chat_assistant_stream(request: ChatRequest):
+    """Stream the assistant's reply as Server-Sent Events.
+
+    Emits "token" events ({"text": ...}) as the reply is produced, then one
+    "suggestions" event and a final "done"; a failed generation ends the
+    stream with an "error" event instead. Finished replies share the
+    non-streaming endpoint's result cache.
+    """
+    key = request_key(request)
+    cached = await result_cache.get("chat", key)
+
+    async def event_stream():
+        if cached is not None:
+            yield format_sse({"text": cached["response"]}, "token")
+            yield format_sse({"suggestions": cached["suggestions"]}, "suggestions")
+            yield format_sse({}, "done")
+            return
+        
+        tokens: List[str] = []
+        suggestions: List[str] = []
+        try:
+            async for chunk in chat_chunks(request):
+                if "token" in chunk:
+                    tokens.append(chunk["token"])
+                    yield format_sse({"text": chunk["token"]}, "token")
+                if "suggestions" in chunk:
+                    suggestions = list(chunk["suggestions"])
+                    yield format_sse({"suggestions": suggestions}, "suggestions")
+        except GenerationError as e:
+            logger.warning("Chat stream failed: %s", e)
+            yield format_sse({"detail": str(e)}, "error")
+            return
+        await result_cache.set("chat", key, ChatResponse(response="".join(tokens), suggestions=suggestions).dict())
+        yield format_sse({}, "done")
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.post("/generate-website", response_model=GenerationResponse, status_code=202)
+async def generate_website(request: WebsiteRequest):
+    """Generate website concept and layout"""
+    if len(site_pages(request.pages)) > MAX_SITE_PAGES:
+        raise HTTPException(status_code=400, detail=f"A site can have at most {MAX_SITE_PAGES} pages")
+    return await enqueue_job(
+        "website", "website", request, generation_backends.runner("website"),
+        f"Website concept queued for {request.businessName}"
+    )
+
+def check_voice_text(request: VoiceRequest) -> None:
+    if not split_sentences(request.text):
+        raise HTTPException(status_code=400, detail="Text has nothing to speak")
+    if len(request.text) > VOICE_MAX_CHARS:
+        raise HTTPException(status_code=413, detail=f"Text is longer than {VOICE_MAX_CHARS} characters")
+
+@api_router.post("/generate-voice", response_model=GenerationResponse, status_code=202)
+async def generate_voice(request: VoiceRequest):
+    """Convert text to lifelike speech"""
+    check_voice_text(request)
+    return await enqueue_job(
+        "voice", "voice", request, generation_backends.runner("voice"),
+        "Voice generation queued"
+    )
+
+async def store_upload(image: UploadFile) -> str:
+    """Store an uploaded raster image and return its URL.
+
+    The format comes from the bytes, not the client's content type, so
+    SVG and other scriptable files are refused whatever they claim to be.
+    """
+    data = bytearray()
+    while chunk := await image.read(64 * 1024):
+        data += chunk
+        if len(data) > IMAGE_MAX_BYTES:
+            raise HTTPException(status_code=413, detail=f"Image is larger than {IMAGE_MAX_BYTES} bytes")
+    content_type = await asyncio.to_thread(raster_type, bytes(data))
+    if content_type is None:
+        raise HTTPException(
+            status_code=415, detail=f"Upload must be a raster image ({', '.join(sorted(RASTER_TYPES))})"
+        )
+    return await store_asset(bytes(data), content_type)
+
+@api_router.post("/generate-voice/stream")
+async def generate_voice_stream(request: VoiceRequest):
+    """Speak the text as a WAV stream.
+
+    Sentences are rendered in parallel and sent in order as each one
+    finishes, so audio starts after the first sentence however long the
+    text is. The WAV header carries no length; players read to the end.
+    """
+    check_voice_text(request)
+    backend = generation_backends.get("voice")
+    if not backend.streams:
+        raise HTTPException(status_code=503, detail="Voice backend cannot stream")
+
+    async def audio():
+        yield wav_header(SAMPLE_RATE)
+        try:
+            async for pcm in backend.stream(request):
+                yield pcm
+        except GenerationError as e:
+            # Headers are already sent: the stream just ends early
+            logger.warning("Voice stream failed: %s", e)
+
+    return StreamingResponse(
+        audio(), media_type="audio/wav", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@api_router.post("/edit-photo", response_model=GenerationResponse, status_code=202)
+async def edit_photo(request: PhotoEditRequest):
+    """AI-powered photo editing and enhancement"""
+    if request.editType not in PHOTO_EDIT_TYPES:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown editType {request.editType!r}, expected one of {', '.join(PHOTO_EDIT_TYPES)}"
+        )
+    return await enqueue_job(
+        "photo_edit", "photo", request, generation_backends.runner("photo_edit"),
+        f"Photo {request.editType} queued"
+    )
+
+@api_router.post("/edit-photo/upload", response_model=GenerationResponse, status_code=202)
+async def edit_uploaded_photo(
+    image: UploadFile = File(...), editType: str = Form(...), intensity: float = Form(0.8)
+):
+    """Photo editing for an image uploaded as multipart/form-data"""
+    if editType not in PHOTO_EDIT_TYPES:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown editType {editType!r}, expected one of {', '.join(PHOTO_EDIT_TYPES)}"
+        )
+    request = PhotoEditRequest(imageUrl=await store_upload(image), editType=editType, intensity=intensity)
+    return await edit_photo(request)
+
+@api_router.post("/remove-background", response_model=GenerationResponse, status_code=202)
+async def remove_background(request: BackgroundRemovalRequest):
+    """Remove background from images with one click"""
+    return await enqueue_job(
+        "background_removal", "bg_remove", request, generation_backends.runner("background_removal"),
+        "Background removal queued"
+    )
+
+@api_router.post("/remove-background/upload", response_model=GenerationResponse, status_code=202)
+async def remove_uploaded_background(image: UploadFile = File(...)):
+    """Background removal for an image uploaded as multipart/form-data"""
+    return await remove_background(BackgroundRemovalRequest(imageUrl=await store_upload(image)))
+
+@api_router.post("/generate-domain", response_model=DomainResponse)
+async def generate_domain(request: DomainRequest, http_request: Request):
+    """Generate domain name suggestions"""
+    key, cached = await lookup_cached("domain", request, http_request)
+    if cached is not None:
+        return cached
+    
+    result = await generate_cached("domain", key, lambda: generation_backends.generate("domain", request))
+    return json_response(result, headers=cache_headers("domain", key))
+
+@api_router.post("/generate-slogan", response_model=SloganResponse)
+async def generate_slogan(request: SloganRequest, http_request: Request):
+    """Create catchy brand slogans and taglines"""
+    key, cached = await lookup_cached("slogan", request, http_request)
+    if cached is not None:
+        return cached
+    
+    result = await generate_cached("slogan", key, lambda: generation_backends.generate("slogan", request))
+    return json_response(result, headers=cache_headers("slogan", key))
+
+@api_router.post("/generate-business-card", response_model=GenerationResponse, status_code=202)
+async def generate_business_card(request: BusinessCardRequest):
+    """Design professional business cards"""
+    return await enqueue_job(
+        "business_card", "card", request, generation_backends.runner("business_card"),
+        f"Business card design queued for {request.name}"
+    )
+
+# Batch Generation
+def completed_job_record(job_type: str, request: BaseModel, result: GenerationResponse, **links: str) -> Dict[str, Any]:
+    now = datetime.utcnow()
+    return {
+        "job_id": result.jobId,
+        "type": job_type,
+        "request_data": request.dict(),
+        "status": "completed",
+        "message": result.message,
+        "asset_url": result.assetUrl,
+        "metadata": result.metadata,
+        **links,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+def batch_job_item(job_type: str, prefix: str, runner, namespace: Optional[str] = None):
+    """Batch item runner for a job-producing tool: returns (result, job record)"""
+    async def run(request: BaseModel, batch_id: str):
+        key = request_key(request)
+        if namespace is not None:
+            cached = await result_cache.get(namespace, key)
+            if cached is not None:
+                return cached, None
+        job_id = f"{prefix}_{str(uuid.uuid4())[:8]}"
+        result = await runner(request, job_id)
+        if namespace is not None:
+            await result_cache.set(namespace, key, result.dict())
+        return result.dict(), completed_job_record(job_type, request, result, batch_id=batch_id)
+    return run
+
+def batch_cached_item(namespace: str, generate):
+    """Batch item runner for a cached synchronous tool"""
+    async def run(request: BaseModel, batch_id: str):
+        key = request_key(request)
+        cached = await result_cache.get(namespace, key)
+        if cached is None:
+            cached = (await generate_cached(namespace, key, lambda: generate(request))).dict()
+        return cached, None
+    return run
+
+BATCH_TOOLS = {
+    "logo": (LogoGenerationRequest, batch_job_item("logo", "logo", generation_backends.runner("logo"), namespace="logo")),
+    "slogan": (SloganRequest, batch_cached_item("slogan", generation_backends.runner("slogan"))),
+    "domain": (DomainRequest, batch_cached_item("domain", generation_backends.runner("domain"))),
+    "business-card": (BusinessCardRequest, batch_job_item("business_card", "card", generation_backends.runner("business_card"))),
+}
+
+async def stream_batch(model, runner, items: List[Any], concurrency: int, batch_id: str):
+    """Run batch items concurrently and yield one NDJSON line per item as it finishes"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_item(index: int, item: Any):
+        try:
+            request = model.parse_obj(item)
+        except ValidationError as e:
+            return index, None, None, e.errors(include_url=False)
+        try:
+            async with semaphore:
+                result, job = await runner(request, batch_id)
+        except Exception as e:
+            logger.exception("Batch item %d failed", index)
+            return index, None, None, str(e)
+        return index, result, job, None
+
+    tasks = [asyncio.create_task(run_item(index, item)) for index, item in enumerate(items)]
+    jobs = []
+    failed = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            index, result, job, error = await next_done
+            if error is not None:
+                failed += 1
+                line = {"index": index, "status": "failed", "error": error}
+            else:
+                line = {"index": index, "status": "completed", "result": result}
+                if job is not None:
+                    jobs.append(job)
+            yield json.dumps(line, default=json_default) + "\n"
+    finally:
+        for task in tasks:
+            task.cancel()
+        # One bulk write for every job the batch produced, even if the client left early
+        if jobs:
+            await db.generation_jobs.insert_many(jobs, ordered=False)
+
+    summary = {"batchId": batch_id, "total": len(items), "succeeded": len(items) - failed, "failed": failed}
+    yield json.dumps({"summary": summary}) + "\n"
+
+@api_router.post("/batch/{tool}")
+async def batch_generate(
+    tool: str,
+    items: List[Any] = Body(..., description="List of request bodies for the tool"),
+    concurrency: int = Query(BATCH_CONCURRENCY, ge=1, le=BATCH_CONCURRENCY)
+):
+    """Generate assets for many brands at once, streaming NDJSON results as items finish"""
+    if tool not in BATCH_TOOLS:
+        raise HTTPException(status_code=404, detail=f"Unknown batch tool: {tool}")
+    if len(items) > MAX_BATCH_ITEMS:
+        raise HTTPException(status_code=413, detail=f"Batch exceeds {MAX_BATCH_ITEMS} items")
+
+    model, runner = BATCH_TOOLS[tool]
+    batch_id = f"batch_{str(uuid.uuid4())[:8]}"
+    return StreamingResponse(
+        stream_batch(model, runner, items, concurrency, batch_id),
+        media_type="application/x-ndjson",
+        headers={"X-Batch-Id": batch_id}
+    )
+
+def collect_runtime_metrics():
+    depth = GaugeMetricFamily("job_queue_depth", "Jobs waiting per job type", labels=["job_type"])
+    for job_type in JOB_CONCURRENCY:
+        depth.add_metric([job_type], job_queue.depth(job_type))
+    yield depth
+    yield GaugeMetricFamily("batch_writer_buffered", "Job records waiting to be flushed", value=job_writer.stats()["buffered"])
+
+    cache = CounterMetricFamily("result_cache_requests", "Result cache lookups", labels=["namespace", "result"])
+    for namespace, counts in result_cache.stats()["namespaces"].items():
+        cache.add_metric([namespace, "hit"], counts["hits"])
+        cache.add_metric([namespace, "miss"], counts["misses"])
+    yield cache
+    yield GaugeMetricFamily("result_cache_entries", "Entries in the in-memory result cache", value=len(result_cache.memory))
+
+    backends = generation_backends.stats()
+    in_flight = GaugeMetricFamily("generation_backend_in_flight", "Generation calls holding a backend slot", labels=["tool"])
+    retries = CounterMetricFamily("generation_backend_retries", "Generation attempts retried", labels=["tool"])
+    timeouts = CounterMetricFamily("generation_backend_timeouts", "Generation attempts past their deadline", labels=["tool"])
+    for tool, stats in backends.items():
+        in_flight.add_metric([tool], stats["in_flight"])
+        retries.add_metric([tool], stats["retries"])
+        timeouts.add_metric([tool], stats["timeouts"])
+    yield in_flight
+    yield retries
+    yield timeouts
+
+    rejected = CounterMetricFamily("admission_rejected_requests", "Requests turned away by admission control", labels=["reason"])
+    for reason, count in admission.rejected.items():
+        rejected.add_metric([reason], count)
+    yield rejected
+
+register_callback(collect_runtime_metrics)
+
+async def metrics():
+    return Response(metrics_payload(), media_type=CONTENT_TYPE_LATEST)
+
+async def generation_error_handler(request: Request, exc: GenerationError):
+    status_code = 504 if isinstance(exc, GenerationTimeoutError) else 502
+    return ORJSONResponse(status_code=status_code, content={"detail": str(exc)})
 
 # Configure logging
 logging.basicConfig(
@@ -500,10 +1670,154 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
+def bind_database(database) -> None:
+    """Point every collection user at database"""
+    global db
+    db = database
+    job_queue.collection = database.generation_jobs
+    job_writer.collection = database.generation_jobs
+    if result_cache.second_tier is not None:
+        result_cache.second_tier.collection = database.result_cache
+    if isinstance(admission.store, MongoBucketStore):
+        admission.store.collection = database.rate_limits
+
+def connect_database() -> AsyncIOMotorClient:
+    """Create the Motor client; connections are opened on first use"""
+    mongo_client = AsyncIOMotorClient(
+        os.environ['MONGO_URL'],
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        minPoolSize=MONGO_MIN_POOL_SIZE,
+        event_listeners=[MongoCommandMetrics()]
+    )
+    bind_database(mongo_client[os.environ['DB_NAME']])
+    return mongo_client
+
+async def warm_database() -> None:
+    """Create indexes while concurrent pings fill the connection pool"""
+    tasks = [db.generation_jobs.create_indexes(JOB_INDEXES)]
+    if result_cache.second_tier is not None:
+        tasks.append(result_cache.second_tier.ensure_indexes())
+    if isinstance(admission.store, MongoBucketStore):
+        tasks.append(admission.store.ensure_indexes())
+    tasks.extend(db.command("ping") for _ in range(max(1, MONGO_MIN_POOL_SIZE)))
+    await asyncio.gather(*tasks)
+
+async def recover_jobs(stale_before: datetime) -> None:
+    """Settle jobs left queued or processing by a server process that is gone.
+
+    Resumable jobs go back on the queue under their id and keep the work
+    they finished; the rest are marked failed so clients stop waiting.
+    """
+    stalled = {"status": {"$in": ACTIVE_JOB_STATUSES}, "updated_at": {"$lt": stale_before}}
+    failed = await db.generation_jobs.update_many(
+        {**stalled, "type": {"$nin": list(RESUMABLE_JOBS)}},
+        {"$set": {"status": "failed", "message": "Interrupted by a server restart", "updated_at": datetime.utcnow()}}
+    )
+    resumed = 0
+    async for job in db.generation_jobs.find({**stalled, "type": {"$in": list(RESUMABLE_JOBS)}}, {"_id": 0, "job_id": 1}):
+        try:
+            if await requeue_job(job["job_id"], stale_before, "Job resumed after a server restart"):
+                resumed += 1
+        except QueueFullError as e:
+            logger.warning("Could not resume job %s after restart: %s", job["job_id"], e)
+    if resumed or failed.modified_count:
+        logger.info("Recovered interrupted jobs: %d resumed, %d marked failed", resumed, failed.modified_count)
+
+def recovery_cutoff(started_at: datetime) -> datetime:
+    """Jobs untouched since this belong to no live process.
+
+    A single worker owns every job, so anything older than its start is
+    orphaned; with several, a sibling may still be running older jobs.
+    """
+    if int(os.environ.get('WEB_CONCURRENCY', 1)) <= 1:
+        return started_at
+    return started_at - timedelta(seconds=JOB_STALE_SECONDS)
+
+async def mark_ready(app: FastAPI, stale_before: datetime) -> None:
+    delay = 0.5
+    while True:
+        try:
+            await warm_database()
+            await recover_jobs(stale_before)
+        except Exception as e:
+            logger.warning("MongoDB not ready (%s), retrying in %.1fs", e, delay)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 10)
+        else:
+            app.state.ready = True
+            return
+
+def create_app(database=None) -> FastAPI:
+    """Build the API app.
+
+    The Motor client is created when the app starts, not at import time;
+    pass database to run against an existing one (benchmarks, tests).
+    Requests are served while the pool warms up, but /api/readyz answers
+    503 until it has and jobs interrupted by a previous run are recovered.
+    """
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        global client
+        if database is None:
+            client = connect_database()
+        else:
+            bind_database(database)
+        app.state.ready = False
+        started_at = datetime.utcnow()
+        await asset_store.open()
+        await job_writer.start()
+        await job_queue.start()
+        warm_up = asyncio.create_task(mark_ready(app, recovery_cutoff(started_at)))
+        try:
+            yield
+        finally:
+            app.state.ready = False
+            warm_up.cancel()
+            await asyncio.gather(warm_up, return_exceptions=True)
+            await job_queue.drain(JOB_DRAIN_TIMEOUT_SECONDS)
+            await job_queue.stop()
+            await job_writer.close()
+            await asyncio.to_thread(image_pipeline.shutdown)
+            await asyncio.to_thread(speech_pipeline.shutdown)
+            await asyncio.to_thread(video_pipeline.shutdown)
+            if database is None:
+                client.close()
+                client = None
+            mark_worker_dead()
+
+    app = FastAPI(
+        title="Lotaya AI API",
+        description="All-in-One Generative AI Platform API",
+        version="1.0.0",
+        default_response_class=ORJSONResponse,
+        lifespan=lifespan
+    )
+    app.include_router(api_router)
+
+    # Admission control, inside CORS so browsers can read 429/503 responses
+    if RATE_LIMITS_ENABLED:
+        app.add_middleware(AdmissionMiddleware, controller=admission)
+
+    # CORS middleware
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=["*"],
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    # Negotiated gzip/brotli for responses above COMPRESSION_MIN_BYTES
+    app.add_middleware(CompressionMiddleware, minimum_size=COMPRESSION_MIN_BYTES)
+
+    # Request metrics, outermost so they cover the whole request
+    app.add_middleware(PrometheusMiddleware)
+    app.add_api_route("/metrics", metrics, include_in_schema=False)
+    app.add_exception_handler(GenerationError, generation_error_handler)
+    return app
+
+app = create_app()
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    from serve import main
+    main()
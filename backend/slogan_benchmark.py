@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for slogan generation.
+
+Grows a synthetic template corpus from a handful to thousands of
+templates per industry and times SloganIndex.generate (ranked and
+sampled) against the old approach of formatting every template of every
+industry on each request. The index's cost per request should stay flat.
+
+    python slogan_benchmark.py --sizes 5,50,500,5000 --iterations 2000
+"""
+
+import argparse
+import json
+import random
+import sys
+import time
+from typing import Callable, Dict, List
+
+from slogans import SloganIndex
+
+INDUSTRIES = ["technology", "creative", "business", "general"]
+TONES = ["inspiring", "professional", "playful", "bold"]
+WORDS = ["Future", "Bold", "Simple", "Smart", "Better", "Bright", "Trusted", "Open", "Fresh", "True"]
+
+
+def synthetic_corpus(per_industry: int, seed: int) -> Dict[str, List[dict]]:
+    rng = random.Random(seed)
+    return {
+        industry: [
+            {
+                "text": f"{rng.choice(WORDS)} {rng.choice(WORDS)} with {{brand}}" if i % 2 else f"{rng.choice(WORDS)} by {{brand}}",
+                "tones": rng.sample(TONES, rng.randint(0, 2)),
+                "weight": round(rng.uniform(0.1, 1.0), 2),
+            }
+            for i in range(per_industry)
+        ]
+        for industry in INDUSTRIES
+    }
+
+
+def format_everything(corpus: Dict[str, List[dict]]) -> Callable[[str, str], List[str]]:
+    """The old approach: build every industry's formatted list, then pick one"""
+    def generate(brand: str, industry: str) -> List[str]:
+        templates = {name: [entry["text"].format(brand=brand) for entry in entries] for name, entries in corpus.items()}
+        return templates.get(industry, templates["general"])[:5]
+    return generate
+
+
+def time_per_call(fn: Callable[[int], object], iterations: int) -> float:
+    started = time.perf_counter()
+    for i in range(iterations):
+        fn(i)
+    return (time.perf_counter() - started) / iterations
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark slogan generation as the template corpus grows")
+    parser.add_argument("--sizes", default="5,50,500,5000", help="Comma-separated templates per industry")
+    parser.add_argument("--iterations", type=int, default=1000, help="Requests per size")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="Write results JSON here")
+    args = parser.parse_args()
+
+    results = {}
+    for size in (int(size) for size in args.sizes.split(",")):
+        corpus = synthetic_corpus(size, args.seed)
+        started = time.perf_counter()
+        index = SloganIndex.from_dict({"default_industry": "general", "industries": corpus})
+        build_ms = (time.perf_counter() - started) * 1000
+        old = format_everything(corpus)
+        expected = [entry["text"].format(brand="Acme") for entry in sorted(corpus["technology"], key=lambda entry: -entry["weight"])[:5]]
+        if index.generate("Acme", "technology") != expected:
+            sys.exit("Index ranking disagrees with the corpus weights")
+
+        ranked_us = time_per_call(lambda i: index.generate(f"Brand{i}", INDUSTRIES[i % 4], TONES[i % 4]), args.iterations) * 1e6
+        sampled_us = time_per_call(
+            lambda i: index.generate(f"Brand{i}", INDUSTRIES[i % 4], TONES[i % 4], seed=str(i)), args.iterations
+        ) * 1e6
+        old_us = time_per_call(lambda i: old(f"Brand{i}", INDUSTRIES[i % 4]), max(1, args.iterations // 10)) * 1e6
+        results[size] = {
+            "ranked_us": round(ranked_us, 2),
+            "sampled_us": round(sampled_us, 2),
+            "format_all_us": round(old_us, 2),
+            "build_ms": round(build_ms, 2),
+        }
+        print(f"🔍 {size:>6} templates/industry: ranked {ranked_us:7.2f}µs | sampled {sampled_us:7.2f}µs | "
+              f"format-all {old_us:10.2f}µs | build {build_ms:.1f}ms")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+"""Slogan templates, parsed once and indexed by industry and tone"""
+import json
+import random
+from bisect import bisect_right
+from itertools import accumulate
+from pathlib import Path
+from string import Formatter
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+FIELDS = {"brand", "industry"}
+
+
+class Template:
+    """A template split into (literal, field) pairs so rendering is a join, not a parse"""
+
+    __slots__ = ("text", "weight", "tones", "parts")
+
+    def __init__(self, text: str, weight: float = 1.0, tones: Iterable[str] = ()):
+        self.text = text
+        self.weight = weight
+        self.tones = tuple(tone.lower() for tone in tones)
+        self.parts: Tuple[Tuple[str, Optional[str]], ...] = tuple(
+            (literal, field) for literal, field, _, _ in Formatter().parse(text)
+        )
+        unknown = {field for _, field in self.parts if field is not None} - FIELDS
+        if unknown:
+            raise ValueError(f"Unknown slogan template field(s) {sorted(unknown)} in {text!r}")
+
+    def render(self, values: Mapping[str, str]) -> str:
+        return "".join(literal + values[field] if field is not None else literal for literal, field in self.parts)
+
+
+class TemplateSet:
+    """Templates for one industry and tone, heaviest first, with cumulative weights for sampling"""
+
+    def __init__(self, templates: Sequence[Template]):
+        self.templates = sorted(templates, key=lambda template: -template.weight)
+        self._cumulative = list(accumulate(template.weight for template in self.templates))
+
+    def __len__(self) -> int:
+        return len(self.templates)
+
+    def rank(self, count: int) -> List[Template]:
+        return self.templates[:count]
+
+    def sample(self, count: int, rng: random.Random) -> List[Template]:
+        """Weighted sample without replacement; each draw is a binary search, whatever the corpus size"""
+        if count >= len(self.templates):
+            return list(self.templates)
+        total = self._cumulative[-1]
+        picked: Dict[int, None] = {}
+        for _ in range(count * 4):
+            picked[bisect_right(self._cumulative, rng.random() * total)] = None
+            if len(picked) == count:
+                break
+        # Repeated draws on a heavily skewed corpus: top up with the best unpicked templates
+        for index in range(len(self.templates)):
+            if len(picked) == count:
+                break
+            picked.setdefault(index, None)
+        return [self.templates[index] for index in sorted(picked)]
+
+
+class SloganIndex:
+    """Maps (industry, tone) to its templates.
+
+    Every industry has an entry for each tone it mentions plus one with
+    all of its templates; untagged templates suit every tone. Unknown
+    industries use the default industry, unknown tones the industry's
+    full set.
+    """
+
+    def __init__(self, industries: Mapping[str, Sequence[Template]], default_industry: str,
+                 aliases: Optional[Mapping[str, str]] = None):
+        if default_industry not in industries:
+            raise ValueError(f"Default industry {default_industry!r} has no templates")
+        self.default_industry = default_industry
+        self.aliases = {alias.lower(): industry.lower() for alias, industry in (aliases or {}).items()}
+        self._sets: Dict[Tuple[str, Optional[str]], TemplateSet] = {}
+        for industry, templates in industries.items():
+            industry = industry.lower()
+            self._sets[(industry, None)] = TemplateSet(templates)
+            for tone in {tone for template in templates for tone in template.tones}:
+                self._sets[(industry, tone)] = TemplateSet(
+                    [template for template in templates if not template.tones or tone in template.tones]
+                )
+
+    def lookup(self, industry: str, tone: Optional[str] = None) -> Tuple[str, TemplateSet]:
+        industry = industry.strip().lower()
+        industry = self.aliases.get(industry, industry)
+        if (industry, None) not in self._sets:
+            industry = self.default_industry
+        tone = tone.strip().lower() if tone else None
+        return industry, self._sets.get((industry, tone)) or self._sets[(industry, None)]
+
+    def generate(self, brand: str, industry: str, tone: Optional[str] = None, count: int = 5,
+                 seed: Optional[str] = None) -> List[str]:
+        """The count best slogans, or a weighted sample of them when a seed is given"""
+        resolved, templates = self.lookup(industry, tone)
+        chosen = templates.rank(count) if seed is None else templates.sample(count, random.Random(seed))
+        if len(chosen) < count:
+            # A thin tone: fill up with the industry's other templates
+            chosen += [template for template in self._sets[(resolved, None)].rank(count * 2)
+                       if template not in chosen][:count - len(chosen)]
+        values = {"brand": brand, "industry": resolved}
+        return [template.render(values) for template in chosen]
+
+    def __len__(self) -> int:
+        return sum(len(templates) for (_, tone), templates in self._sets.items() if tone is None)
+
+    @classmethod
+    def from_dict(cls, table: dict) -> "SloganIndex":
+        industries = {
+            industry: [
+                Template(entry["text"], weight=entry.get("weight", 1.0), tones=entry.get("tones", ()))
+                for entry in entries
+            ]
+            for industry, entries in table["industries"].items()
+        }
+        return cls(industries, table["default_industry"], table.get("aliases"))
+
+    @classmethod
+    def from_file(cls, path: Path) -> "SloganIndex":
+        with open(path, encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
@@ -0,0 +1,275 @@
+"""Offline text-to-speech: sentence chunking, a small formant synthesizer and a worker process pool.
+
+The synthesizer is a reference engine, not a neural voice: vowels are
+harmonics of a gliding pitch shaped by formant envelopes, consonants are
+shaped noise bursts and pauses. Its job is to make the pipeline around
+it real, so sentences can be rendered in parallel and streamed as soon
+as the first one is ready.
+"""
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import re
+import struct
+import unicodedata
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import AsyncIterator, Deque, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+SAMPLE_WIDTH = 2  # 16-bit PCM, mono
+MAX_CHUNK_CHARS = 200
+
+# Sentence ends, including the CJK full stop, exclamation and question marks
+SENTENCE_BREAK = re.compile(r"(?<=[.!?。！？])\s+|(?<=[。！？])|\n+")
+
+
+@dataclass(frozen=True)
+class VoiceProfile:
+    pitch: float          # base f0 in Hz
+    formant_scale: float  # shorter vocal tracts have higher formants
+
+
+@dataclass(frozen=True)
+class LanguageProfile:
+    rate: float           # relative speaking rate
+    pitch_range: float    # how far the pitch falls across a sentence, as a fraction of f0
+    syllabic: bool = False  # each letter is a syllable (kana, kanji) rather than a phone
+
+
+VOICES: Dict[str, VoiceProfile] = {
+    "female": VoiceProfile(pitch=210.0, formant_scale=1.15),
+    "male": VoiceProfile(pitch=115.0, formant_scale=0.95),
+    "neutral": VoiceProfile(pitch=160.0, formant_scale=1.05),
+}
+LANGUAGES: Dict[str, LanguageProfile] = {
+    "en": LanguageProfile(rate=1.0, pitch_range=0.25),
+    "es": LanguageProfile(rate=1.15, pitch_range=0.2),
+    "fr": LanguageProfile(rate=1.1, pitch_range=0.2),
+    "de": LanguageProfile(rate=0.95, pitch_range=0.25),
+    "it": LanguageProfile(rate=1.1, pitch_range=0.3),
+    "pt": LanguageProfile(rate=1.05, pitch_range=0.25),
+    "ja": LanguageProfile(rate=1.1, pitch_range=0.15, syllabic=True),
+}
+DEFAULT_VOICE = "neutral"
+DEFAULT_LANGUAGE = "en"
+DEFAULT_SPEED = 1.0
+
+# F1, F2, F3 in Hz for an adult male tract; scaled per voice
+VOWEL_FORMANTS: Dict[str, Tuple[float, float, float]] = {
+    "a": (730, 1090, 2440),
+    "e": (530, 1840, 2480),
+    "i": (270, 2290, 3010),
+    "o": (570, 840, 2410),
+    "u": (300, 870, 2240),
+    "y": (270, 2290, 3010),
+}
+NASAL_FORMANTS = (250, 1100, 2300)
+APPROXIMANT_FORMANTS = (350, 1200, 2500)
+PLOSIVES = set("bdgkpqt")
+FRICATIVES = set("cfhsvxz")
+VOICED_FRICATIVES = set("vz")
+NASALS = set("mn")
+APPROXIMANTS = set("jlrw")
+CLAUSE_PAUSE = set(",;:")
+
+# Unit durations in seconds at speed 1
+DURATIONS = {"vowel": 0.09, "nasal": 0.06, "approximant": 0.05, "fricative": 0.08,
+             "plosive": 0.06, "space": 0.05, "clause": 0.18, "sentence": 0.32}
+
+
+def split_sentences(text: str, max_chars: int = MAX_CHUNK_CHARS) -> List[str]:
+    """Sentence-sized chunks of text, with overly long sentences cut at commas or spaces"""
+    chunks = []
+    for sentence in SENTENCE_BREAK.split(text):
+        sentence = " ".join(sentence.split())
+        while len(sentence) > max_chars:
+            cut = max(sentence.rfind(", ", 0, max_chars), sentence.rfind(" ", 0, max_chars))
+            cut = cut + 1 if cut > 0 else max_chars
+            chunks.append(sentence[:cut].strip())
+            sentence = sentence[cut:].strip()
+        if sentence:
+            chunks.append(sentence)
+    return chunks
+
+
+def resolve_voice(voice: Optional[str], language: Optional[str]) -> Tuple[VoiceProfile, LanguageProfile]:
+    """Profiles for a voice and BCP 47 language tag ("pt-BR" uses "pt"); unknown values fall back to defaults"""
+    code = (language or DEFAULT_LANGUAGE).split("-")[0].lower()
+    return VOICES.get((voice or DEFAULT_VOICE).lower(), VOICES[DEFAULT_VOICE]), LANGUAGES.get(code, LANGUAGES[DEFAULT_LANGUAGE])
+
+
+def resolve_speed(speed: Optional[float]) -> float:
+    """Speaking rate clamped to 0.5-2x; a missing rate is normal speed"""
+    return min(max(DEFAULT_SPEED if speed is None else speed, 0.5), 2.0)
+
+
+def _units(sentence: str, language: LanguageProfile) -> List[Tuple[str, str]]:
+    """(kind, symbol) pairs: accents are folded away and digits read as vowels"""
+    folded = "".join(c for c in unicodedata.normalize("NFKD", sentence.lower()) if not unicodedata.combining(c))
+    units = []
+    for char in folded:
+        if char in VOWEL_FORMANTS:
+            units.append(("vowel", char))
+        elif char in NASALS:
+            units.append(("nasal", char))
+        elif char in APPROXIMANTS:
+            units.append(("approximant", char))
+        elif char in FRICATIVES:
+            units.append(("fricative", char))
+        elif char in PLOSIVES:
+            units.append(("plosive", char))
+        elif char.isdigit():
+            units.append(("vowel", "aeiou"[int(char) % 5]))
+        elif char.isalpha():
+            # Outside the Latin alphabet: read each letter as a consonant-vowel syllable
+            vowel = "aeiou"[ord(char) % 5]
+            units.extend([("plosive", char), ("vowel", vowel)] if language.syllabic else [("vowel", vowel)])
+        elif char in CLAUSE_PAUSE:
+            units.append(("clause", char))
+        elif char.isspace() and units and units[-1][0] != "space":
+            units.append(("space", char))
+    units.append(("sentence", ""))
+    return units
+
+
+def _fade(length: int) -> np.ndarray:
+    """Raised-cosine attack and release so units join without clicks"""
+    ramp = min(length // 2, SAMPLE_RATE // 200)
+    envelope = np.ones(length, dtype=np.float32)
+    if ramp:
+        edge = 0.5 - 0.5 * np.cos(np.linspace(0, np.pi, ramp, dtype=np.float32))
+        envelope[:ramp] = edge
+        envelope[-ramp:] = edge[::-1]
+    return envelope
+
+
+def _voiced(phase: np.ndarray, f0: float, formants: Sequence[float], scale: float) -> np.ndarray:
+    """Harmonics of f0 weighted by Gaussian formant envelopes"""
+    harmonics = np.arange(1, max(2, int(3800 // f0)) + 1, dtype=np.float32)
+    frequencies = harmonics * f0
+    weights = sum(
+        np.exp(-0.5 * ((frequencies - formant * scale) / (60 + 0.08 * formant)) ** 2) / (1 + i)
+        for i, formant in enumerate(formants)
+    ) / np.sqrt(harmonics)
+    return (weights[:, None] * np.sin(harmonics[:, None] * phase[None, :])).sum(axis=0)
+
+
+def render_sentence(sentence: str, voice: str, language: str, speed: Optional[float], seed: int = 0) -> bytes:
+    """16-bit PCM for one sentence, ending in a sentence pause. Same inputs, same bytes."""
+    voice_profile, language_profile = resolve_voice(voice, language)
+    stretch = 1 / (resolve_speed(speed) * language_profile.rate)
+    units = _units(sentence, language_profile)
+    lengths = [max(1, int(DURATIONS[kind] * stretch * SAMPLE_RATE)) for kind, _ in units]
+    total = sum(lengths)
+    rng = np.random.default_rng(seed)
+
+    # Pitch declines across the sentence; questions rise at the end. A slow wobble keeps it from sounding robotic.
+    t = np.linspace(0, 1, total, dtype=np.float32)
+    contour = 1 + language_profile.pitch_range * (0.5 - t)
+    if sentence.rstrip().endswith(("?", "？")):
+        contour += np.clip((t - 0.75) * 4, 0, 1) * 1.5 * language_profile.pitch_range
+    f0 = voice_profile.pitch * contour * (1 + 0.01 * np.sin(2 * np.pi * 5 * t * total / SAMPLE_RATE))
+    phase = np.cumsum(2 * np.pi * f0 / SAMPLE_RATE, dtype=np.float64).astype(np.float32)
+
+    audio = np.zeros(total, dtype=np.float32)
+    start = 0
+    for (kind, symbol), length in zip(units, lengths):
+        end = start + length
+        pitch = float(f0[start:end].mean())
+        if kind == "vowel":
+            segment = _voiced(phase[start:end], pitch, VOWEL_FORMANTS[symbol], voice_profile.formant_scale)
+        elif kind == "nasal":
+            segment = 0.5 * _voiced(phase[start:end], pitch, NASAL_FORMANTS, voice_profile.formant_scale)
+        elif kind == "approximant":
+            segment = 0.7 * _voiced(phase[start:end], pitch, APPROXIMANT_FORMANTS, voice_profile.formant_scale)
+        elif kind == "fricative":
+            # First difference tilts white noise towards the hiss of s/f/h
+            segment = 0.15 * np.diff(rng.standard_normal(length + 1).astype(np.float32))
+            if symbol in VOICED_FRICATIVES:
+                segment += 0.3 * _voiced(phase[start:end], pitch, NASAL_FORMANTS, voice_profile.formant_scale)
+        elif kind == "plosive":
+            # Closure, then a short burst
+            segment = np.zeros(length, dtype=np.float32)
+            burst = length // 3
+            segment[-burst:] = 0.3 * rng.standard_normal(burst).astype(np.float32) * np.linspace(1, 0, burst)
+        else:
+            segment = None
+        if segment is not None:
+            audio[start:end] = segment * _fade(length)
+        start = end
+
+    pcm = np.tanh(0.6 * audio) * 0.85 * 32767
+    return pcm.astype("<i2").tobytes()
+
+
+def wav_header(sample_rate: int = SAMPLE_RATE, data_size: Optional[int] = None) -> bytes:
+    """RIFF/WAVE header for mono 16-bit PCM. Without data_size the sizes are
+    left at their maximum, the convention for a stream of unknown length."""
+    data_size = 0xFFFFFFFF - 36 if data_size is None else data_size
+    byte_rate = sample_rate * SAMPLE_WIDTH
+    return (
+        b"RIFF" + struct.pack("<I", 36 + data_size) + b"WAVE"
+        + b"fmt " + struct.pack("<IHHIIHH", 16, 1, 1, sample_rate, byte_rate, SAMPLE_WIDTH, 8 * SAMPLE_WIDTH)
+        + b"data" + struct.pack("<I", data_size)
+    )
+
+
+def duration_seconds(pcm_bytes: int, sample_rate: int = SAMPLE_RATE) -> float:
+    return pcm_bytes / (sample_rate * SAMPLE_WIDTH)
+
+
+def _seed(sentence: str, voice: str, language: str, speed: float) -> int:
+    digest = hashlib.blake2b(f"{voice}|{language}|{speed}|{sentence}".encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+class SpeechPipeline:
+    """Renders sentences on a pool of worker processes and yields their audio in order.
+
+    At most lookahead sentences are in flight per stream: enough to keep
+    the workers busy, few enough that one long text cannot monopolise the
+    pool. The first sentence is submitted first, so time to first audio
+    is one sentence's render time however long the text is.
+    """
+
+    def __init__(self, workers: Optional[int] = None, lookahead: Optional[int] = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.lookahead = lookahead or self.workers
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that runs an event loop and driver threads is unsafe
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    async def stream(self, sentences: Sequence[str], voice: str, language: str,
+                     speed: Optional[float]) -> AsyncIterator[bytes]:
+        """PCM for each sentence, in order, as soon as it and everything before it is rendered"""
+        loop = asyncio.get_running_loop()
+        speed = resolve_speed(speed)
+        pending: Deque[asyncio.Future] = deque()
+        try:
+            for sentence in sentences:
+                pending.append(loop.run_in_executor(
+                    self._pool(), render_sentence, sentence, voice, language, speed,
+                    _seed(sentence, voice, language, speed)
+                ))
+                if len(pending) >= self.lookahead:
+                    yield await pending.popleft()
+            while pending:
+                yield await pending.popleft()
+        finally:
+            # The listener went away or a render failed: drop sentences not started yet
+            for future in pending:
+                future.cancel()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,262 @@
+"""Segmented video rendering: fixed-length segments on a worker process pool, then a concat stage.
+
+Frames come from a procedural stand-in (gradients, moving shapes, the
+prompt as a caption) and are stored as Motion-JPEG AVI, which needs no
+codec beyond Pillow's JPEG encoder and can be concatenated without
+re-encoding. Every finished segment is stored as an asset, so a failed
+render can resume from the segments it already has.
+"""
+import asyncio
+import hashlib
+import io
+import logging
+import math
+import multiprocessing
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from assets import AssetStore
+from generation import TransientGenerationError
+
+logger = logging.getLogger(__name__)
+
+RESOLUTIONS: Dict[str, Tuple[int, int]] = {
+    "480p": (854, 480),
+    "720p": (1280, 720),
+    "1080p": (1920, 1080),
+    "4k": (3840, 2160),
+}
+# (background top, background bottom, accent) per style
+PALETTES: Dict[str, Tuple[Tuple[int, int, int], ...]] = {
+    "cinematic": ((12, 28, 44), (4, 60, 72), (255, 140, 40)),
+    "documentary": ((70, 90, 60), (150, 130, 90), (240, 230, 200)),
+    "commercial": ((20, 110, 230), (230, 240, 255), (255, 200, 0)),
+    "artistic": ((120, 20, 120), (250, 170, 60), (40, 230, 200)),
+}
+DEFAULT_STYLE = "cinematic"
+CONTENT_TYPE = "video/x-msvideo"
+JPEG_QUALITY = 80
+
+
+class SegmentError(TransientGenerationError):
+    """Some segments failed every attempt; the ones that finished are kept for the next try"""
+
+
+@dataclass(frozen=True)
+class SegmentSpec:
+    index: int
+    first_frame: int
+    frames: int
+    width: int
+    height: int
+    fps: int
+    style: str
+    prompt: str
+
+
+def plan_segments(prompt: str, duration: float, resolution: str, style: Optional[str],
+                  fps: int = 24, segment_seconds: float = 2.0) -> List[SegmentSpec]:
+    """Split a video into fixed-length segments; the last one may be shorter"""
+    width, height = RESOLUTIONS[resolution]
+    style = style if style in PALETTES else DEFAULT_STYLE
+    total = max(1, round(duration * fps))
+    per_segment = max(1, round(segment_seconds * fps))
+    return [
+        SegmentSpec(index=index, first_frame=first, frames=min(per_segment, total - first),
+                    width=width, height=height, fps=fps, style=style, prompt=prompt)
+        for index, first in enumerate(range(0, total, per_segment))
+    ]
+
+
+def render_segment(spec: SegmentSpec) -> bytes:
+    """Worker entry point: synthesize and JPEG-encode a segment's frames into an MJPEG AVI"""
+    from PIL import Image, ImageDraw, ImageFont
+
+    top, bottom, accent = PALETTES[spec.style]
+    seed = int.from_bytes(hashlib.blake2b(spec.prompt.encode("utf-8"), digest_size=8).digest(), "little")
+    # Three shapes whose paths depend on the prompt, so the same prompt gives the same video
+    orbits = [((seed >> (8 * i)) & 0xFF) / 255 for i in range(6)]
+    try:
+        font = ImageFont.load_default(size=max(12, spec.height // 18))
+    except TypeError:  # Pillow < 10.1 has a single bitmap size
+        font = ImageFont.load_default()
+    radius = spec.height // 10
+
+    frames = []
+    for number in range(spec.first_frame, spec.first_frame + spec.frames):
+        t = number / spec.fps
+        # Slowly breathing vertical gradient, built as one column and stretched
+        shift = 0.5 + 0.5 * math.sin(t * 0.4)
+        column = Image.linear_gradient("L").resize((1, spec.height))
+        image = Image.composite(
+            Image.new("RGB", (1, spec.height), bottom), Image.new("RGB", (1, spec.height), top),
+            column.point(lambda v: int(v * (0.6 + 0.4 * shift)))
+        ).resize((spec.width, spec.height))
+        draw = ImageDraw.Draw(image)
+        for i in range(3):
+            x = spec.width * (0.5 + 0.35 * math.sin(t * (0.5 + orbits[i]) + i * 2.1))
+            y = spec.height * (0.45 + 0.25 * math.cos(t * (0.4 + orbits[i + 3]) + i * 1.3))
+            r = radius * (0.6 + 0.4 * (i + 1) / 3)
+            draw.ellipse((x - r, y - r, x + r, y + r), fill=tuple(int(c * (0.6 + 0.2 * i)) for c in accent))
+        draw.text((spec.width // 2, spec.height * 0.85), spec.prompt[:80], fill=(255, 255, 255), font=font, anchor="mm")
+        draw.text((spec.height // 30, spec.height // 30), f"{int(t // 60):02d}:{t % 60:05.2f}", fill=(255, 255, 255), font=font)
+        output = io.BytesIO()
+        image.save(output, "JPEG", quality=JPEG_QUALITY)
+        frames.append(output.getvalue())
+    return write_avi(frames, spec.width, spec.height, spec.fps)
+
+
+# Motion-JPEG AVI (RIFF) container
+
+def _chunk(fourcc: bytes, data: bytes) -> bytes:
+    return fourcc + struct.pack("<I", len(data)) + data + (b"\0" if len(data) % 2 else b"")
+
+
+def _padded(size: int) -> int:
+    return 8 + size + size % 2
+
+
+def avi_header(sizes: Sequence[int], width: int, height: int, fps: int) -> bytes:
+    """Everything before the first frame, for frames of the given sizes"""
+    largest = max(sizes, default=0)
+    avih = struct.pack(
+        "<IIIIIIIIII16x", 1_000_000 // fps, largest * fps, 0, 0x10, len(sizes), 0, 1, largest, width, height
+    )
+    strh = b"vidsMJPG" + struct.pack("<IHHIIIIIIIIhhhh", 0, 0, 0, 0, 1, fps, 0, len(sizes), largest,
+                                     0xFFFFFFFF, 0, 0, 0, width, height)
+    strf = struct.pack("<IiiHH4sIiiII", 40, width, height, 1, 24, b"MJPG", width * height * 3, 0, 0, 0, 0)
+    hdrl = b"hdrl" + _chunk(b"avih", avih) + _chunk(b"LIST", b"strl" + _chunk(b"strh", strh) + _chunk(b"strf", strf))
+    movi_size = 4 + sum(_padded(size) for size in sizes)
+    riff_size = 4 + _padded(len(hdrl)) + 8 + movi_size + _padded(16 * len(sizes))
+    return (b"RIFF" + struct.pack("<I", riff_size) + b"AVI " + _chunk(b"LIST", hdrl)
+            + b"LIST" + struct.pack("<I", movi_size) + b"movi")
+
+
+def avi_index(sizes: Sequence[int]) -> bytes:
+    """The idx1 chunk: every frame is a keyframe, offsets are relative to "movi" """
+    entries, offset = bytearray(), 4
+    for size in sizes:
+        entries += b"00dc" + struct.pack("<III", 0x10, offset, size)
+        offset += _padded(size)
+    return _chunk(b"idx1", bytes(entries))
+
+
+def write_avi(frames: Sequence[bytes], width: int, height: int, fps: int) -> bytes:
+    sizes = [len(frame) for frame in frames]
+    return avi_header(sizes, width, height, fps) + b"".join(_chunk(b"00dc", frame) for frame in frames) + avi_index(sizes)
+
+
+def avi_frames(data: bytes) -> List[bytes]:
+    """The JPEG frames of an AVI written by write_avi"""
+    if data[:4] != b"RIFF" or data[8:12] != b"AVI ":
+        raise ValueError("Not an AVI file")
+    position = 12
+    while position + 8 <= len(data):
+        fourcc, size = data[position:position + 4], struct.unpack_from("<I", data, position + 4)[0]
+        if fourcc == b"LIST" and data[position + 8:position + 12] == b"movi":
+            frames, cursor, end = [], position + 12, position + 8 + size
+            while cursor + 8 <= end:
+                frame_size = struct.unpack_from("<I", data, cursor + 4)[0]
+                frames.append(data[cursor + 8:cursor + 8 + frame_size])
+                cursor += _padded(frame_size)
+            return frames
+        position += _padded(size)
+    raise ValueError("AVI has no movi list")
+
+
+class VideoPipeline:
+    """Renders segments on worker processes and concatenates them from the asset store"""
+
+    def __init__(self, store: AssetStore, workers: Optional[int] = None, retries: int = 2):
+        self.store = store
+        self.workers = workers or os.cpu_count() or 1
+        self.retries = retries
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that runs an event loop and driver threads is unsafe
+            self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    async def _render_one(self, spec: SegmentSpec) -> bytes:
+        loop = asyncio.get_running_loop()
+        pool = self._pool()
+        try:
+            return await loop.run_in_executor(pool, render_segment, spec)
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory): the next attempt starts a fresh pool.
+            # Other segments fail with the same pool; only the first replaces it.
+            if self._executor is pool:
+                self._executor = None
+                pool.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    async def _segment(self, spec: SegmentSpec, on_segment: Callable[[int, str], Awaitable[None]]) -> str:
+        for attempt in range(self.retries + 1):
+            try:
+                data = await self._render_one(spec)
+                break
+            except Exception as e:
+                if attempt == self.retries:
+                    raise
+                logger.warning("Video segment %d attempt %d failed (%s), retrying", spec.index, attempt + 1, e)
+        asset = await self.store.put(data, CONTENT_TYPE)
+        await on_segment(spec.index, asset.digest)
+        return asset.digest
+
+    async def render(self, segments: Sequence[SegmentSpec], finished: Mapping[int, str],
+                     on_segment: Callable[[int, str], Awaitable[None]]) -> List[str]:
+        """Segment digests in order, rendering only segments not already finished.
+
+        All missing segments are submitted at once, so wall-clock time
+        scales with the worker count rather than the duration. A segment
+        that fails every attempt does not stop the others: they are all
+        kept, and SegmentError reports what is left to do.
+        """
+        digests: Dict[int, str] = {}
+        for spec in segments:
+            digest = finished.get(spec.index)
+            if digest is not None and await self.store.stat(digest) is not None:
+                digests[spec.index] = digest
+        todo = [spec for spec in segments if spec.index not in digests]
+        results = await asyncio.gather(*(self._segment(spec, on_segment) for spec in todo), return_exceptions=True)
+
+        failed = []
+        for spec, result in zip(todo, results):
+            if isinstance(result, BaseException):
+                logger.error("Video segment %d failed: %s", spec.index, result)
+                failed.append(spec.index)
+            else:
+                digests[spec.index] = result
+        if failed:
+            raise SegmentError(f"{len(failed)} of {len(segments)} segments failed (first: {failed[0]})")
+        return [digests[spec.index] for spec in segments]
+
+    async def concat(self, digests: Sequence[str], spec: SegmentSpec) -> str:
+        """Join segments into one AVI without re-encoding and store it; returns its digest"""
+        # First pass for the frame sizes the header and index need, second to stream the frames
+        sizes: List[int] = []
+        for digest in digests:
+            sizes.extend(len(frame) for frame in avi_frames(await self._read(digest)))
+
+        async def chunks() -> AsyncIterator[bytes]:
+            yield avi_header(sizes, spec.width, spec.height, spec.fps)
+            for digest in digests:
+                for frame in avi_frames(await self._read(digest)):
+                    yield _chunk(b"00dc", frame)
+            yield avi_index(sizes)
+
+        return (await self.store.put(chunks(), CONTENT_TYPE)).digest
+
+    async def _read(self, digest: str) -> bytes:
+        return b"".join([chunk async for chunk in self.store.read(digest)])
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Wall-clock benchmark for segmented video rendering.
+
+Renders videos of growing length with a growing number of worker
+processes and reports render and concat time. With enough cores, time
+for a given duration should fall as workers are added, until there are
+as many workers as segments.
+
+    python video_benchmark.py --durations 10,30,60 --workers 1,2,4,8 --resolution 720p
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from assets import MemoryAssetStore
+from video import VideoPipeline, plan_segments
+
+
+async def measure(workers: int, duration: int, args) -> dict:
+    pipeline = VideoPipeline(MemoryAssetStore(), workers=workers, retries=0)
+    segments = plan_segments(args.prompt, duration, args.resolution, args.style, args.fps, args.segment_seconds)
+
+    async def on_segment(index: int, digest: str) -> None:
+        pass
+
+    try:
+        # Start the workers so the measurement is not a cold start
+        await asyncio.gather(*(pipeline._render_one(segments[0]) for _ in range(workers)))
+        started = time.perf_counter()
+        digests = await pipeline.render(segments, {}, on_segment)
+        rendered = time.perf_counter() - started
+        await pipeline.concat(digests, segments[0])
+        total = time.perf_counter() - started
+    finally:
+        pipeline.shutdown()
+    return {"segments": len(segments), "render_s": round(rendered, 2), "total_s": round(total, 2)}
+
+
+async def run(args) -> dict:
+    results = {}
+    for duration in (int(duration) for duration in args.durations.split(",")):
+        results[duration] = {}
+        for workers in (int(workers) for workers in args.workers.split(",")):
+            result = results[duration][workers] = await measure(workers, duration, args)
+            print(f"🔍 {duration:>4}s video, {workers:>2} workers: {result['segments']:>3} segments | "
+                  f"render {result['render_s']:7.2f}s | total {result['total_s']:7.2f}s")
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark video render time by duration and worker count")
+    parser.add_argument("--durations", default="10,30,60", help="Comma-separated durations in seconds")
+    parser.add_argument("--workers", default="1,2,4", help="Comma-separated worker process counts")
+    parser.add_argument("--resolution", default="720p")
+    parser.add_argument("--style", default="cinematic")
+    parser.add_argument("--fps", type=int, default=24)
+    parser.add_argument("--segment-seconds", type=float, default=2.0)
+    parser.add_argument("--prompt", default="A product launch in Yangon at sunrise")
+    parser.add_argument("--output", help="Write results JSON here")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
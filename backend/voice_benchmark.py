@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Time-to-first-audio benchmark for the speech pipeline.
+
+Streams texts of growing length through SpeechPipeline and reports how
+long the first sentence's audio takes to arrive next to the time for the
+whole text. Time to first audio should stay flat while the total grows
+with the text.
+
+    python voice_benchmark.py --sentences 1,10,100,400 --workers 4
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from speech import SpeechPipeline, duration_seconds, split_sentences
+
+SENTENCE = "Welcome to Lotaya AI, your creative partner for brands and stories."
+
+
+async def measure(pipeline: SpeechPipeline, count: int, voice: str, language: str, speed: float) -> dict:
+    sentences = split_sentences(" ".join([SENTENCE] * count))
+    started = time.perf_counter()
+    first = None
+    size = 0
+    async for pcm in pipeline.stream(sentences, voice, language, speed):
+        if first is None:
+            first = time.perf_counter() - started
+        size += len(pcm)
+    total = time.perf_counter() - started
+    return {
+        "first_audio_ms": round(first * 1000, 1),
+        "total_ms": round(total * 1000, 1),
+        "audio_seconds": round(duration_seconds(size), 1),
+    }
+
+
+async def run(args) -> dict:
+    pipeline = SpeechPipeline(workers=args.workers)
+    try:
+        # Start the workers so the first measurement is not a cold start
+        await measure(pipeline, pipeline.workers, args.voice, args.language, args.speed)
+        results = {}
+        for count in (int(count) for count in args.sentences.split(",")):
+            results[count] = await measure(pipeline, count, args.voice, args.language, args.speed)
+            result = results[count]
+            print(f"🔍 {count:>5} sentences: first audio {result['first_audio_ms']:7.1f}ms | "
+                  f"total {result['total_ms']:9.1f}ms | {result['audio_seconds']:8.1f}s of audio")
+        return results
+    finally:
+        pipeline.shutdown()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark time to first audio as the text grows")
+    parser.add_argument("--sentences", default="1,10,100,400", help="Comma-separated sentence counts")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: one per CPU)")
+    parser.add_argument("--voice", default="female")
+    parser.add_argument("--language", default="en-US")
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--output", help="Write results JSON here")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\n📄 Results written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,12 +4,18 @@ Comprehensive Backend API Testing for Lotaya AI Platform
 Tests all 12 AI tool endpoints plus basic functionality
 """
 
+import base64
 import requests
 import sys
 import json
 from datetime import datetime
 import time
 
+# An 8x8 PNG: a red square on a light background
+SAMPLE_PNG = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAgAAAAICAIAAABLbSncAAAAKElEQVR4nGP88OEDAzbAhFWUgYGBBULd0NODC2lcuoRPB+kSjCS7CgBQjgixunOVegAAAABJRU5ErkJggg=="
+)
+
 class LotayaAPITester:
     def __init__(self, base_url="https://74d58c5b-eb01-4edd-b53b-6b57e7c6c417.preview.emergentagent.com"):
         self.base_url = base_url
@@ -82,6 +88,10 @@ class LotayaAPITester:
         # Test root endpoint
         self.test_endpoint("API Root", "GET", "", 200)
         
+        # Test liveness and readiness probes
+        self.test_endpoint("Liveness Probe", "GET", "healthz", 200)
+        self.test_endpoint("Readiness Probe", "GET", "readyz", 200)
+        
         # Test status creation
         status_data = {"client_name": f"test_client_{int(time.time())}"}
         self.test_endpoint("Create Status Check", "POST", "status", 200, status_data)
@@ -103,7 +113,7 @@ class LotayaAPITester:
             "colorPalette": ["#1A73E8", "#FBBC05"],
             "style": "modern"
         }
-        self.test_endpoint("Logo Generator", "POST", "generate-logo", 200, logo_data)
+        self.test_endpoint("Logo Generator", "POST", "generate-logo", 202, logo_data)
         
         # 2. Video Generator
         video_data = {
@@ -112,7 +122,7 @@ class LotayaAPITester:
             "style": "cinematic",
             "resolution": "1080p"
         }
-        self.test_endpoint("Video Generator", "POST", "generate-video", 200, video_data)
+        self.test_endpoint("Video Generator", "POST", "generate-video", 202, video_data)
         
         # 3. Brand Kit Generator
         brand_kit_data = {
@@ -121,7 +131,7 @@ class LotayaAPITester:
             "brandPersonality": ["innovative", "trustworthy"],
             "targetAudience": "tech professionals"
         }
-        self.test_endpoint("Brand Kit Generator", "POST", "generate-brand-kit", 200, brand_kit_data)
+        self.test_endpoint("Brand Kit Generator", "POST", "generate-brand-kit", 202, brand_kit_data)
         
         # 4. Social Media Content
         social_data = {
@@ -130,7 +140,7 @@ class LotayaAPITester:
             "topic": "AI technology trends",
             "tone": "professional"
         }
-        self.test_endpoint("Social Media Generator", "POST", "generate-social-content", 200, social_data)
+        self.test_endpoint("Social Media Generator", "POST", "generate-social-content", 202, social_data)
         
         # 5. AI Chat Assistant
         chat_data = {
@@ -139,6 +149,11 @@ class LotayaAPITester:
         }
         self.test_endpoint("AI Chat Assistant", "POST", "chat-assistant", 200, chat_data)
         
+        response = requests.post(f"{self.api_url}/chat-assistant/stream", json=chat_data, timeout=30)
+        self.log_test("AI Chat Assistant - Streaming",
+                      response.status_code == 200 and "event: token" in response.text and "event: done" in response.text,
+                      f"Expected token and done events, got {response.status_code}")
+        
         # 6. Website Generator
         website_data = {
             "businessName": "TestTech",
@@ -146,7 +161,7 @@ class LotayaAPITester:
             "pages": ["home", "about", "services", "contact"],
             "colorScheme": "modern"
         }
-        self.test_endpoint("Website Generator", "POST", "generate-website", 200, website_data)
+        self.test_endpoint("Website Generator", "POST", "generate-website", 202, website_data)
         
         # 7. Voice Generator
         voice_data = {
@@ -155,7 +170,12 @@ class LotayaAPITester:
             "language": "en-US",
             "speed": 1.0
         }
-        self.test_endpoint("Voice Generator", "POST", "generate-voice", 200, voice_data)
+        self.test_endpoint("Voice Generator", "POST", "generate-voice", 202, voice_data)
+        
+        response = requests.post(f"{self.api_url}/generate-voice/stream", json=voice_data, timeout=30)
+        self.log_test("Voice Generator - Streaming",
+                      response.status_code == 200 and response.content[:4] == b"RIFF" and len(response.content) > 44,
+                      f"Expected WAV audio, got {response.status_code}")
         
         # 8. Photo Editor
         photo_data = {
@@ -163,13 +183,13 @@ class LotayaAPITester:
             "editType": "enhance",
             "intensity": 0.8
         }
-        self.test_endpoint("Photo Editor", "POST", "edit-photo", 200, photo_data)
+        self.test_endpoint("Photo Editor", "POST", "edit-photo", 202, photo_data)
         
         # 9. Background Remover
         bg_remove_data = {
             "imageUrl": "https://example.com/test-image.jpg"
         }
-        self.test_endpoint("Background Remover", "POST", "remove-background", 200, bg_remove_data)
+        self.test_endpoint("Background Remover", "POST", "remove-background", 202, bg_remove_data)
         
         # 10. Domain Generator
         domain_data = {
@@ -196,7 +216,157 @@ class LotayaAPITester:
             "website": "www.testtech.com",
             "style": "modern"
         }
-        self.test_endpoint("Business Card Generator", "POST", "generate-business-card", 200, card_data)
+        self.test_endpoint("Business Card Generator", "POST", "generate-business-card", 202, card_data)
+
+    def wait_for_job(self, job_id, timeout=15):
+        """Poll a job until it finishes; returns its last known state"""
+        job, deadline = {}, time.time() + timeout
+        while job.get("status") not in ("completed", "failed") and time.time() < deadline:
+            time.sleep(1)
+            response = requests.get(f"{self.api_url}/jobs/{job_id}", timeout=30)
+            job = response.json() if response.status_code == 200 else {}
+        return job
+
+    def test_job_endpoints(self):
+        """Test that queued generation jobs can be polled to completion"""
+        print("\n" + "="*60)
+        print("TESTING JOB STATUS ENDPOINTS")
+        print("="*60)
+        
+        logo_data = {"brandName": "JobBrand", "keywords": ["queue"]}
+        success, job = self.test_endpoint("Queue Logo Job", "POST", "generate-logo", 202, logo_data)
+        if not success:
+            return
+        
+        job_id = job.get("jobId")
+        self.test_endpoint("Get Jobs By IDs", "GET", f"jobs?ids={job_id}", 200)
+        
+        # Poll until the worker pool finishes the job
+        deadline = time.time() + 15
+        status = job.get("status")
+        while status not in ("completed", "failed") and time.time() < deadline:
+            time.sleep(1)
+            response = requests.get(f"{self.api_url}/jobs/{job_id}", timeout=30)
+            status = response.json().get("status") if response.status_code == 200 else None
+        self.log_test("Queued Job Completes", status == "completed", f"Final status: {status}")
+        
+        # The finished logo is a stored asset: cacheable by hash and range-addressable
+        asset_url = response.json().get("assetUrl") if status == "completed" else None
+        if asset_url and asset_url.startswith("/"):
+            asset_url = f"{self.base_url}{asset_url}"
+        if asset_url:
+            response = requests.get(asset_url, timeout=30)
+            self.log_test("Download Asset", response.status_code == 200 and bool(response.headers.get("ETag")),
+                          f"Expected 200 with ETag, got {response.status_code}")
+            response = requests.get(asset_url, headers={"Range": "bytes=0-9"}, timeout=30)
+            self.log_test("Asset Range Request", response.status_code == 206 and len(response.content) == 10,
+                          f"Expected 206 with 10 bytes, got {response.status_code}")
+        
+        # The event stream of a finished job replays its final state and closes
+        try:
+            response = requests.get(f"{self.api_url}/jobs/{job_id}/events", stream=True, timeout=30)
+            events = [json.loads(line[len("data: "):]) for line in response.iter_lines(decode_unicode=True)
+                      if line and line.startswith("data: ")]
+            final = events[-1]["status"] if events else None
+            self.log_test("Job Event Stream", final == "completed", f"Final event status: {final}")
+        except Exception as e:
+            self.log_test("Job Event Stream", False, f"Exception: {str(e)}")
+        
+        # An uploaded photo is stored as an asset, then edited on the image worker pool
+        try:
+            response = requests.post(f"{self.api_url}/remove-background/upload",
+                                     files={"image": ("sample.png", SAMPLE_PNG, "image/png")}, timeout=30)
+            job = self.wait_for_job(response.json()["jobId"]) if response.status_code == 202 else {}
+            self.log_test("Uploaded Background Removal", job.get("status") == "completed",
+                          f"Final status: {job.get('status')}")
+        except Exception as e:
+            self.log_test("Uploaded Background Removal", False, f"Exception: {str(e)}")
+        
+        # Business cards render to a print-ready PDF in the asset store
+        card_data = {"name": "Jane Doe", "title": "CTO", "company": "JobBrand", "style": "classic"}
+        success, job = self.test_endpoint("Queue Business Card Job", "POST", "generate-business-card", 202, card_data)
+        if success:
+            job = self.wait_for_job(job["jobId"])
+            asset_url = job.get("assetUrl") or ""
+            if asset_url.startswith("/"):
+                asset_url = f"{self.base_url}{asset_url}"
+            content = requests.get(asset_url, timeout=30).content if asset_url else b""
+            self.log_test("Business Card PDF", content.startswith(b"%PDF-"), f"Final status: {job.get('status')}")
+        
+        # Brand kits build their parts concurrently and ship as a zip
+        kit_data = {"brandName": "JobBrand", "industry": "Technology", "brandPersonality": ["friendly"]}
+        success, job = self.test_endpoint("Queue Brand Kit Job", "POST", "generate-brand-kit", 202, kit_data)
+        if success:
+            job = self.wait_for_job(job["jobId"])
+            asset_url = job.get("assetUrl") or ""
+            if asset_url.startswith("/"):
+                asset_url = f"{self.base_url}{asset_url}"
+            content = requests.get(asset_url, timeout=30).content if asset_url else b""
+            self.log_test("Brand Kit Archive", content.startswith(b"PK") and bool((job.get("metadata") or {}).get("palette")),
+                          f"Final status: {job.get('status')}")
+        
+        # Videos render as parallel segments and are joined into one AVI
+        video_data = {"prompt": "Job queue demo", "durationSeconds": 5, "resolution": "480p"}
+        success, job = self.test_endpoint("Queue Video Job", "POST", "generate-video", 202, video_data)
+        if success:
+            job = self.wait_for_job(job["jobId"], timeout=60)
+            segments = (job.get("metadata") or {}).get("segments")
+            self.log_test("Segmented Video", job.get("status") == "completed" and job.get("progress") == 1.0 and bool(segments),
+                          f"Final status: {job.get('status')}, segments: {segments}")
+            self.test_endpoint("Resume Completed Job", "POST", f"jobs/{job['jobId']}/resume", 409)
+        
+        self.test_endpoint("Get Unknown Job", "GET", "jobs/unknown_job", 404)
+        
+        # Job history: newest first, paginated with an opaque cursor
+        success, page = self.test_endpoint("Job History", "GET", "jobs?type=logo&limit=2&fields=status,created_at", 200)
+        if success and page.get("nextCursor"):
+            self.test_endpoint("Job History - Next Page", "GET", f"jobs?type=logo&limit=2&cursor={page['nextCursor']}", 200)
+        self.test_endpoint("Job History - Unknown Field", "GET", "jobs?fields=bogus", 400)
+
+    def test_result_cache(self):
+        """Test that repeated deterministic requests are served from the cache"""
+        print("\n" + "="*60)
+        print("TESTING RESULT CACHE")
+        print("="*60)
+        
+        slogan_data = {"brandName": "CacheBrand", "industry": "creative", "tone": "inspiring"}
+        self.test_endpoint("Slogan Generator - First Call", "POST", "generate-slogan", 200, slogan_data)
+        
+        response = requests.post(f"{self.api_url}/generate-slogan", json=slogan_data, timeout=30)
+        etag = response.headers.get("ETag")
+        self.log_test("Slogan Generator - ETag Header", bool(etag), "Missing ETag header")
+        
+        if etag:
+            response = requests.post(f"{self.api_url}/generate-slogan", json=slogan_data,
+                                     headers={"If-None-Match": etag}, timeout=30)
+            self.log_test("Slogan Generator - Not Modified", response.status_code == 304,
+                          f"Expected 304, got {response.status_code}")
+        
+        self.test_endpoint("Cache Stats", "GET", "cache/stats", 200)
+
+    def test_batch_endpoints(self):
+        """Test bulk generation with per-item results"""
+        print("\n" + "="*60)
+        print("TESTING BATCH ENDPOINTS")
+        print("="*60)
+        
+        items = [
+            {"brandName": "BatchOne", "industry": "technology"},
+            {"brandName": "BatchTwo", "industry": "creative"},
+            {"brandName": "Invalid"}  # Missing industry, reported per item
+        ]
+        try:
+            response = requests.post(f"{self.api_url}/batch/slogan", json=items, timeout=60)
+            lines = [json.loads(line) for line in response.text.splitlines() if line]
+            results = [line for line in lines if "index" in line]
+            summary = lines[-1].get("summary", {}) if lines else {}
+            success = (response.status_code == 200 and len(results) == 3
+                       and summary.get("succeeded") == 2 and summary.get("failed") == 1)
+            self.log_test("Batch Slogan Generator", success, f"Status {response.status_code}, summary {summary}")
+        except Exception as e:
+            self.log_test("Batch Slogan Generator", False, f"Exception: {str(e)}")
+        
+        self.test_endpoint("Batch - Unknown Tool", "POST", "batch/unknown", 404, [])
 
     def test_error_handling(self):
         """Test error handling with invalid data"""
@@ -210,6 +380,13 @@ class LotayaAPITester:
         # Test missing required fields
         invalid_logo_data = {"brandName": ""}  # Missing required fields
         self.test_endpoint("Logo Generator - Invalid Data", "POST", "generate-logo", 422, invalid_logo_data)
+        
+        # Unknown photo edits are rejected before a job is queued
+        invalid_photo_data = {"imageUrl": "https://example.com/test-image.jpg", "editType": "melt"}
+        self.test_endpoint("Photo Editor - Unknown Edit", "POST", "edit-photo", 400, invalid_photo_data)
+        
+        invalid_video_data = {"prompt": "Too sharp", "resolution": "16k"}
+        self.test_endpoint("Video Generator - Unknown Resolution", "POST", "generate-video", 400, invalid_video_data)
 
     def run_all_tests(self):
         """Run all test suites"""
@@ -222,6 +399,9 @@ class LotayaAPITester:
         # Run test suites
         self.test_basic_endpoints()
         self.test_ai_generation_endpoints()
+        self.test_job_endpoints()
+        self.test_result_cache()
+        self.test_batch_endpoints()
         self.test_error_handling()
         
         end_time = time.time()
@@ -1,6 +1,6 @@
 import React, { useState, useRef, useEffect } from 'react';
 import { MessageSquare, Send, Bot, User, Sparkles, Loader } from 'lucide-react';
-import axios from 'axios';
+import { askAssistant } from '../utils/chat';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -44,28 +44,35 @@ const AiChatWidget = ({ onClose }) => {
     setInputMessage('');
     setIsTyping(true);
 
+    const botId = Date.now() + 1;
     try {
-      const response = await axios.post(`${API}/chat-assistant`, {
+      const reply = await askAssistant(API, {
         message: message,
         context: messages.slice(-3).map(m => `${m.type}: ${m.content}`).join('\n')
+      }, (text) => {
+        // Show the reply as it streams in; the typing indicator gives way to the message
+        setIsTyping(false);
+        setMessages(prev => prev.some(m => m.id === botId)
+          ? prev.map(m => m.id === botId ? { ...m, content: text } : m)
+          : [...prev, { id: botId, type: 'bot', content: text, suggestions: [] }]);
       });
 
       const botMessage = {
-        id: Date.now() + 1,
+        id: botId,
         type: 'bot',
-        content: response.data.response,
-        suggestions: response.data.suggestions
+        content: reply.response,
+        suggestions: reply.suggestions
       };
 
-      setMessages(prev => [...prev, botMessage]);
+      setMessages(prev => [...prev.filter(m => m.id !== botId), botMessage]);
     } catch (error) {
       const errorMessage = {
-        id: Date.now() + 1,
+        id: botId,
         type: 'bot',
         content: "I'm sorry, I'm having trouble responding right now. Please try again in a moment.",
         suggestions: ["Try again", "Ask something else"]
       };
-      setMessages(prev => [...prev, errorMessage]);
+      setMessages(prev => [...prev.filter(m => m.id !== botId), errorMessage]);
     } finally {
       setIsTyping(false);
     }
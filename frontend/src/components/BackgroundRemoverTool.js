@@ -1,6 +1,8 @@
 import React, { useState } from 'react';
 import { Scissors, Download, Sparkles, Loader, Upload } from 'lucide-react';
 import axios from 'axios';
+import { assetHref } from '../utils/assets';
+import { waitForJob } from '../utils/jobs';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -81,7 +83,7 @@ const BackgroundRemoverTool = ({ onClose }) => {
 
     try {
       const response = await axios.post(`${API}/remove-background`, formData);
-      setResult(response.data);
+      setResult(await waitForJob(API, response.data));
     } catch (err) {
       setError(err.response?.data?.detail || 'Failed to remove background. Please try again.');
     } finally {
@@ -91,7 +93,7 @@ const BackgroundRemoverTool = ({ onClose }) => {
 
   const handleDownload = () => {
     if (result?.assetUrl) {
-      window.open(result.assetUrl, '_blank');
+      window.open(assetHref(result.assetUrl), '_blank');
     }
   };
 
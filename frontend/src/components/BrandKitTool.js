@@ -1,6 +1,8 @@
 import React, { useState } from 'react';
 import { Package, Download, Sparkles, Loader, Palette } from 'lucide-react';
 import axios from 'axios';
+import { assetHref } from '../utils/assets';
+import { waitForJob } from '../utils/jobs';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -62,7 +64,7 @@ const BrandKitTool = ({ onClose }) => {
         targetAudience: formData.targetAudience || undefined
       });
 
-      setResult(response.data);
+      setResult(await waitForJob(API, response.data));
     } catch (err) {
       setError(err.response?.data?.detail || 'Failed to generate brand kit. Please try again.');
     } finally {
@@ -72,7 +74,7 @@ const BrandKitTool = ({ onClose }) => {
 
   const handleDownload = () => {
     if (result?.assetUrl) {
-      window.open(result.assetUrl, '_blank');
+      window.open(assetHref(result.assetUrl), '_blank');
     }
   };
 
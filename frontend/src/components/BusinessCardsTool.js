@@ -1,6 +1,8 @@
 import React, { useState } from 'react';
 import { CreditCard, Download, Sparkles, Loader, User, Mail, Phone, Globe } from 'lucide-react';
 import axios from 'axios';
+import { assetHref } from '../utils/assets';
+import { waitForJob } from '../utils/jobs';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -88,7 +90,7 @@ const BusinessCardsTool = ({ onClose }) => {
 
     try {
       const response = await axios.post(`${API}/generate-business-card`, formData);
-      setResult(response.data);
+      setResult(await waitForJob(API, response.data));
     } catch (err) {
       setError(err.response?.data?.detail || 'Failed to generate business card. Please try again.');
     } finally {
@@ -98,7 +100,7 @@ const BusinessCardsTool = ({ onClose }) => {
 
   const handleDownload = () => {
     if (result?.assetUrl) {
-      window.open(result.assetUrl, '_blank');
+      window.open(assetHref(result.assetUrl), '_blank');
     }
   };
 
@@ -1,6 +1,8 @@
 import React, { useState } from 'react';
 import { Palette, Download, Sparkles, Loader } from 'lucide-react';
 import axios from 'axios';
+import { assetHref } from '../utils/assets';
+import { waitForJob } from '../utils/jobs';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -68,7 +70,7 @@ const LogoGeneratorTool = ({ onClose }) => {
         style: formData.style
       });
 
-      setResult(response.data);
+      setResult(await waitForJob(API, response.data));
     } catch (err) {
       setError(err.response?.data?.detail || 'Failed to generate logo. Please try again.');
     } finally {
@@ -78,7 +80,7 @@ const LogoGeneratorTool = ({ onClose }) => {
 
   const handleDownload = () => {
     if (result?.assetUrl) {
-      window.open(result.assetUrl, '_blank');
+      window.open(assetHref(result.assetUrl), '_blank');
     }
   };
 
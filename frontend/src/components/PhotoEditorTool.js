@@ -1,6 +1,8 @@
 import React, { useState } from 'react';
 import { Image, Download, Sparkles, Loader, Upload } from 'lucide-react';
 import axios from 'axios';
+import { assetHref } from '../utils/assets';
+import { waitForJob } from '../utils/jobs';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -75,7 +77,7 @@ const PhotoEditorTool = ({ onClose }) => {
 
     try {
       const response = await axios.post(`${API}/edit-photo`, formData);
-      setResult(response.data);
+      setResult(await waitForJob(API, response.data));
     } catch (err) {
       setError(err.response?.data?.detail || 'Failed to edit photo. Please try again.');
     } finally {
@@ -85,7 +87,7 @@ const PhotoEditorTool = ({ onClose }) => {
 
   const handleDownload = () => {
     if (result?.assetUrl) {
-      window.open(result.assetUrl, '_blank');
+      window.open(assetHref(result.assetUrl), '_blank');
     }
   };
 
@@ -1,6 +1,8 @@
 import React, { useState } from 'react';
 import { Share2, Download, Sparkles, Loader, Instagram, Facebook, Twitter, Linkedin } from 'lucide-react';
 import axios from 'axios';
+import { assetHref } from '../utils/assets';
+import { waitForJob } from '../utils/jobs';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -74,7 +76,7 @@ const SocialMediaTool = ({ onClose }) => {
 
     try {
       const response = await axios.post(`${API}/generate-social-content`, formData);
-      setResult(response.data);
+      setResult(await waitForJob(API, response.data));
     } catch (err) {
       setError(err.response?.data?.detail || 'Failed to generate social content. Please try again.');
     } finally {
@@ -84,7 +86,7 @@ const SocialMediaTool = ({ onClose }) => {
 
   const handleDownload = () => {
     if (result?.assetUrl) {
-      window.open(result.assetUrl, '_blank');
+      window.open(assetHref(result.assetUrl), '_blank');
     }
   };
 
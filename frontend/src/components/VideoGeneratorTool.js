@@ -1,6 +1,8 @@
 import React, { useState } from 'react';
 import { Video, Download, Sparkles, Loader, Play } from 'lucide-react';
 import axios from 'axios';
+import { assetHref } from '../utils/assets';
+import { waitForJob } from '../utils/jobs';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -60,7 +62,7 @@ const VideoGeneratorTool = ({ onClose }) => {
 
     try {
       const response = await axios.post(`${API}/generate-video`, formData);
-      setResult(response.data);
+      setResult(await waitForJob(API, response.data));
     } catch (err) {
       setError(err.response?.data?.detail || 'Failed to generate video. Please try again.');
     } finally {
@@ -70,7 +72,7 @@ const VideoGeneratorTool = ({ onClose }) => {
 
   const handleDownload = () => {
     if (result?.assetUrl) {
-      window.open(result.assetUrl, '_blank');
+      window.open(assetHref(result.assetUrl), '_blank');
     }
   };
 
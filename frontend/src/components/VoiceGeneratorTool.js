@@ -1,6 +1,8 @@
 import React, { useState } from 'react';
 import { Mic, Download, Sparkles, Loader, Play, Pause } from 'lucide-react';
 import axios from 'axios';
+import { assetHref } from '../utils/assets';
+import { waitForJob } from '../utils/jobs';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -68,7 +70,7 @@ const VoiceGeneratorTool = ({ onClose }) => {
 
     try {
       const response = await axios.post(`${API}/generate-voice`, formData);
-      setResult(response.data);
+      setResult(await waitForJob(API, response.data));
     } catch (err) {
       setError(err.response?.data?.detail || 'Failed to generate voice. Please try again.');
     } finally {
@@ -84,7 +86,7 @@ const VoiceGeneratorTool = ({ onClose }) => {
 
   const handleDownload = () => {
     if (result?.assetUrl) {
-      window.open(result.assetUrl, '_blank');
+      window.open(assetHref(result.assetUrl), '_blank');
     }
   };
 
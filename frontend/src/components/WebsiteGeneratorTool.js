@@ -1,6 +1,8 @@
 import React, { useState } from 'react';
 import { Globe, Download, Sparkles, Loader, ExternalLink } from 'lucide-react';
 import axios from 'axios';
+import { assetHref } from '../utils/assets';
+import { waitForJob } from '../utils/jobs';
 
 const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
 const API = `${BACKEND_URL}/api`;
@@ -61,7 +63,7 @@ const WebsiteGeneratorTool = ({ onClose }) => {
 
     try {
       const response = await axios.post(`${API}/generate-website`, formData);
-      setResult(response.data);
+      setResult(await waitForJob(API, response.data));
     } catch (err) {
       setError(err.response?.data?.detail || 'Failed to generate website. Please try again.');
     } finally {
@@ -71,7 +73,7 @@ const WebsiteGeneratorTool = ({ onClose }) => {
 
   const handleDownload = () => {
     if (result?.assetUrl) {
-      window.open(result.assetUrl, '_blank');
+      window.open(assetHref(result.assetUrl), '_blank');
     }
   };
 
@@ -0,0 +1,8 @@
+const BACKEND_URL = process.env.REACT_APP_BACKEND_URL;
+
+// Asset URLs from the API may be relative to the API server (ASSET_BASE_URL defaults to
+// /api/assets); resolve those against the backend rather than the page's own origin.
+export const assetHref = (url) => {
+  if (!url || /^[a-z][a-z0-9+.-]*:/i.test(url) || url.startsWith('//')) return url;
+  return `${BACKEND_URL || ''}${url}`;
+};
@@ -0,0 +1,72 @@
+import axios from 'axios';
+
+// Split an SSE buffer into complete events; the trailing partial event is returned as `rest`.
+const parseEvents = (buffer) => {
+  const blocks = buffer.split('\n\n');
+  const rest = blocks.pop();
+  const events = blocks.map((block) => {
+    let name = 'message';
+    let data = '';
+    block.split('\n').forEach((line) => {
+      if (line.startsWith('event: ')) name = line.slice(7);
+      else if (line.startsWith('data: ')) data += line.slice(6);
+    });
+    return { name, data: data ? JSON.parse(data) : {} };
+  });
+  return { events, rest };
+};
+
+const readStream = async (api, body, onToken) => {
+  const response = await fetch(`${api}/chat-assistant/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+    body: JSON.stringify(body),
+  });
+  if (!response.ok || !response.body) {
+    throw new Error(`Chat stream failed with status ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let text = '';
+  let suggestions = [];
+  for (;;) {
+    const { done, value } = await reader.read();
+    if (done) throw new Error('Chat stream ended early');
+    const parsed = parseEvents(buffer + decoder.decode(value, { stream: true }));
+    buffer = parsed.rest;
+    for (const event of parsed.events) {
+      if (event.name === 'token') {
+        text += event.data.text;
+        onToken(text);
+      } else if (event.name === 'suggestions') {
+        suggestions = event.data.suggestions;
+      } else if (event.name === 'error') {
+        throw new Error(event.data.detail);
+      } else if (event.name === 'done') {
+        reader.cancel();
+        return { response: text, suggestions };
+      }
+    }
+  }
+};
+
+// Ask the assistant, calling onToken with the reply so far as it streams in.
+// Falls back to the non-streaming endpoint if streaming fails before any text arrives.
+export const askAssistant = async (api, body, onToken = () => {}) => {
+  let received = false;
+  try {
+    if (typeof fetch === 'undefined' || typeof TextDecoder === 'undefined') {
+      throw new Error('Streaming is not supported');
+    }
+    return await readStream(api, body, (text) => {
+      received = true;
+      onToken(text);
+    });
+  } catch (err) {
+    if (received) throw err;
+    const response = await axios.post(`${api}/chat-assistant`, body);
+    return response.data;
+  }
+};
@@ -0,0 +1,53 @@
+import axios from 'axios';
+
+const POLL_INTERVAL_MS = 1000;
+const TERMINAL_STATUSES = ['completed', 'failed'];
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
+
+// Follow the job's Server-Sent Events stream until it reaches a final status.
+const streamJob = (api, jobId) => new Promise((resolve, reject) => {
+  const source = new EventSource(`${api}/jobs/${jobId}/events`);
+  source.onmessage = (event) => {
+    const job = JSON.parse(event.data);
+    if (TERMINAL_STATUSES.includes(job.status)) {
+      source.close();
+      resolve(job);
+    }
+  };
+  source.onerror = () => {
+    source.close();
+    reject(new Error('Job event stream closed'));
+  };
+});
+
+const pollJob = async (api, job) => {
+  let current = job;
+  while (!TERMINAL_STATUSES.includes(current.status)) {
+    await sleep(POLL_INTERVAL_MS);
+    const response = await axios.get(`${api}/jobs/${current.jobId}`);
+    current = response.data;
+  }
+  return current;
+};
+
+// Generation endpoints answer 202 with a queued job; wait until it finishes.
+export const waitForJob = async (api, job) => {
+  let current = job;
+  if (!TERMINAL_STATUSES.includes(current.status)) {
+    try {
+      current = typeof EventSource !== 'undefined'
+        ? await streamJob(api, job.jobId)
+        : await pollJob(api, job);
+    } catch (err) {
+      current = await pollJob(api, job);
+    }
+  }
+
+  if (current.status === 'failed') {
+    const error = new Error(current.message);
+    error.response = { data: { detail: current.message } };
+    throw error;
+  }
+  return current;
+};